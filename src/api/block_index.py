@@ -0,0 +1,177 @@
+"""
+Persistent index mapping timestamps to block numbers.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.etherscan import EtherscanAPIError
+
+
+class BlockIndex:
+    """
+    Turn date-range timestamps into block bounds without repeated API calls.
+
+    The index keeps a sorted list of exact (block, timestamp) anchors taken
+    from transactions already fetched, plus the answers of earlier
+    block-by-time lookups. A timestamp is located by bisection between the
+    two anchors around it; when they are at most MAX_SLACK blocks apart the
+    bound is answered from the index. Otherwise a single getblocknobytime
+    lookup is made and cached, so repeating a date range costs no calls.
+
+    Bounds are always conservative (a start bound never lies after the
+    first block of the range, an end bound never before the last), because
+    the rows are still filtered by timestamp afterwards and a missed block
+    would silently drop transfers.
+    """
+
+    MAX_SLACK = 5000  # Widest anchor gap answered without a lookup (~17h of blocks)
+    ANCHOR_SPACING = 100  # Keep at most one transaction anchor per this many blocks
+    SETTLED_AGE = 3600  # Lookups for newer timestamps are not cached
+
+    def __init__(self, file_path: Path, client=None):
+        """
+        Initialize the index, loading saved anchors.
+
+        Args:
+            file_path: JSON file holding the index
+            client: Optional EtherscanClient used for lookups
+        """
+        self.file_path = Path(file_path)
+        self.client = client
+        self.lookups = 0
+        self._lock = threading.Lock()
+        self._blocks = []
+        self._timestamps = []
+        self._before = {}  # timestamp -> last block at or before it
+        self._after = {}  # timestamp -> first block at or after it
+        self._load()
+
+    def add(self, block: int, timestamp: int) -> None:
+        """
+        Add an exact (block, timestamp) anchor.
+
+        Anchors closer than ANCHOR_SPACING blocks to an existing one, or
+        out of order with their neighbours, are ignored.
+        """
+        with self._lock:
+            i = bisect.bisect_left(self._blocks, block)
+            if i > 0 and (block - self._blocks[i - 1] < self.ANCHOR_SPACING or timestamp < self._timestamps[i - 1]):
+                return
+            if i < len(self._blocks) and (self._blocks[i] - block < self.ANCHOR_SPACING or timestamp > self._timestamps[i]):
+                return
+            self._blocks.insert(i, block)
+            self._timestamps.insert(i, timestamp)
+
+    def add_transactions(self, transactions: list[dict]) -> None:
+        """Add anchors from raw API transactions ("blockNumber", "timeStamp")."""
+        for tx in transactions:
+            try:
+                self.add(int(tx["blockNumber"]), int(tx["timeStamp"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def first_block_at_or_after(self, timestamp: int) -> int:
+        """
+        Get a start bound: no block at or after the timestamp lies below it.
+
+        Args:
+            timestamp: Start of the range (Unix time)
+
+        Returns:
+            Block number (0 if nothing is known)
+        """
+        with self._lock:
+            if timestamp in self._after:
+                return self._after[timestamp]
+            i = bisect.bisect_left(self._timestamps, timestamp)
+            low = self._blocks[i - 1] if i > 0 else None
+            high = self._blocks[i] if i < len(self._blocks) else None
+            if low is not None and high is not None and high - low <= self.MAX_SLACK:
+                return low + 1
+
+        block = self._lookup(timestamp, "after")
+        if block is not None:
+            return block
+        return low + 1 if low is not None else 0
+
+    def last_block_at_or_before(self, timestamp: int, default: int) -> int:
+        """
+        Get an end bound: no block at or before the timestamp lies above it.
+
+        Args:
+            timestamp: End of the range (Unix time)
+            default: Bound to use when nothing is known (e.g. DEFAULT_END_BLOCK)
+
+        Returns:
+            Block number
+        """
+        # The chain is still growing there: any bound would cut it short
+        if timestamp >= time.time() - self.SETTLED_AGE:
+            return default
+
+        with self._lock:
+            if timestamp in self._before:
+                return self._before[timestamp]
+            i = bisect.bisect_right(self._timestamps, timestamp)
+            low = self._blocks[i - 1] if i > 0 else None
+            high = self._blocks[i] if i < len(self._blocks) else None
+            if low is not None and high is not None and high - low <= self.MAX_SLACK:
+                return high - 1
+
+        block = self._lookup(timestamp, "before")
+        if block is not None:
+            return block
+        return high - 1 if high is not None else default
+
+    def save(self) -> None:
+        """Write the index to disk atomically."""
+        with self._lock:
+            data = json.dumps({
+                "anchors": list(zip(self._blocks, self._timestamps)),
+                "before": self._before,
+                "after": self._after
+            })
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+        with open(temp_path, 'w') as f:
+            f.write(data)
+        os.replace(temp_path, self.file_path)
+
+    def _lookup(self, timestamp: int, closest: str) -> int | None:
+        """Ask the API for the block closest to a timestamp and cache it."""
+        if not self.client:
+            return None
+        try:
+            block = self.client.get_block_by_time(timestamp, closest)
+        except EtherscanAPIError:
+            return None
+        self.lookups += 1
+        if timestamp < time.time() - self.SETTLED_AGE:
+            with self._lock:
+                (self._before if closest == "before" else self._after)[timestamp] = block
+        return block
+
+    def _load(self) -> None:
+        """Load the index from disk."""
+        if not self.file_path.exists():
+            return
+        try:
+            with open(self.file_path, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return
+        for block, timestamp in sorted(data.get("anchors", [])):
+            self._blocks.append(block)
+            self._timestamps.append(timestamp)
+        # JSON object keys are strings
+        self._before = {int(ts): block for ts, block in data.get("before", {}).items()}
+        self._after = {int(ts): block for ts, block in data.get("after", {}).items()}
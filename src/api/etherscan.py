@@ -2,18 +2,25 @@
 Etherscan API client for fetching ERC-20 token transactions.
 """
 
+import threading
 import time
 import requests
-from typing import Callable
+from typing import Callable, Iterator
 
 # Add parent directory to path for imports
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from api.key_pool import ApiKeyPool
+from api.token_registry import TokenRegistry
+from api.windows import iter_windows
 from utils.helpers import calculate_token_value, unix_to_datetime, format_date_display
 
 
+DEFAULT_END_BLOCK = 99999999  # Upper block bound used when no end block is given
+
+
 class EtherscanAPIError(Exception):
     """Custom exception for Etherscan API errors."""
     pass
@@ -26,28 +33,70 @@ class EtherscanClient:
     CHAIN_ID = 1  # Ethereum Mainnet
     RATE_LIMIT_DELAY = 0.25  # 250ms between requests (4 req/sec, under 5/sec limit)
     MAX_RESULTS_PER_PAGE = 1000  # v2 API: page * offset must be <= 10000
+    MAX_THROTTLE_RETRIES = 5  # Rate limit responses a request may get before giving up
+    PAGES_PER_WINDOW = 4  # Pages a block window should hold, judged from the first page
+    MAX_WINDOWS = 16  # Block windows a range is split into at most
+    MIN_WINDOW_BLOCKS = 50000  # Don't split a range into windows smaller than this
+    FETCH_WORKERS = 4  # Block windows in flight per wallet
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str | list, token_registry: TokenRegistry | None = None):
         """
         Initialize the Etherscan client.
 
         Args:
-            api_key: Your Etherscan API key
+            api_key: Your Etherscan API key, or a list of keys (strings or
+                {"key", "weight"} dicts) to share the load across
+            token_registry: Token metadata registry (an in-memory one if None)
+        """
+        keys = [api_key] if isinstance(api_key, str) else list(api_key)
+        self.key_pool = ApiKeyPool(keys, self.RATE_LIMIT_DELAY)
+        self.api_key = self.key_pool.keys[0]
+        self.token_registry = token_registry or TokenRegistry()
+        self._lock = threading.Lock()
+
+        # Usage counters for progress reporting
+        self.api_calls = 0
+        self.rate_limit_wait = 0.0
+
+    def default_fetch_workers(self) -> int:
+        """Block windows to fetch concurrently per wallet."""
+        return self.FETCH_WORKERS
+
+    def default_wallet_workers(self) -> int:
+        """Wallets to fetch concurrently: more keys give more rate budget."""
+        return max(1, len(self.key_pool))
+
+    def _rate_limit(self) -> str:
         """
-        self.api_key = api_key
-        self._last_request_time = 0
+        Ensure we don't exceed API rate limits.
 
-    def _rate_limit(self):
-        """Ensure we don't exceed API rate limits."""
-        elapsed = time.time() - self._last_request_time
-        if elapsed < self.RATE_LIMIT_DELAY:
-            time.sleep(self.RATE_LIMIT_DELAY - elapsed)
-        self._last_request_time = time.time()
+        Safe to call from several threads: each caller reserves the next free
+        request slot of a pooled key and then sleeps until it arrives, so
+        concurrent fetches share the keys' combined rate budget.
+
+        Returns:
+            The API key to send the request with
+
+        Raises:
+            EtherscanAPIError: If every key has been removed from the pool
+        """
+        key, wait = self.key_pool.acquire()
+        if key is None:
+            raise EtherscanAPIError("No usable API key left (all keys were rejected).")
+        with self._lock:
+            self.rate_limit_wait += wait
+            self.api_calls += 1
+        if wait > 0:
+            time.sleep(wait)
+        return key
 
     def _make_request(self, params: dict) -> dict:
         """
         Make a rate-limited request to the Etherscan API.
 
+        A request that is throttled or refused for its key is retried with
+        another key from the pool.
+
         Args:
             params: Query parameters
 
@@ -57,40 +106,58 @@ class EtherscanClient:
         Raises:
             EtherscanAPIError: If the request fails
         """
-        self._rate_limit()
-
-        params["apikey"] = self.api_key
         params["chainid"] = self.CHAIN_ID
 
-        try:
-            response = requests.get(self.BASE_URL, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+        # Throttled keys are rested (see ApiKeyPool), so retrying is safe
+        for attempt in range(len(self.key_pool.keys) + self.MAX_THROTTLE_RETRIES):
+            key = self._rate_limit()
+            params["apikey"] = key
+
+            try:
+                response = requests.get(self.BASE_URL, params=params, timeout=30)
+                response.raise_for_status()
+                data = response.json()
+            except requests.exceptions.Timeout:
+                raise EtherscanAPIError("Request timed out. Please try again.")
+            except requests.exceptions.ConnectionError:
+                raise EtherscanAPIError("Connection error. Please check your internet connection.")
+            except requests.exceptions.RequestException as e:
+                raise EtherscanAPIError(f"Request failed: {str(e)}")
 
             # Check for API-level errors
             if data.get("status") == "0":
                 message = data.get("message", "Unknown error")
                 result = data.get("result", "")
+                text = f"{message} {result}"
                 # "No transactions found" is not an error
-                if "No transactions found" in str(result):
+                if "No transactions found" in text:
+                    self.key_pool.record_success(key)
                     return {"status": "1", "result": []}
+                lowered = text.lower()
+                # "Max daily rate limit reached" also says "rate limit"
+                if "invalid api key" in lowered or "daily" in lowered:
+                    self.key_pool.record_rejected(key, str(result) or message)
+                    continue
+                if "rate limit" in lowered:
+                    self.key_pool.record_throttle(key)
+                    continue
                 raise EtherscanAPIError(f"{message}: {result}")
 
+            self.key_pool.record_success(key)
             return data
 
-        except requests.exceptions.Timeout:
-            raise EtherscanAPIError("Request timed out. Please try again.")
-        except requests.exceptions.ConnectionError:
-            raise EtherscanAPIError("Connection error. Please check your internet connection.")
-        except requests.exceptions.RequestException as e:
-            raise EtherscanAPIError(f"Request failed: {str(e)}")
+        raise EtherscanAPIError(f"{message}: {result}")
 
     def get_erc20_transactions(
         self,
         address: str,
         start_timestamp: int | None = None,
         end_timestamp: int | None = None,
-        progress_callback: Callable[[int, int], None] | None = None
+        progress_callback: Callable[[int, int], None] | None = None,
+        start_block: int = 0,
+        max_workers: int = 1,
+        contracts: list[str] | None = None,
+        exclude_contracts: list[str] | None = None
     ) -> list[dict]:
         """
         Fetch all ERC-20 token transactions for a wallet address.
@@ -100,89 +167,349 @@ class EtherscanClient:
             start_timestamp: Optional start Unix timestamp
             end_timestamp: Optional end Unix timestamp
             progress_callback: Optional callback function(current, total) for progress updates
+            start_block: First block to fetch (for resuming)
+            max_workers: Number of block windows fetched concurrently
+            contracts: Optional token allowlist; each contract is queried
+                separately on the server side
+            exclude_contracts: Optional token denylist, dropped before formatting
 
         Returns:
             List of transaction dictionaries formatted for Excel export
         """
         all_transactions = []
-        page = 1
-        max_page = 10000 // self.MAX_RESULTS_PER_PAGE  # v2 API limit: page * offset <= 10000
-
-        while page <= max_page:
-            params = {
-                "module": "account",
-                "action": "tokentx",
-                "address": address,
-                "startblock": 0,
-                "endblock": 99999999,
-                "page": page,
-                "offset": self.MAX_RESULTS_PER_PAGE,
-                "sort": "asc"
-            }
 
-            data = self._make_request(params)
-            transactions = data.get("result", [])
+        for contract in contracts or [None]:
+            pages = self.iter_transaction_pages(
+                address,
+                start_block=start_block,
+                max_workers=max_workers,
+                contract_address=contract
+            )
+            for transactions, _ in pages:
+                all_transactions.extend(
+                    self.format_transactions(
+                        transactions,
+                        start_timestamp,
+                        end_timestamp,
+                        exclude_contracts=exclude_contracts
+                    )
+                )
+
+                # Progress update
+                if progress_callback:
+                    progress_callback(len(all_transactions), -1)  # -1 means unknown total
+
+        if contracts and len(contracts) > 1:
+            all_transactions.sort(key=lambda tx: int(tx["Blockno"] or 0))
 
-            if not transactions:
-                break
+        return all_transactions
 
-            # Filter by timestamp if specified
-            for tx in transactions:
-                tx_timestamp = int(tx.get("timeStamp", 0))
+    def get_latest_block(self) -> int:
+        """
+        Get the latest block number.
 
-                # Apply date filters
-                if start_timestamp and tx_timestamp < start_timestamp:
-                    continue
-                if end_timestamp and tx_timestamp > end_timestamp:
-                    continue
+        Returns:
+            Latest block number
 
-                # Format transaction for export
-                formatted_tx = self._format_transaction(tx)
-                all_transactions.append(formatted_tx)
+        Raises:
+            EtherscanAPIError: If the request fails
+        """
+        data = self._make_request({"module": "proxy", "action": "eth_blockNumber"})
+        try:
+            return int(data["result"], 16)
+        except (KeyError, TypeError, ValueError):
+            raise EtherscanAPIError(f"Unexpected block number response: {data}")
 
-            # Progress update
-            if progress_callback:
-                progress_callback(len(all_transactions), -1)  # -1 means unknown total
+    def get_block_by_time(self, timestamp: int, closest: str = "before") -> int:
+        """
+        Get the block closest to a timestamp.
 
-            # Check if we got fewer results than the max (last page)
-            if len(transactions) < self.MAX_RESULTS_PER_PAGE:
-                break
+        Args:
+            timestamp: Unix timestamp
+            closest: "before" for the last block at or before the timestamp,
+                "after" for the first block at or after it
 
-            page += 1
+        Returns:
+            Block number
 
-        return all_transactions
+        Raises:
+            EtherscanAPIError: If the request fails
+        """
+        data = self._make_request({
+            "module": "block",
+            "action": "getblocknobytime",
+            "timestamp": timestamp,
+            "closest": closest
+        })
+        try:
+            return int(data["result"])
+        except (KeyError, TypeError, ValueError):
+            raise EtherscanAPIError(f"Unexpected block number response: {data}")
 
-    def _format_transaction(self, tx: dict) -> dict:
+    def get_latest_transfer(self, address: str) -> dict | None:
         """
-        Format a raw transaction into the export format.
+        Get a wallet's newest ERC-20 transfer with a single minimal request.
+
+        Used as an activity probe: if the newest transfer is the one seen at
+        the last export, the wallet has nothing new.
 
         Args:
-            tx: Raw transaction from API
+            address: Ethereum wallet address
 
         Returns:
-            Formatted transaction dictionary
-        """
-        timestamp = int(tx.get("timeStamp", 0))
-        dt = unix_to_datetime(timestamp)
-
-        # Calculate human-readable token value
-        raw_value = tx.get("value", "0")
-        decimals = int(tx.get("tokenDecimal", 18))
-        token_value = calculate_token_value(raw_value, decimals)
-
-        return {
-            "Transaction Hash": tx.get("hash", ""),
-            "Blockno": tx.get("blockNumber", ""),
-            "UnixTimestamp": str(timestamp),
-            "DateTime (UTC)": format_date_display(dt),
-            "From": tx.get("from", ""),
-            "To": tx.get("to", ""),
-            "TokenValue": token_value,
-            "USDValueDayOfTx": "",  # Left blank as per user preference
-            "ContractAddress": tx.get("contractAddress", ""),
-            "TokenName": tx.get("tokenName", ""),
-            "TokenSymbol": tx.get("tokenSymbol", "")
+            Raw transaction dictionary, or None if the wallet has no transfers
+
+        Raises:
+            EtherscanAPIError: If the request fails
+        """
+        data = self._make_request({
+            "module": "account",
+            "action": "tokentx",
+            "address": address,
+            "startblock": 0,
+            "endblock": DEFAULT_END_BLOCK,
+            "page": 1,
+            "offset": 1,
+            "sort": "desc"
+        })
+        result = data.get("result") or []
+        return result[0] if result else None
+
+    def iter_transaction_pages(
+        self,
+        address: str,
+        start_block: int = 0,
+        end_block: int = DEFAULT_END_BLOCK,
+        max_workers: int = 1,
+        contract_address: str | None = None
+    ) -> Iterator[tuple[list[dict], int]]:
+        """
+        Fetch raw ERC-20 transactions page by page in ascending block order.
+
+        Pages always end on a block boundary: a full page is trimmed back to
+        its last complete block and the next request starts at the trimmed
+        block. This avoids the v2 API's page * offset <= 10000 limit and
+        gives a resumable cursor after every page.
+
+        The first page is always requested over the whole range, so a
+        wallet that fits in one page costs one request. Only when it comes
+        back full, and max_workers > 1, is the rest of the range split into
+        block windows fetched concurrently (sharing the client's rate
+        limit). The windows reach up to the wallet's newest transfer in the
+        range and are sized from the blocks the first page spanned, so
+        their number depends on the wallet's history, not on max_workers.
+        Pages are still yielded in block order.
+
+        Args:
+            address: Ethereum wallet address
+            start_block: First block to fetch
+            end_block: Last block to fetch (inclusive)
+            max_workers: Number of block windows fetched concurrently
+            contract_address: Only fetch transfers of this token contract
+
+        Yields:
+            Tuples of (raw transactions, next block to fetch). Every
+            transaction in blocks below the next block has been yielded.
+        """
+        first_page = self._fetch_page(address, start_block, end_block, contract_address=contract_address)
+        if max_workers <= 1 or len(first_page) < self.MAX_RESULTS_PER_PAGE:
+            yield from self._iter_window(address, start_block, end_block, contract_address, first_page)
+            return
+
+        first_block = int(first_page[0].get("blockNumber", start_block))
+        last_block = int(first_page[-1].get("blockNumber", start_block))
+        if last_block == first_block:
+            # A single block fills the page; it is read with page numbers
+            yield from self._iter_window(address, start_block, end_block, contract_address, first_page)
+            return
+        yield [tx for tx in first_page if int(tx.get("blockNumber", start_block)) < last_block], last_block
+
+        # Expect the rest of the history to be about as dense as the first page
+        newest_block = self._newest_block(address, last_block, end_block, contract_address)
+        pages_left = -(-(newest_block - last_block + 1) // (last_block - first_block))
+        count = min(self.MAX_WINDOWS, -(-pages_left // self.PAGES_PER_WINDOW))
+        windows = self._split_range(last_block, newest_block, count)
+        if windows:
+            # The last window runs to the end so the final cursor covers the range
+            windows[-1] = (windows[-1][0], end_block)
+        if len(windows) > 1:
+            yield from self._iter_windows(address, windows, max_workers, contract_address)
+        else:
+            yield from self._iter_window(address, last_block, end_block, contract_address)
+
+    def _iter_window(
+        self,
+        address: str,
+        start_block: int,
+        end_block: int,
+        contract_address: str | None = None,
+        first_page: list[dict] | None = None
+    ) -> Iterator[tuple[list[dict], int]]:
+        """
+        Fetch one block range sequentially (see iter_transaction_pages).
+
+        first_page, if given, is the already fetched first page of the range.
+        """
+        cursor = start_block
+
+        while cursor <= end_block:
+            if first_page is not None:
+                transactions, first_page = first_page, None
+            else:
+                transactions = self._fetch_page(address, cursor, end_block, contract_address=contract_address)
+
+            # Fewer results than the max means the range is exhausted
+            if len(transactions) < self.MAX_RESULTS_PER_PAGE:
+                yield transactions, end_block + 1
+                return
+
+            last_block = int(transactions[-1].get("blockNumber", cursor))
+            complete = [
+                tx for tx in transactions
+                if int(tx.get("blockNumber", cursor)) < last_block
+            ]
+
+            if not complete:
+                # A single block fills the whole page: read it with page numbers
+                yield self._fetch_block(address, last_block, contract_address), last_block + 1
+                cursor = last_block + 1
+                continue
+
+            yield complete, last_block
+            cursor = last_block
+
+    def _newest_block(
+        self,
+        address: str,
+        start_block: int,
+        end_block: int,
+        contract_address: str | None = None
+    ) -> int:
+        """Get the block of the wallet's newest transfer in a range (start_block if none)."""
+        params = {
+            "module": "account",
+            "action": "tokentx",
+            "address": address,
+            "startblock": start_block,
+            "endblock": end_block,
+            "page": 1,
+            "offset": 1,
+            "sort": "desc"
         }
+        if contract_address:
+            params["contractaddress"] = contract_address
+        result = self._make_request(params).get("result") or []
+        return int(result[0].get("blockNumber", start_block)) if result else start_block
+
+    def _iter_windows(
+        self,
+        address: str,
+        windows: list[tuple[int, int]],
+        max_workers: int,
+        contract_address: str | None = None
+    ) -> Iterator[tuple[list[dict], int]]:
+        """
+        Fetch block windows concurrently and yield their pages in block order.
+
+        Transactions repeated across a window boundary are dropped. Windows
+        are started and buffered as described in api.windows.iter_windows.
+        """
+        last_block = None
+        last_keys = set()
+        window_index = None
+        boundary_block, boundary_keys = None, set()
+
+        for index, (transactions, next_block) in iter_windows(
+            windows,
+            lambda first, last: self._iter_window(address, first, last, contract_address),
+            max_workers
+        ):
+            if index != window_index:
+                # Rows of the previous window's last block may reappear at the boundary
+                window_index = index
+                boundary_block, boundary_keys = last_block, set(last_keys)
+
+            unique = []
+            for tx in transactions:
+                block = int(tx.get("blockNumber", 0))
+                key = _transaction_key(tx)
+                if block == boundary_block and key in boundary_keys:
+                    continue
+                if block != last_block:
+                    last_block, last_keys = block, set()
+                last_keys.add(key)
+                unique.append(tx)
+            yield unique, next_block
+
+    @classmethod
+    def _split_range(cls, start_block: int, end_block: int, count: int) -> list[tuple[int, int]]:
+        """Split an inclusive block range into up to count windows."""
+        if end_block < start_block:
+            return []
+        size = max(cls.MIN_WINDOW_BLOCKS, -(-(end_block - start_block + 1) // count))
+        return [
+            (block, min(block + size - 1, end_block))
+            for block in range(start_block, end_block + 1, size)
+        ]
+
+    def _fetch_page(
+        self,
+        address: str,
+        start_block: int,
+        end_block: int,
+        page: int = 1,
+        contract_address: str | None = None
+    ) -> list[dict]:
+        """Fetch one page of raw transactions for a block range."""
+        params = {
+            "module": "account",
+            "action": "tokentx",
+            "address": address,
+            "startblock": start_block,
+            "endblock": end_block,
+            "page": page,
+            "offset": self.MAX_RESULTS_PER_PAGE,
+            "sort": "asc"
+        }
+        if contract_address:
+            params["contractaddress"] = contract_address
+        data = self._make_request(params)
+        return data.get("result", [])
+
+    def _fetch_block(self, address: str, block: int, contract_address: str | None = None) -> list[dict]:
+        """Fetch every transaction in a single block using page numbers."""
+        transactions = []
+        max_page = 10000 // self.MAX_RESULTS_PER_PAGE  # v2 API limit: page * offset <= 10000
+
+        for page in range(1, max_page + 1):
+            page_transactions = self._fetch_page(address, block, block, page, contract_address)
+            transactions.extend(page_transactions)
+            if len(page_transactions) < self.MAX_RESULTS_PER_PAGE:
+                break
+
+        return transactions
+
+    def format_transactions(
+        self,
+        transactions: list[dict],
+        start_timestamp: int | None = None,
+        end_timestamp: int | None = None,
+        exclude_contracts: list[str] | None = None
+    ) -> list[dict]:
+        """
+        Filter raw transactions by timestamp and token, and format them for export.
+
+        See the module-level format_transactions(); token metadata comes
+        from the client's registry.
+        """
+        return format_transactions(
+            transactions, start_timestamp, end_timestamp, exclude_contracts,
+            self.token_registry, self.CHAIN_ID
+        )
+
+    def _format_transaction(self, tx: dict) -> dict:
+        """Format a raw transaction into the export format (see format_transaction())."""
+        return format_transaction(tx, self.token_registry.resolve(self.CHAIN_ID, tx))
 
     def test_connection(self) -> bool:
         """
@@ -200,3 +527,104 @@ class EtherscanClient:
             return True
         except EtherscanAPIError:
             return False
+
+
+def format_transactions(
+    transactions: list[dict],
+    start_timestamp: int | None = None,
+    end_timestamp: int | None = None,
+    exclude_contracts: list[str] | None = None,
+    token_registry: TokenRegistry | None = None,
+    chain_id: int = EtherscanClient.CHAIN_ID
+) -> list[dict]:
+    """
+    Filter raw transactions by timestamp and token, and format them for export.
+
+    Raw transactions use Etherscan's tokentx fields; other sources (api.rpc)
+    produce the same fields, so every export has one row format.
+
+    Args:
+        transactions: Raw transactions from the API
+        start_timestamp: Optional start Unix timestamp
+        end_timestamp: Optional end Unix timestamp
+        exclude_contracts: Optional token contracts to drop (denylist)
+        token_registry: Registry supplying token metadata (learned from the
+            rows if unknown); a throwaway one is used if None
+        chain_id: Chain the transactions are on
+
+    Returns:
+        List of formatted transaction dictionaries
+    """
+    formatted = []
+    excluded = {contract.lower() for contract in exclude_contracts or []}
+    registry = token_registry or TokenRegistry()
+    tokens = {}  # contractAddress as given -> registry entry
+
+    for tx in transactions:
+        # Drop denylisted tokens before paying for formatting
+        if excluded and tx.get("contractAddress", "").lower() in excluded:
+            continue
+
+        tx_timestamp = int(tx.get("timeStamp", 0))
+
+        # Apply date filters
+        if start_timestamp and tx_timestamp < start_timestamp:
+            continue
+        if end_timestamp and tx_timestamp > end_timestamp:
+            continue
+
+        contract = tx.get("contractAddress", "")
+        token = tokens.get(contract)
+        if token is None:
+            token = tokens[contract] = registry.resolve(chain_id, tx)
+        formatted.append(format_transaction(tx, token))
+
+    return formatted
+
+
+def format_transaction(tx: dict, token: dict | None = None) -> dict:
+    """
+    Format a raw transaction into the export format.
+
+    Args:
+        tx: Raw transaction from API
+        token: TokenRegistry entry of the transaction's token; read from
+            the transaction's own fields if None
+
+    Returns:
+        Formatted transaction dictionary. "RawValue" and "TokenDecimal"
+        are not exported columns; they keep the exact integer amount
+        for the balance summary.
+    """
+    timestamp = int(tx.get("timeStamp", 0))
+    dt = unix_to_datetime(timestamp)
+
+    # Calculate human-readable token value
+    raw_value = tx.get("value", "0")
+    if token is None:
+        token = TokenRegistry().resolve(0, tx)
+    decimals = token["decimals"]
+    token_value = calculate_token_value(raw_value, decimals, token["divisor"])
+
+    return {
+        "Transaction Hash": tx.get("hash", ""),
+        "Blockno": tx.get("blockNumber", ""),
+        "UnixTimestamp": str(timestamp),
+        "DateTime (UTC)": format_date_display(dt),
+        "From": tx.get("from", ""),
+        "To": tx.get("to", ""),
+        "TokenValue": token_value,
+        "USDValueDayOfTx": "",  # Left blank as per user preference
+        "ContractAddress": tx.get("contractAddress", ""),
+        "TokenName": token["name"],
+        "TokenSymbol": token["symbol"],
+        "RawValue": raw_value,
+        "TokenDecimal": decimals
+    }
+
+
+def _transaction_key(tx: dict) -> tuple:
+    """Key identifying a single transfer within a raw API result."""
+    if tx.get("logIndex") not in (None, ""):
+        return (tx.get("hash"), tx.get("logIndex"))
+    return (tx.get("hash"), tx.get("from"), tx.get("to"), tx.get("value"), tx.get("contractAddress"))
@@ -0,0 +1,186 @@
+"""
+Pool of Etherscan API keys sharing the request load.
+"""
+
+import threading
+import time
+
+
+class ApiKeyPool:
+    """
+    Spread requests over several API keys, each with its own rate budget.
+
+    Every key has a weight (its rate relative to a free key) and reserves
+    request slots RATE_LIMIT_DELAY / weight apart. A request takes the key
+    whose next slot comes first, which visits keys in weighted round-robin
+    order and lets total throughput grow with the number of keys.
+
+    Keys that report a rate limit are rested, for THROTTLE_COOLDOWN seconds
+    at first and twice as long after every further throttle in a row (up
+    to MAX_COOLDOWN); a rate limit is temporary, so they stay in rotation.
+    Only keys the API rejects (invalid key, daily limit reached) are
+    removed for the session.
+    """
+
+    THROTTLE_COOLDOWN = 1.0  # Seconds to rest a key after a rate limit response
+    MAX_COOLDOWN = 30.0  # Longest rest after consecutive rate limit responses
+
+    def __init__(self, keys: list, delay: float):
+        """
+        Initialize the pool.
+
+        Args:
+            keys: API keys, as strings or {"key", "weight"} dicts
+            delay: Minimum seconds between requests on a key of weight 1
+
+        Raises:
+            ValueError: If no keys are given
+        """
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._keys = []
+        seen = set()
+
+        for entry in keys:
+            if isinstance(entry, str):
+                entry = {"key": entry}
+            key = entry.get("key", "").strip()
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            self._keys.append({
+                "key": key,
+                "weight": max(float(entry.get("weight") or 1), 0.1),
+                "next_slot": 0.0,
+                "active": True,
+                "failures": 0,
+                "calls": 0,
+                "throttled": 0,
+                "errors": 0,
+                "wait": 0.0,
+                "removed_reason": None
+            })
+
+        if not self._keys:
+            raise ValueError("At least one API key is required")
+
+    def __len__(self) -> int:
+        """Number of keys still in rotation."""
+        with self._lock:
+            return sum(1 for state in self._keys if state["active"])
+
+    @property
+    def keys(self) -> list[str]:
+        """All keys in the pool, including removed ones."""
+        return [state["key"] for state in self._keys]
+
+    def acquire(self) -> tuple[str | None, float]:
+        """
+        Reserve the next request slot.
+
+        The caller must sleep for the returned wait before sending the
+        request with the returned key.
+
+        Returns:
+            Tuple of (key, seconds to wait); key is None if every key has
+            been removed
+        """
+        with self._lock:
+            active = [state for state in self._keys if state["active"]]
+            if not active:
+                return None, 0.0
+
+            now = time.time()
+            # Earliest free slot first; idle keys tie at "now", so the one
+            # used longest ago goes next
+            state = min(active, key=lambda s: (max(now, s["next_slot"]), s["next_slot"]))
+            slot = max(now, state["next_slot"])
+            state["next_slot"] = slot + self.delay / state["weight"]
+            wait = slot - now
+            state["calls"] += 1
+            state["wait"] += wait
+            return state["key"], wait
+
+    def record_success(self, key: str) -> None:
+        """Reset a key's failure count after a successful request."""
+        with self._lock:
+            self._state(key)["failures"] = 0
+
+    def record_throttle(self, key: str) -> None:
+        """Rest a key that hit its rate limit, longer each time it does so in a row."""
+        with self._lock:
+            state = self._state(key)
+            state["throttled"] += 1
+            cooldown = min(self.MAX_COOLDOWN, self.THROTTLE_COOLDOWN * 2 ** state["failures"])
+            state["failures"] += 1
+            state["next_slot"] = max(state["next_slot"], time.time() + cooldown)
+
+    def record_rejected(self, key: str, reason: str) -> None:
+        """Remove a key the API refused (invalid key, daily limit reached)."""
+        with self._lock:
+            state = self._state(key)
+            state["errors"] += 1
+            self._remove(state, reason)
+
+    def stats(self) -> list[dict]:
+        """
+        Get per-key usage statistics.
+
+        Returns:
+            One dict per key with the masked key, weight, calls, throttled,
+            errors, total rate limit wait, and whether it is still active
+        """
+        with self._lock:
+            return [
+                {
+                    "key": _mask(state["key"]),
+                    "weight": state["weight"],
+                    "calls": state["calls"],
+                    "throttled": state["throttled"],
+                    "errors": state["errors"],
+                    "wait": state["wait"],
+                    "active": state["active"],
+                    "removed_reason": state["removed_reason"]
+                }
+                for state in self._keys
+            ]
+
+    def _state(self, key: str) -> dict:
+        """Internal state of a key (lock must be held)."""
+        for state in self._keys:
+            if state["key"] == key:
+                return state
+        raise KeyError(key)
+
+    @staticmethod
+    def _remove(state: dict, reason: str) -> None:
+        """Take a key out of rotation (lock must be held)."""
+        state["active"] = False
+        state["removed_reason"] = reason
+
+
+def format_key_stats(stats: list[dict]) -> str:
+    """
+    Format per-key usage statistics, one line per key.
+
+    Args:
+        stats: Result of ApiKeyPool.stats()
+
+    Returns:
+        Multi-line text for status output
+    """
+    lines = []
+    for entry in stats:
+        line = (
+            f"{entry['key']} (x{entry['weight']:g}): {entry['calls']} calls, "
+            f"{entry['throttled']} throttled, waited {entry['wait']:.1f}s"
+        )
+        if not entry["active"]:
+            line += f" - removed: {entry['removed_reason']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _mask(key: str) -> str:
+    """Shorten a key for display, keeping only its last characters."""
+    return f"...{key[-4:]}" if len(key) > 4 else key
@@ -0,0 +1,440 @@
+"""
+JSON-RPC client reading ERC-20 transfers straight from an Ethereum node.
+"""
+
+import threading
+import requests
+from typing import Iterator
+
+# Add parent directory to path for imports
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.etherscan import EtherscanAPIError, DEFAULT_END_BLOCK, format_transactions
+from api.token_registry import TokenRegistry
+from api.windows import iter_windows
+
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+# ERC-20 metadata selectors
+_NAME = "0x06fdde03"
+_SYMBOL = "0x95d89b41"
+_DECIMALS = "0x313ce567"
+
+# Error messages nodes use when an eth_getLogs range holds too many logs,
+# plus our own HTTP timeout ("RPC request timed out."): a smaller range
+# answers sooner
+_RANGE_ERRORS = (
+    "more than",
+    "too many",
+    "limit exceeded",
+    "range",
+    "response size",
+    "timeout",
+    "timed out",
+)
+
+
+class RpcError(EtherscanAPIError):
+    """Error returned by (or while talking to) a JSON-RPC endpoint."""
+    pass
+
+
+class RpcClient:
+    """
+    Drop-in alternative to EtherscanClient backed by a JSON-RPC node.
+
+    Transfers are read with eth_getLogs on the ERC-20 Transfer event, once
+    with the wallet as sender and once as recipient, sent together as one
+    batch request. Block ranges adapt to the node: a range the node rejects
+    as too large is halved, a range with few logs lets the next one double.
+    Block timestamps and token name/symbol/decimals are fetched in batches
+    and cached (token metadata in the shared TokenRegistry, so a contract
+    is only looked up once), and every transfer is turned into an Etherscan-style raw
+    transaction, so rows are formatted by the same code as Etherscan rows.
+
+    There is no API quota: with max_workers > 1 block windows are fetched
+    concurrently, so throughput scales with what the node can serve.
+    """
+
+    INITIAL_SPAN = 2000  # Blocks per eth_getLogs range to start with
+    MAX_SPAN = 500000  # Never ask for more blocks than this at once
+    TARGET_LOGS = 2000  # Grow the range while a range returns fewer logs
+    WINDOWS_PER_WORKER = 4  # Block windows per worker when fetching in parallel
+    MIN_WINDOW_BLOCKS = 50000  # Don't split a range into windows smaller than this
+    CACHE_LIMIT = 200000  # Cached block timestamps before the cache is reset
+    FETCH_WORKERS = 4  # Block windows in flight per wallet
+
+    def __init__(self, url: str, chain_id: int | None = None, token_registry: TokenRegistry | None = None):
+        """
+        Initialize the RPC client.
+
+        Args:
+            url: HTTP(S) JSON-RPC endpoint
+            chain_id: Chain id used for cursor keys, the block index and
+                token metadata (asked from the node with eth_chainId if None)
+            token_registry: Token metadata registry (an in-memory one if None)
+
+        Raises:
+            RpcError: If the chain id is not given and the node cannot be asked
+        """
+        self.url = url
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._timestamps = {}
+        self.token_registry = token_registry or TokenRegistry()
+
+        # Usage counters for progress reporting (no rate limit to wait for)
+        self.api_calls = 0
+        self.rate_limit_wait = 0.0
+
+        # Data of other chains must never share Etherscan mainnet's keys
+        self.CHAIN_ID = chain_id if chain_id is not None else int(self._call("eth_chainId", []), 16)
+
+    def default_fetch_workers(self) -> int:
+        """Block windows to fetch concurrently per wallet (there is no quota to share)."""
+        return self.FETCH_WORKERS
+
+    def default_wallet_workers(self) -> int:
+        """Wallets to fetch concurrently (one; windows already keep the node busy)."""
+        return 1
+
+    def _batch(self, calls: list[tuple[str, list]]) -> list:
+        """
+        Send several JSON-RPC calls in one HTTP request.
+
+        Args:
+            calls: (method, params) tuples
+
+        Returns:
+            One entry per call, in order: the result, or an RpcError for
+            calls the node answered with an error
+
+        Raises:
+            RpcError: If the request itself fails
+        """
+        if not calls:
+            return []
+        with self._lock:
+            first_id = self._next_id
+            self._next_id += len(calls)
+            self.api_calls += 1
+
+        payload = [
+            {"jsonrpc": "2.0", "id": first_id + n, "method": method, "params": params}
+            for n, (method, params) in enumerate(calls)
+        ]
+        try:
+            response = self._session.post(self.url, json=payload, timeout=60)
+            response.raise_for_status()
+            data = response.json()
+        except requests.exceptions.Timeout:
+            raise RpcError("RPC request timed out.")
+        except requests.exceptions.ConnectionError:
+            raise RpcError(f"Could not connect to RPC endpoint {self.url}.")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise RpcError(f"RPC request failed: {e}")
+
+        if isinstance(data, dict):
+            # Some nodes answer a whole rejected batch with one error object
+            message = (data.get("error") or {}).get("message", "Unexpected response")
+            raise RpcError(message)
+
+        by_id = {item.get("id"): item for item in data}
+        results = []
+        for n in range(len(calls)):
+            item = by_id.get(first_id + n)
+            if item is None:
+                results.append(RpcError("Missing response in batch"))
+            elif item.get("error"):
+                results.append(RpcError(item["error"].get("message", str(item["error"]))))
+            else:
+                results.append(item.get("result"))
+        return results
+
+    def _call(self, method: str, params: list):
+        """Send a single JSON-RPC call and return its result."""
+        result = self._batch([(method, params)])[0]
+        if isinstance(result, RpcError):
+            raise result
+        return result
+
+    def get_latest_block(self) -> int:
+        """
+        Get the latest block number.
+
+        Raises:
+            RpcError: If the request fails
+        """
+        return int(self._call("eth_blockNumber", []), 16)
+
+    def get_block_by_time(self, timestamp: int, closest: str = "before") -> int:
+        """
+        Get the block closest to a timestamp by binary search over block headers.
+
+        Args:
+            timestamp: Unix timestamp
+            closest: "before" for the last block at or before the timestamp,
+                "after" for the first block at or after it
+
+        Raises:
+            RpcError: If a request fails
+        """
+        low, high = 0, self.get_latest_block()
+        # Invariant for "after": answer in [low, high]; for "before" likewise
+        while low < high:
+            if closest == "after":
+                middle = (low + high) // 2
+                if self._block_timestamps([middle])[middle] >= timestamp:
+                    high = middle
+                else:
+                    low = middle + 1
+            else:
+                middle = (low + high + 1) // 2
+                if self._block_timestamps([middle])[middle] <= timestamp:
+                    low = middle
+                else:
+                    high = middle - 1
+        return low
+
+    def get_latest_transfer(self, address: str) -> dict | None:
+        """
+        Not available over JSON-RPC without scanning the chain backwards.
+
+        Raises:
+            RpcError: Always, so activity probes fall back to a normal export
+        """
+        raise RpcError("Activity probe is not supported by the RPC source")
+
+    def iter_transaction_pages(
+        self,
+        address: str,
+        start_block: int = 0,
+        end_block: int = DEFAULT_END_BLOCK,
+        max_workers: int = 1,
+        contract_address: str | None = None
+    ) -> Iterator[tuple[list[dict], int]]:
+        """
+        Fetch raw ERC-20 transfers range by range in ascending block order.
+
+        Same contract as EtherscanClient.iter_transaction_pages(): every
+        page covers whole blocks and comes with the next block to fetch.
+
+        Args:
+            address: Ethereum wallet address
+            start_block: First block to fetch
+            end_block: Last block to fetch (inclusive)
+            max_workers: Number of block windows fetched concurrently
+            contract_address: Only fetch transfers of this token contract
+
+        Yields:
+            Tuples of (raw transactions, next block to fetch)
+        """
+        if end_block == DEFAULT_END_BLOCK:
+            end_block = self.get_latest_block()
+
+        windows = self._split_range(start_block, end_block, max_workers * self.WINDOWS_PER_WORKER)
+        if max_workers <= 1 or len(windows) <= 1:
+            yield from self._iter_window(address, start_block, end_block, contract_address)
+            return
+
+        for _, page in iter_windows(
+            windows,
+            lambda first, last: self._iter_window(address, first, last, contract_address),
+            max_workers
+        ):
+            yield page
+
+    def _iter_window(
+        self,
+        address: str,
+        start_block: int,
+        end_block: int,
+        contract_address: str | None = None
+    ) -> Iterator[tuple[list[dict], int]]:
+        """Walk one block range with adaptive eth_getLogs ranges."""
+        cursor = start_block
+        span = self.INITIAL_SPAN
+
+        while cursor <= end_block:
+            last = min(end_block, cursor + span - 1)
+            try:
+                logs = self._get_transfer_logs(address, cursor, last, contract_address)
+            except RpcError as e:
+                if span > 1 and any(text in str(e).lower() for text in _RANGE_ERRORS):
+                    span = max(1, span // 2)
+                    continue
+                raise
+
+            if len(logs) < self.TARGET_LOGS:
+                span = min(self.MAX_SPAN, span * 2)
+            yield self._to_transactions(logs), last + 1
+            cursor = last + 1
+
+    def _get_transfer_logs(
+        self,
+        address: str,
+        start_block: int,
+        end_block: int,
+        contract_address: str | None = None
+    ) -> list[dict]:
+        """Get the wallet's incoming and outgoing Transfer logs of a block range."""
+        wallet_topic = "0x" + address.lower()[2:].rjust(64, "0")
+        base = {"fromBlock": hex(start_block), "toBlock": hex(end_block)}
+        if contract_address:
+            base["address"] = contract_address
+        calls = [
+            ("eth_getLogs", [dict(base, topics=[TRANSFER_TOPIC, wallet_topic])]),
+            ("eth_getLogs", [dict(base, topics=[TRANSFER_TOPIC, None, wallet_topic])]),
+        ]
+
+        logs = {}
+        for result in self._batch(calls):
+            if isinstance(result, RpcError):
+                raise result
+            for log in result or []:
+                # ERC-721 Transfer has the token id as a fourth topic
+                if len(log.get("topics", [])) != 3 or log.get("removed"):
+                    continue
+                # A transfer to oneself matches both queries
+                logs[(log["transactionHash"], log["logIndex"])] = log
+
+        return sorted(logs.values(), key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)))
+
+    def _to_transactions(self, logs: list[dict]) -> list[dict]:
+        """Turn Transfer logs into Etherscan-style raw transactions."""
+        if not logs:
+            return []
+        timestamps = self._block_timestamps({int(log["blockNumber"], 16) for log in logs})
+        tokens = self._token_metadata({log["address"].lower() for log in logs})
+
+        transactions = []
+        for log in logs:
+            block = int(log["blockNumber"], 16)
+            contract = log["address"].lower()
+            token = tokens[contract]
+            data = log.get("data") or "0x"
+            transactions.append({
+                "hash": log["transactionHash"],
+                "blockNumber": str(block),
+                "timeStamp": str(timestamps[block]),
+                "from": "0x" + log["topics"][1][-40:].lower(),
+                "to": "0x" + log["topics"][2][-40:].lower(),
+                "value": str(int(data[2:66] or "0", 16)),
+                "contractAddress": contract,
+                "tokenName": token["name"],
+                "tokenSymbol": token["symbol"],
+                "tokenDecimal": str(token["decimals"]),
+                "logIndex": str(int(log["logIndex"], 16)),
+                "transactionIndex": str(int(log.get("transactionIndex") or "0x0", 16))
+            })
+        return transactions
+
+    def _block_timestamps(self, blocks) -> dict[int, int]:
+        """Get block timestamps, fetching uncached blocks in one batch."""
+        with self._lock:
+            missing = sorted(block for block in blocks if block not in self._timestamps)
+        if missing:
+            results = self._batch([("eth_getBlockByNumber", [hex(block), False]) for block in missing])
+            fetched = {}
+            for block, result in zip(missing, results):
+                if isinstance(result, RpcError):
+                    raise result
+                if not result:
+                    raise RpcError(f"Block {block} not found")
+                fetched[block] = int(result["timestamp"], 16)
+            with self._lock:
+                if len(self._timestamps) > self.CACHE_LIMIT:
+                    self._timestamps = {}
+                self._timestamps.update(fetched)
+            return {block: fetched.get(block, self._timestamps.get(block)) for block in blocks}
+        with self._lock:
+            return {block: self._timestamps[block] for block in blocks}
+
+    def _token_metadata(self, contracts) -> dict[str, dict]:
+        """Get the registry entry per token contract, looking up unknown ones in one batch."""
+        missing = self.token_registry.missing(self.CHAIN_ID, contracts)
+        if missing:
+            calls = []
+            for contract in missing:
+                for selector in (_NAME, _SYMBOL, _DECIMALS):
+                    calls.append(("eth_call", [{"to": contract, "data": selector}, "latest"]))
+            results = self._batch(calls)
+            for n, contract in enumerate(missing):
+                name, symbol, decimals = results[3 * n:3 * n + 3]
+                self.token_registry.add(
+                    self.CHAIN_ID,
+                    contract,
+                    _decode_string(name),
+                    _decode_string(symbol),
+                    _decode_uint(decimals)
+                )
+        return {contract: self.token_registry.get(self.CHAIN_ID, contract) for contract in contracts}
+
+    @classmethod
+    def _split_range(cls, start_block: int, end_block: int, count: int) -> list[tuple[int, int]]:
+        """Split an inclusive block range into at most count contiguous windows."""
+        total = end_block - start_block + 1
+        count = max(1, min(count, total // cls.MIN_WINDOW_BLOCKS))
+        size = -(-total // count)
+        return [
+            (first, min(end_block, first + size - 1))
+            for first in range(start_block, end_block + 1, size)
+        ]
+
+    def format_transactions(
+        self,
+        transactions: list[dict],
+        start_timestamp: int | None = None,
+        end_timestamp: int | None = None,
+        exclude_contracts: list[str] | None = None
+    ) -> list[dict]:
+        """Filter and format raw transactions (see api.etherscan.format_transactions())."""
+        return format_transactions(
+            transactions, start_timestamp, end_timestamp, exclude_contracts,
+            self.token_registry, self.CHAIN_ID
+        )
+
+    def test_connection(self) -> bool:
+        """
+        Test if the endpoint answers JSON-RPC calls.
+
+        Returns:
+            True if connection successful, False otherwise
+        """
+        try:
+            self.get_latest_block()
+            return True
+        except RpcError:
+            return False
+
+
+def _decode_string(result) -> str:
+    """Decode an ABI string (or legacy bytes32) eth_call result; "" on failure."""
+    if not isinstance(result, str) or len(result) < 66:
+        return ""
+    try:
+        raw = bytes.fromhex(result[2:])
+        if len(raw) >= 64:
+            offset = int.from_bytes(raw[:32], "big")
+            length = int.from_bytes(raw[offset:offset + 32], "big")
+            if offset == 32 and offset + 32 + length <= len(raw):
+                return raw[offset + 32:offset + 32 + length].decode("utf-8", "replace")
+        # Old tokens (e.g. MKR) return a NUL-padded bytes32
+        return raw[:32].rstrip(b"\0").decode("utf-8", "replace")
+    except ValueError:
+        return ""
+
+
+def _decode_uint(result) -> int:
+    """Decode a uint eth_call result; 0 on failure."""
+    if not isinstance(result, str) or len(result) < 3:
+        return 0
+    try:
+        return int(result[2:66], 16)
+    except ValueError:
+        return 0
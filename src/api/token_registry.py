@@ -0,0 +1,140 @@
+"""
+Persistent registry of ERC-20 token metadata.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+
+class TokenRegistry:
+    """
+    Name, symbol and decimals of every token seen, keyed by chain and contract.
+
+    Entries are filled once: from the metadata Etherscan repeats on every
+    tokentx row, or by a source that has to look it up (api.rpc). Each
+    entry also holds the divisor (10 ** decimals) so formatting a row is a
+    dictionary lookup instead of parsing the row's metadata. With a file
+    path the registry is kept across runs, so sources never look up the
+    same contract twice.
+    """
+
+    def __init__(self, file_path: Path | None = None):
+        """
+        Initialize the registry, loading saved entries.
+
+        Args:
+            file_path: JSON file holding the registry (None keeps it in memory)
+        """
+        self.file_path = Path(file_path) if file_path else None
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._dirty = False
+        self._load()
+
+    @staticmethod
+    def key(chain_id: int, contract: str) -> str:
+        """Build the registry key for a token contract."""
+        return f"{chain_id}:{contract.lower()}"
+
+    def get(self, chain_id: int, contract: str) -> dict | None:
+        """
+        Get a token's metadata.
+
+        Returns:
+            Dict with "name", "symbol", "decimals" and "divisor", or None if
+            the token is unknown
+        """
+        with self._lock:
+            return self._tokens.get(self.key(chain_id, contract))
+
+    def missing(self, chain_id: int, contracts) -> list[str]:
+        """Get the contracts (lowercased, sorted) that have no entry yet."""
+        with self._lock:
+            return sorted({
+                contract.lower() for contract in contracts
+                if self.key(chain_id, contract) not in self._tokens
+            })
+
+    def add(self, chain_id: int, contract: str, name: str, symbol: str, decimals: int) -> dict:
+        """
+        Add a token unless it is already known.
+
+        Returns:
+            The token's entry (the existing one if it was known)
+        """
+        key = self.key(chain_id, contract)
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is None:
+                entry = self._tokens[key] = _entry(name, symbol, decimals)
+                self._dirty = True
+            return entry
+
+    def resolve(self, chain_id: int, tx: dict) -> dict:
+        """
+        Get the metadata of a raw transaction's token, learning it from the
+        transaction's tokenName/tokenSymbol/tokenDecimal fields if unknown.
+
+        Args:
+            chain_id: Chain the transaction is on
+            tx: Raw transaction in Etherscan's tokentx format
+
+        Returns:
+            The token's entry
+        """
+        entry = self.get(chain_id, tx.get("contractAddress", ""))
+        if entry is not None:
+            return entry
+        try:
+            decimals = int(tx.get("tokenDecimal", 18))
+        except (TypeError, ValueError):
+            decimals = 0
+        return self.add(
+            chain_id,
+            tx.get("contractAddress", ""),
+            tx.get("tokenName", ""),
+            tx.get("tokenSymbol", ""),
+            decimals
+        )
+
+    def save(self) -> None:
+        """Write the registry to disk atomically if it has new entries."""
+        if not self.file_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps({
+                key: {"name": entry["name"], "symbol": entry["symbol"], "decimals": entry["decimals"]}
+                for key, entry in self._tokens.items()
+            })
+            self._dirty = False
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+        with open(temp_path, 'w') as f:
+            f.write(data)
+        os.replace(temp_path, self.file_path)
+
+    def _load(self) -> None:
+        """Load the registry from disk."""
+        if not self.file_path or not self.file_path.exists():
+            return
+        try:
+            with open(self.file_path, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return
+        for key, entry in data.items():
+            try:
+                self._tokens[key] = _entry(entry["name"], entry["symbol"], int(entry["decimals"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+
+def _entry(name: str, symbol: str, decimals: int) -> dict:
+    """Build a registry entry with its precomputed divisor."""
+    # ERC-20 decimals is a uint8; bogus contracts may return anything
+    decimals = min(max(0, decimals), 255)
+    return {"name": name, "symbol": symbol, "decimals": decimals, "divisor": 10 ** decimals}
@@ -0,0 +1,93 @@
+"""
+Concurrent fetching of block windows, shared by the transaction sources.
+"""
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
+
+
+WINDOW_BUFFER_PAGES = 4  # Pages a window may fetch ahead of the consumer
+
+_DONE = object()  # Marks the end of a window's pages
+
+
+def iter_windows(
+    windows: list[tuple[int, int]],
+    iter_window: Callable[[int, int], Iterator],
+    max_workers: int,
+    max_pages: int = WINDOW_BUFFER_PAGES
+) -> Iterator[tuple[int, object]]:
+    """
+    Fetch block windows concurrently and yield their pages in window order.
+
+    Windows are started lazily: at most max_workers are in flight, and the
+    next one starts when the consumer has read all pages of the oldest.
+    Each window hands its pages over through a queue of max_pages, so at
+    most max_workers * max_pages pages are held however long the history
+    is. When the consumer stops iterating, running windows stop at their
+    next page and windows not started yet never run.
+
+    Args:
+        windows: (first block, last block) ranges in ascending order
+        iter_window: Callable yielding the pages of one window
+        max_workers: Number of windows fetched at the same time
+        max_pages: Pages buffered per window
+
+    Yields:
+        Tuples of (window index, page)
+
+    Raises:
+        Exception: The error a window's fetch raised
+    """
+    stop = threading.Event()
+    pending = iter(enumerate(windows))
+    running = deque()  # (window index, page queue), oldest first
+
+    def put(pages: queue.Queue, item) -> bool:
+        # Give up once the consumer is gone instead of blocking forever
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch(window: tuple[int, int], pages: queue.Queue) -> None:
+        try:
+            for page in iter_window(*window):
+                if stop.is_set() or not put(pages, (page, None)):
+                    return
+            put(pages, (_DONE, None))
+        except Exception as e:
+            put(pages, (_DONE, e))
+
+    def start_next() -> None:
+        entry = next(pending, None)
+        if entry is not None:
+            index, window = entry
+            pages = queue.Queue(maxsize=max(1, max_pages))
+            executor.submit(fetch, window, pages)
+            running.append((index, pages))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for _ in range(max_workers):
+            start_next()
+        while running:
+            index, pages = running[0]
+            while True:
+                page, error = pages.get()
+                if error:
+                    raise error
+                if page is _DONE:
+                    break
+                yield index, page
+            running.popleft()
+            start_next()
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,187 @@
+"""
+Incremental per-token flow aggregation for exported transactions.
+"""
+
+import json
+import os
+from pathlib import Path
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+# Add parent directory to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.helpers import calculate_token_value, unix_to_datetime
+
+
+class BalanceAggregator:
+    """
+    Inflows, outflows and daily net flows per wallet and token.
+
+    Amounts are exact integers in raw token units. The aggregator is fed
+    only the rows newly appended to an export, and its state is kept in a
+    JSON file next to the export, so each run updates the totals instead of
+    recomputing them from the whole history. The totals are written to a
+    small summary workbook next to the export.
+
+    The totals only cover the rows the aggregator was fed: rows exported
+    before summaries were turned on, and transfers outside the date ranges
+    exported, are missing. The net flow is therefore not an on-chain
+    balance, and is labelled as a net flow over the exported rows.
+    """
+
+    TOTAL_HEADERS = [
+        "Wallet",
+        "ContractAddress",
+        "TokenSymbol",
+        "Inflow (raw)",
+        "Outflow (raw)",
+        "NetFlow (raw)",
+        "NetFlow",
+        "Transfers"
+    ]
+
+    FLOW_HEADERS = [
+        "Date (UTC)",
+        "Wallet",
+        "ContractAddress",
+        "TokenSymbol",
+        "NetFlow (raw)",
+        "NetFlow"
+    ]
+
+    def __init__(self, export_path: str):
+        """
+        Initialize the aggregator for an export file.
+
+        Args:
+            export_path: Path of the transaction export (the base name when sharded)
+        """
+        export_path = Path(export_path)
+        self.state_path = export_path.with_name(export_path.stem + ".summary.json")
+        self.summary_path = export_path.with_name(export_path.stem + "_summary.xlsx")
+        self.state = self._load()
+
+    def update(self, wallets: list[str], rows: list[dict]) -> None:
+        """
+        Add newly exported rows to the running totals.
+
+        Each row counts as an inflow for a wallet it was sent to and as an
+        outflow for a wallet it was sent from.
+
+        Args:
+            wallets: Wallet addresses exported into this file
+            rows: Rows appended to the export in this run
+        """
+        tracked = {wallet.lower() for wallet in wallets}
+
+        for row in rows:
+            try:
+                value = int(row.get("RawValue") or 0)
+            except (ValueError, TypeError):
+                continue
+
+            contract = row.get("ContractAddress", "").lower()
+            sender = row.get("From", "").lower()
+            recipient = row.get("To", "").lower()
+            day = unix_to_datetime(int(row.get("UnixTimestamp") or 0)).strftime("%Y-%m-%d")
+
+            for wallet in tracked & {sender, recipient}:
+                token = self._token(wallet, contract, row)
+                net = 0
+                if recipient == wallet:
+                    token["inflow"] += value
+                    net += value
+                if sender == wallet:
+                    token["outflow"] += value
+                    net -= value
+                token["balance"] += net
+                token["transfers"] += 1
+                token["daily"][day] = token["daily"].get(day, 0) + net
+
+    def save(self) -> None:
+        """Persist the state and rewrite the summary workbook."""
+        temp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(temp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(temp_path, self.state_path)
+        self._write_summary()
+
+    def _token(self, wallet: str, contract: str, row: dict) -> dict:
+        """Get (or create) the totals of one token for one wallet."""
+        tokens = self.state["wallets"].setdefault(wallet, {})
+        if contract not in tokens:
+            tokens[contract] = {
+                "symbol": row.get("TokenSymbol", ""),
+                "decimals": int(row.get("TokenDecimal") or 0),
+                "inflow": 0,
+                "outflow": 0,
+                "balance": 0,
+                "transfers": 0,
+                "daily": {}
+            }
+        return tokens[contract]
+
+    def _write_summary(self) -> None:
+        """Write total and daily flows to the summary workbook."""
+        wb = Workbook()
+        totals = wb.active
+        totals.title = "Net Flows (exported rows)"
+        flows = wb.create_sheet("Daily Flows")
+
+        self._write_headers(totals, self.TOTAL_HEADERS)
+        self._write_headers(flows, self.FLOW_HEADERS)
+
+        # Raw amounts are written as text: Excel numbers lose digits past 15
+        for wallet, tokens in sorted(self.state["wallets"].items()):
+            for contract, token in sorted(tokens.items()):
+                decimals = token["decimals"]
+                totals.append([
+                    wallet,
+                    contract,
+                    token["symbol"],
+                    str(token["inflow"]),
+                    str(token["outflow"]),
+                    str(token["balance"]),
+                    _format_amount(token["balance"], decimals),
+                    token["transfers"]
+                ])
+                for day, net in sorted(token["daily"].items()):
+                    flows.append([
+                        day,
+                        wallet,
+                        contract,
+                        token["symbol"],
+                        str(net),
+                        _format_amount(net, decimals)
+                    ])
+
+        temp_path = self.summary_path.with_name(self.summary_path.name + ".tmp")
+        wb.save(temp_path)
+        os.replace(temp_path, self.summary_path)
+
+    @staticmethod
+    def _write_headers(ws, headers: list[str]) -> None:
+        """Write a bold header row and freeze it."""
+        for col, header in enumerate(headers, start=1):
+            cell = ws.cell(row=1, column=col, value=header)
+            cell.font = cell.font.copy(bold=True)
+            ws.column_dimensions[get_column_letter(col)].width = 45 if "Address" in header or header == "Wallet" else 20
+        ws.freeze_panes = "A2"
+
+    def _load(self) -> dict:
+        """Load saved totals, or start empty."""
+        if self.state_path.exists():
+            try:
+                with open(self.state_path, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError):
+                pass
+        return {"wallets": {}}
+
+
+def _format_amount(raw: int, decimals: int) -> str:
+    """Format a signed raw amount with the token's decimals."""
+    value = calculate_token_value(str(abs(raw)), decimals)
+    return f"-{value}" if raw < 0 else value
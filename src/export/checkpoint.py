@@ -0,0 +1,241 @@
+"""
+Durable checkpoint for resuming interrupted export runs.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+
+class Checkpoint:
+    """
+    Persist the state of one export run so it can be resumed.
+
+    The checkpoint directory holds a state file plus one spool file per
+    wallet. Formatted rows are appended to the spool at every page boundary
+    together with the next block to fetch for the page's stream (all tokens,
+    or one allowlisted token contract), so a resumed run continues from the
+    exact page where the previous one stopped. A wallet goes through the
+    statuses "pending" (fetching), "fetched" (spool complete) and "written"
+    (rows saved to its Excel file).
+
+    Updates may come from several pipeline threads; each one is applied
+    and written under a lock. The state file is only rewritten when a
+    cursor or status changes; the spool itself is synced before its new
+    length is recorded.
+    """
+
+    STATE_FILE = "checkpoint.json"
+
+    def __init__(self, directory: Path):
+        """
+        Initialize the checkpoint.
+
+        Args:
+            directory: Directory holding the checkpoint files (created on demand)
+        """
+        self.directory = Path(directory)
+        self.state_file = self.directory / self.STATE_FILE
+        self.state = None
+        self._lock = threading.RLock()
+
+    def start(
+        self,
+        wallets: list[dict],
+        start_timestamp: int | None,
+        end_timestamp: int | None,
+        end_block: int | None = None
+    ) -> None:
+        """
+        Begin a new run, discarding any previous checkpoint.
+
+        Args:
+            wallets: List of wallet dictionaries ("address", "file_path", ...)
+            start_timestamp: Optional start Unix timestamp
+            end_timestamp: Optional end Unix timestamp
+            end_block: Optional last block to fetch
+        """
+        self.clear()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.state = {
+            "status": "running",
+            "start_timestamp": start_timestamp,
+            "end_timestamp": end_timestamp,
+            "end_block": end_block,
+            "wallets": [
+                {
+                    "wallet": wallet,
+                    "status": "pending",
+                    "cursors": {},
+                    "rows": 0,
+                    "spool_bytes": 0,
+                    "added": 0,
+                    "error": None
+                }
+                for wallet in wallets
+            ]
+        }
+        with self._lock:
+            self._write_state()
+
+    def load(self) -> bool:
+        """
+        Load the checkpoint from disk.
+
+        Returns:
+            True if a checkpoint was loaded, False otherwise
+        """
+        if not self.state_file.exists():
+            return False
+        try:
+            with open(self.state_file, 'r') as f:
+                self.state = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            self.state = None
+            return False
+        return True
+
+    def is_resumable(self) -> bool:
+        """Check whether a loaded checkpoint has wallets left to export."""
+        if not self.state:
+            return False
+        return any(wallet["status"] != "written" for wallet in self.state["wallets"])
+
+    @property
+    def wallets(self) -> list[dict]:
+        """Per-wallet state dictionaries of the current run."""
+        return self.state["wallets"] if self.state else []
+
+    def record_page(self, index: int, rows: list[dict], next_block: int, stream: str = "*") -> None:
+        """
+        Commit a fetched page for a wallet.
+
+        Args:
+            index: Wallet index (0-based)
+            rows: Formatted rows of the page
+            next_block: Next block to fetch for this stream
+            stream: "*" for all tokens, or a token contract address
+        """
+        wallet = self.state["wallets"][index]
+        if rows:
+            with open(self._spool_path(index), 'ab') as f:
+                # Drop anything written after the last committed state
+                f.truncate(wallet["spool_bytes"])
+                f.seek(wallet["spool_bytes"])
+                for row in rows:
+                    f.write((json.dumps(row) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+                spool_bytes = f.tell()
+        with self._lock:
+            if not rows and wallet["cursors"].get(stream) == next_block and wallet["error"] is None:
+                return
+            if rows:
+                wallet["spool_bytes"] = spool_bytes
+            wallet["cursors"][stream] = next_block
+            wallet["rows"] += len(rows)
+            wallet["error"] = None
+            self._write_state()
+
+    def read_rows(self, index: int) -> list[dict]:
+        """
+        Read the committed rows of a wallet from its spool.
+
+        Bytes written after the last state update (e.g. during a crash) are
+        ignored.
+
+        Args:
+            index: Wallet index (0-based)
+
+        Returns:
+            List of formatted rows
+        """
+        size = self.state["wallets"][index]["spool_bytes"]
+        path = self._spool_path(index)
+        if not size or not path.exists():
+            return []
+
+        with open(path, 'rb') as f:
+            data = f.read(size)
+        return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+
+    def mark_fetched(self, index: int) -> None:
+        """Mark a wallet's fetch as complete."""
+        with self._lock:
+            wallet = self.state["wallets"][index]
+            if wallet["status"] == "fetched":
+                return
+            wallet["status"] = "fetched"
+            self._write_state()
+
+    def mark_written(self, index: int, added: int) -> None:
+        """Mark a wallet as written to its file and drop its spool."""
+        with self._lock:
+            wallet = self.state["wallets"][index]
+            if wallet["status"] != "written" or wallet["added"] != added:
+                wallet["status"] = "written"
+                wallet["added"] = added
+                self._write_state()
+        spool = self._spool_path(index)
+        if spool.exists():
+            spool.unlink()
+
+    def mark_unchanged(self, indices) -> None:
+        """
+        Mark wallets with nothing new to export as written, in one state write.
+
+        Args:
+            indices: Wallet indices (0-based) skipped by the activity probe
+                or because their range is already exported
+        """
+        indices = [i for i in indices if self.state["wallets"][i]["status"] != "written"]
+        if not indices:
+            return
+        with self._lock:
+            for i in indices:
+                wallet = self.state["wallets"][i]
+                wallet["status"] = "written"
+                wallet["added"] = 0
+            self._write_state()
+        for i in indices:
+            spool = self._spool_path(i)
+            if spool.exists():
+                spool.unlink()
+
+    def mark_error(self, index: int, error: str) -> None:
+        """Record an error for a wallet; it will be retried on resume."""
+        with self._lock:
+            wallet = self.state["wallets"][index]
+            if wallet["error"] == error:
+                return
+            wallet["error"] = error
+            self._write_state()
+
+    def set_status(self, status: str) -> None:
+        """Set the run status ("running", "cancelled" or "finished")."""
+        with self._lock:
+            if self.state["status"] == status:
+                return
+            self.state["status"] = status
+            self._write_state()
+
+    def clear(self) -> None:
+        """Delete all checkpoint files."""
+        self.state = None
+        if not self.directory.exists():
+            return
+        for path in self.directory.iterdir():
+            if path.name == self.STATE_FILE or path.suffix == ".jsonl":
+                path.unlink()
+
+    def _spool_path(self, index: int) -> Path:
+        """Path of a wallet's spool file."""
+        return self.directory / f"wallet_{index}.jsonl"
+
+    def _write_state(self) -> None:
+        """Write the state file atomically (lock must be held)."""
+        temp_path = self.state_file.with_name(self.state_file.name + ".tmp")
+        with open(temp_path, 'w') as f:
+            f.write(json.dumps(self.state, separators=(",", ":")))
+        os.replace(temp_path, self.state_file)
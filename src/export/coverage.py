@@ -0,0 +1,82 @@
+"""
+Time intervals already exported per wallet, so reruns only fetch the gaps.
+"""
+
+
+SETTLE_SECONDS = 900  # Transfers newer than this at fetch time may not be indexed yet
+
+
+def filter_signature(wallet: dict) -> list:
+    """Settings that change which rows a wallet's file receives."""
+    return [
+        wallet.get("shard_mode"),
+        sorted(wallet.get("token_allowlist") or []),
+        sorted(wallet.get("token_denylist") or [])
+    ]
+
+
+def covered_intervals(cursor: dict | None, wallet: dict) -> list[list[int]]:
+    """
+    Get the time intervals already exported for a wallet entry.
+
+    Coverage recorded under other filters does not count: the file then
+    lacks rows the current filters would add.
+
+    Args:
+        cursor: The wallet's cursor, or None
+        wallet: The wallet entry
+
+    Returns:
+        Sorted, disjoint [first, last] Unix timestamp intervals (inclusive)
+    """
+    coverage = (cursor or {}).get("coverage")
+    if not coverage or coverage.get("filters") != filter_signature(wallet):
+        return []
+    return coverage.get("intervals", [])
+
+
+def missing_intervals(intervals: list[list[int]], start: int, end: int) -> list[tuple[int, int]]:
+    """
+    Get the parts of [start, end] not covered by intervals.
+
+    Args:
+        intervals: Sorted, disjoint inclusive intervals
+        start: First timestamp wanted
+        end: Last timestamp wanted
+
+    Returns:
+        Sorted (first, last) gaps, empty if everything is covered
+    """
+    gaps = []
+    cursor = start
+    for first, last in intervals:
+        if last < cursor:
+            continue
+        if first > end:
+            break
+        if first > cursor:
+            gaps.append((cursor, first - 1))
+        cursor = last + 1
+        if cursor > end:
+            return gaps
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def add_interval(intervals: list[list[int]], start: int, end: int) -> list[list[int]]:
+    """
+    Add [start, end] to intervals, merging overlapping and adjacent ones.
+
+    Returns:
+        New sorted, disjoint interval list
+    """
+    if start > end:
+        return [list(interval) for interval in intervals]
+    merged = []
+    for first, last in sorted([*intervals, [start, end]]):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return merged
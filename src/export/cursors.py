@@ -0,0 +1,77 @@
+"""
+Persistent per-wallet export cursors.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+
+class CursorStore:
+    """
+    Remember how far each wallet entry has been exported.
+
+    A cursor is kept per (chain, address, target file) and holds the next
+    block to fetch plus bookkeeping used for scheduling polls. Cursors live
+    in memory and are written to a JSON file with save().
+    """
+
+    def __init__(self, file_path: Path):
+        """
+        Initialize the store, loading existing cursors.
+
+        Args:
+            file_path: JSON file holding the cursors
+        """
+        self.file_path = Path(file_path)
+        self._lock = threading.Lock()
+        self._cursors = self._load()
+
+    @staticmethod
+    def key(chain_id: int, address: str, file_path: str) -> str:
+        """Build the cursor key for a wallet entry."""
+        target = os.path.normcase(os.path.abspath(os.path.expanduser(file_path)))
+        return f"{chain_id}:{address.lower()}:{target}"
+
+    def get(self, key: str) -> dict | None:
+        """Get a copy of a cursor, or None if the wallet has never been exported."""
+        with self._lock:
+            cursor = self._cursors.get(key)
+            return dict(cursor) if cursor else None
+
+    def update(self, key: str, **fields) -> dict:
+        """
+        Create or update a cursor.
+
+        Args:
+            key: Cursor key from key()
+            **fields: Values to set (e.g. next_block, last_block, last_hash)
+
+        Returns:
+            Copy of the updated cursor
+        """
+        with self._lock:
+            cursor = self._cursors.setdefault(key, {})
+            cursor.update(fields)
+            return dict(cursor)
+
+    def save(self) -> None:
+        """Write all cursors to disk atomically."""
+        with self._lock:
+            data = json.dumps(self._cursors, indent=2)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+        with open(temp_path, 'w') as f:
+            f.write(data)
+        os.replace(temp_path, self.file_path)
+
+    def _load(self) -> dict:
+        """Load cursors from disk."""
+        if self.file_path.exists():
+            try:
+                with open(self.file_path, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError):
+                return {}
+        return {}
@@ -0,0 +1,1004 @@
+"""
+Export runner that fetches wallet transactions and writes them to Excel files.
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+# Add parent directory to path for imports
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.block_index import BlockIndex
+from api.etherscan import EtherscanClient, EtherscanAPIError, DEFAULT_END_BLOCK
+from export.aggregation import BalanceAggregator
+from export.checkpoint import Checkpoint
+from export.coverage import SETTLE_SECONDS, add_interval, covered_intervals, filter_signature, missing_intervals
+from export.cursors import CursorStore
+from export.pipeline import Stage
+from export.scheduler import estimate_cost, order_jobs, update_cost
+from export.sharding import create_handler
+from utils.profiling import RunProfiler
+from utils.progress import ProgressTracker
+from utils.single_flight import SingleFlight
+
+
+class ExportRunner:
+    """
+    Run an export over a list of wallets, independent of the GUI.
+
+    With a checkpoint, every fetched page is committed to disk before the
+    next one is requested, so an interrupted run can be resumed with
+    resume(). cancel() may be called from any thread; the runner stops at
+    the next page boundary without touching any Excel file mid-write.
+
+    Fetching, transforming (formatting, checkpointing and merging rows) and
+    writing run as pipeline stages joined by bounded queues (see
+    export.pipeline), so the network stays busy while files are saved.
+    Up to wallet_workers wallets are fetched at the same time (one per API
+    key by default), ahead of the one the pipeline is waiting for; results
+    are still handed on in the scheduled order.
+    After a run, stage_stats holds each stage's busy and idle time and
+    queue depths.
+
+    Wallet entries that need the same data (the same address listed for
+    several files) share requests: probes are coalesced while in flight,
+    and an entry whose fetch matches an earlier one of the run reuses
+    that entry's formatted rows, so API usage follows unique addresses.
+    coalesced counts the entries served that way.
+    """
+
+    TRANSFORM_QUEUE_PAGES = 16  # Raw pages buffered between fetch and transform
+    WRITE_QUEUE_FILES = 2  # Merged files buffered between transform and write
+
+    def __init__(
+        self,
+        client: EtherscanClient,
+        tracker: ProgressTracker | None = None,
+        checkpoint: Checkpoint | None = None,
+        fetch_workers: int | None = None,
+        wallet_workers: int | None = None,
+        write_summaries: bool = False,
+        write_workers: int = 1,
+        profiler: RunProfiler | None = None,
+        cursors: CursorStore | None = None,
+        block_index: BlockIndex | None = None
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            client: Etherscan client used for fetching
+            tracker: Optional progress tracker receiving page and stage events
+            checkpoint: Optional checkpoint for resumable runs
+            fetch_workers: Block windows fetched concurrently per wallet
+                (the client's default_fetch_workers() if None)
+            wallet_workers: Wallets fetched concurrently (the client's
+                default_wallet_workers() if None; always 1 when profiling)
+            write_summaries: Update per-token flow summaries next to each file
+            write_workers: Processes saving workbooks in parallel; with 1,
+                files are written in this process between fetches
+            profiler: Optional profiler labelled with the current wallet and
+                stage; writes then stay in this process so they are profiled
+            cursors: Optional cursor store; full-history runs then probe each
+                wallet's newest transfer first and skip wallets with nothing new
+            block_index: Optional timestamp/block index; date-range runs then
+                only fetch the blocks of the range instead of the full history.
+                Together with cursors, the time already exported to each file
+                is remembered and only the parts never fetched are requested
+        """
+        self.client = client
+        self.tracker = tracker
+        self.checkpoint = checkpoint
+        self.fetch_workers = fetch_workers or client.default_fetch_workers()
+        self.wallet_workers = wallet_workers or client.default_wallet_workers()
+        self.write_summaries = write_summaries
+        self.write_workers = write_workers
+        self.profiler = profiler
+        self.cursors = cursors
+        self.block_index = block_index
+        self.cancelled = False
+        self.stage_stats = []
+        self.coalesced = 0
+        self._reused = set()
+        self._costs = {}
+        self._cancel_event = threading.Event()
+        self._abort_event = threading.Event()
+
+    @staticmethod
+    def default_write_workers() -> int:
+        """Write processes to use by default: one per spare core, at most 4."""
+        return max(1, min(4, (os.cpu_count() or 1) - 1))
+
+    def cancel(self):
+        """Request the run to stop at the next page boundary."""
+        self._cancel_event.set()
+
+    def run(
+        self,
+        wallets: list[dict],
+        start_timestamp: int | None = None,
+        end_timestamp: int | None = None,
+        end_block: int = DEFAULT_END_BLOCK
+    ) -> list[dict]:
+        """
+        Export every wallet to its file.
+
+        Args:
+            wallets: List of wallet dictionaries with "address", "file_path"
+                and optionally "shard_mode" (see export.sharding),
+                "token_allowlist" and "token_denylist" (contract addresses)
+                and "start_block" (first block to fetch, default 0) and
+                "priority" (pinned wallets, 1, run before the others)
+            start_timestamp: Optional start Unix timestamp
+            end_timestamp: Optional end Unix timestamp
+            end_block: Last block to fetch (inclusive)
+
+        Returns:
+            One result dictionary per processed wallet with "address",
+            "file_path", "added", "error" (None on success),
+            "estimated_cost" and "actual_cost" (seconds, None if unknown
+            or not exported in this run) keys
+        """
+        if self.checkpoint:
+            self.checkpoint.start(wallets, start_timestamp, end_timestamp, end_block)
+        return self._export(wallets, start_timestamp, end_timestamp, end_block)
+
+    def resume(self) -> list[dict]:
+        """
+        Continue the run stored in the checkpoint.
+
+        Returns:
+            Results as for run(), including wallets finished before the interruption
+        """
+        if not self.checkpoint or not self.checkpoint.load():
+            return []
+
+        state = self.checkpoint.state
+        wallets = [entry["wallet"] for entry in state["wallets"]]
+        self.checkpoint.set_status("running")
+        return self._export(
+            wallets,
+            state["start_timestamp"],
+            state["end_timestamp"],
+            state.get("end_block") or DEFAULT_END_BLOCK
+        )
+
+    def _export(
+        self,
+        wallets: list[dict],
+        start_timestamp: int | None,
+        end_timestamp: int | None,
+        end_block: int
+    ) -> list[dict]:
+        """
+        Export wallets grouped by target file.
+
+        Wallets sharing a file are fetched one after another, their rows are
+        merged and de-duplicated, and the file is opened and saved once.
+        This thread only fetches; pages flow to the transform stage and
+        merged files to the write stage, each through a bounded queue, so
+        the next wallet is fetched while earlier files are saved.
+        Files are processed cheapest first according to past runs (see
+        export.scheduler), pinned wallets ahead of the rest. Wallets already
+        written according to the checkpoint, found unchanged by the activity
+        probe, or whose date range is already fully exported, are skipped.
+        """
+        results = {}
+        run_started = time.time()
+        self._flights = SingleFlight()
+        self._reused = set()  # Entries served by another entry's requests
+        unchanged, probes = self._probe_wallets(wallets, start_timestamp, end_timestamp, end_block)
+        tracked = self._coverage_tracked(wallets, end_block)
+        first_block, last_block = self._block_range(start_timestamp, end_timestamp, end_block)
+        ranges = {}  # Block ranges to fetch per wallet index
+        for i, wallet in enumerate(wallets):
+            state = self.checkpoint.wallets[i] if self.checkpoint else None
+            if i in unchanged or (state and state["status"] == "written"):
+                ranges[i] = []  # Skipped; no need to look up its gaps
+            elif i in tracked:
+                ranges[i] = self._missing_block_ranges(
+                    wallet, start_timestamp, end_timestamp or int(run_started), first_block, last_block
+                )
+                if not ranges[i]:
+                    unchanged.add(i)  # The whole range is already in the file
+            else:
+                ranges[i] = [(max(wallet.get("start_block", 0), first_block), last_block)]
+        if self.checkpoint:
+            self.checkpoint.mark_unchanged(sorted(unchanged))
+        estimates = {
+            i: estimate_cost((self.cursors.get(self._cursor_key(wallet)) or {}).get("cost"))
+            if self.cursors else None
+            for i, wallet in enumerate(wallets)
+        }
+        groups = order_jobs(self._group_by_file(wallets), wallets, estimates)
+        self._costs = {}  # Measured fetch/write cost per exported wallet
+
+        # Entries fetching the same data share the rows of the first one
+        # whose fetch succeeds
+        self._fetch_keys = {}
+        for i, wallet in enumerate(wallets):
+            state = self.checkpoint.wallets[i] if self.checkpoint else None
+            if i in unchanged or (state and (state["status"] != "pending" or state["cursors"])):
+                continue  # Skipped, or resumed with rows of its own
+            self._fetch_keys[i] = self._fetch_key(wallet, ranges[i])
+        users = Counter(self._fetch_keys.values())  # Entries of each key not handled yet
+        self._shared_rows = {}  # Fetch key -> [rows, entries still needing them]
+        sources = {}  # Fetch key -> index of the entry that fetched it
+        self.coalesced = len(self._reused)
+
+        # State shared by the transform and write stages during this run
+        self._wallets = wallets
+        self._results = results
+        self._time_range = (start_timestamp, end_timestamp)
+        self._rows = {}  # Rows of wallets being fetched (without checkpoint)
+        self._fetched = {}  # Rows of fetched wallets waiting for their file
+        self._pending = []  # (file key, future, file_path, fetched, owners), oldest first
+
+        # openpyxl is pure Python, so saves only overlap on separate cores
+        self._pool = None
+        if self.write_workers > 1 and len(groups) > 1 and not self.profiler:
+            self._pool = ProcessPoolExecutor(max_workers=self.write_workers)
+
+        # Profiling keeps every stage on this thread, where cProfile sees it
+        threaded = not self.profiler
+        self._writer = Stage("write", self._write_file, self.WRITE_QUEUE_FILES, threaded)
+        self._transformer = Stage("transform", self._transform, self.TRANSFORM_QUEUE_PAGES, threaded)
+        self._writer.start()
+        self._transformer.start()
+
+        # Entries to fetch in order; only the first entry of each fetch key
+        # may be fetched ahead, later ones wait to learn whether it succeeded
+        to_fetch = [
+            i for _, indices in groups for i in indices
+            if i not in unchanged and not (self.checkpoint and self.checkpoint.wallets[i]["status"] == "written")
+        ]
+        seen_keys = set()
+        ahead = []
+        for i in to_fetch:
+            key = self._fetch_keys.get(i)
+            if key is None or key not in seen_keys:
+                ahead.append(i)
+            seen_keys.add(key)
+        ahead.reverse()  # Popped from the end, in fetch order
+        fetches = {}  # Wallet index -> future of its fetch
+        wallet_workers = 1 if self.profiler else max(1, self.wallet_workers)
+        fetcher = ThreadPoolExecutor(max_workers=wallet_workers) if wallet_workers > 1 else None
+        self._abort_event.clear()
+
+        try:
+            for file_path, indices in groups:
+                for i in indices:
+                    address = wallets[i]["address"]
+                    state = self.checkpoint.wallets[i] if self.checkpoint else None
+
+                    if i in unchanged or (state and state["status"] == "written"):
+                        if self.tracker:
+                            self.tracker.wallet_skipped(i + 1, address)
+                        added = 0 if i in unchanged else state["added"]
+                        results[i] = self._result(address, file_path, added)
+                        continue
+
+                    key = self._fetch_keys.get(i)
+                    if key is not None:
+                        users[key] -= 1
+                    if key in sources:
+                        if self.tracker:
+                            self.tracker.wallet_started(i + 1, address)
+                        self._costs[i] = {"fetch": 0.0, "write": 0.0, "calls": 0, "rows": 0}
+                        if self.tracker:
+                            self.tracker.wallet_fetched(i + 1)
+                        self._transformer.put(("shared", i, key, sources[key]))
+                        self._reused.add(i)
+                        self.coalesced = len(self._reused)
+                        continue
+
+                    if fetcher:
+                        if i in ahead:
+                            ahead.remove(i)  # Not fetched ahead: start it first
+                            ahead.append(i)
+                        while len(fetches) < wallet_workers and ahead:
+                            n = ahead.pop()
+                            fetches[n] = fetcher.submit(self._fetch_job, n, wallets[n], ranges[n])
+                        future = fetches.pop(i, None) or fetcher.submit(self._fetch_job, i, wallets[i], ranges[i])
+                    else:
+                        future = Future()
+                        try:
+                            future.set_result(self._fetch_job(i, wallets[i], ranges[i]))
+                        except Exception as e:
+                            future.set_exception(e)
+                    try:
+                        completed, seconds, calls = future.result()
+                    except EtherscanAPIError as e:
+                        # Reported before the event so the stage's wallet_finished comes after
+                        if self.tracker:
+                            self.tracker.wallet_fetched(i + 1)
+                        self._transformer.put(("error", i, file_path, str(e)))
+                        continue
+
+                    if not completed:
+                        break  # Cancelled at a page boundary
+                    self._costs[i] = {"fetch": seconds, "write": 0.0, "calls": calls, "rows": 0}
+                    # Later entries of the key take the rows from this one,
+                    # also when an earlier entry's fetch failed
+                    consumers = users[key] if key is not None else 0
+                    if self.tracker:
+                        self.tracker.wallet_fetched(i + 1)
+                    self._transformer.put(("fetched", i, consumers))
+                    if consumers:
+                        sources[key] = i
+
+                if self._cancel_event.is_set():
+                    break
+                self._transformer.put(("file", file_path, indices))
+
+            # Fetches ahead of a cancelled run stop at their next page
+            if fetcher:
+                fetcher.shutdown(wait=True, cancel_futures=True)
+            # Fetched files are still transformed and written when cancelled
+            self._transformer.close()
+            self._writer.close()
+            while self._pending:
+                self._finish_write(*self._pending.pop(0)[1:])
+        finally:
+            # Fetch threads feed the transform stage, so they stop first
+            self._abort_event.set()
+            if fetcher:
+                fetcher.shutdown(wait=True, cancel_futures=True)
+            self._transformer.stop()
+            self._writer.stop()
+            if self._pool:
+                self._pool.shutdown(wait=True)
+            self.stage_stats = [self._transformer.stats(), self._writer.stats()]
+            self._rows, self._fetched, self._pending = {}, {}, []
+            self._shared_rows = {}
+
+        # Remember the newest transfer of every wallet exported in full
+        for i, (tx_hash, block, filters) in probes.items():
+            if i in results and not results[i]["error"] and i not in unchanged:
+                self.cursors.update(
+                    self._cursor_key(wallets[i]),
+                    last_hash=tx_hash,
+                    last_block=block,
+                    filters=filters
+                )
+        # Remember which time range each file now holds completely
+        covered_until = run_started - SETTLE_SECONDS
+        if end_timestamp:
+            covered_until = min(covered_until, end_timestamp)
+        for i in tracked:
+            if i in results and not results[i]["error"]:
+                key = self._cursor_key(wallets[i])
+                intervals = covered_intervals(self.cursors.get(key), wallets[i])
+                self.cursors.update(key, coverage={
+                    "filters": filter_signature(wallets[i]),
+                    "intervals": add_interval(intervals, start_timestamp or 0, int(covered_until))
+                })
+        # Learn each exported wallet's cost for scheduling later runs
+        for i, result in results.items():
+            result["estimated_cost"] = estimates[i]
+        for i, cost in self._costs.items():
+            if i not in results:
+                continue  # Cancelled before its file was written
+            results[i]["actual_cost"] = cost["fetch"] + cost["write"]
+            if self.cursors and not results[i]["error"]:
+                key = self._cursor_key(wallets[i])
+                history = (self.cursors.get(key) or {}).get("cost")
+                self.cursors.update(
+                    key,
+                    cost=update_cost(history, cost["fetch"], cost["write"], cost["calls"], cost["rows"])
+                )
+        if self.cursors and (probes or tracked or self._costs):
+            self.cursors.save()
+        if self.block_index:
+            self.block_index.save()
+        self.client.token_registry.save()
+
+        self.cancelled = self._cancel_event.is_set()
+        if self.checkpoint:
+            self.checkpoint.set_status("cancelled" if self.cancelled else "finished")
+
+        return [results[i] for i in sorted(results)]
+
+    def _probe_wallets(
+        self,
+        wallets: list[dict],
+        start_timestamp: int | None,
+        end_timestamp: int | None,
+        end_block: int
+    ) -> tuple[set[int], dict[int, tuple]]:
+        """
+        Find wallets with no new transfers since their last full export.
+
+        Only full-history runs are probed (no date range, end block or start
+        block), because only then does "newest transfer already exported"
+        mean the file is complete. Each wallet costs one single-result
+        request; probes run concurrently so a pooled client can spread them
+        over its keys. A failed probe just means the wallet is exported.
+
+        Returns:
+            Tuple of (indices of unchanged wallets, mapping of probed wallet
+            index to (newest hash, newest block, filter signature))
+        """
+        if not self.cursors or start_timestamp or end_timestamp or end_block != DEFAULT_END_BLOCK:
+            return set(), {}
+
+        candidates = []
+        for i, wallet in enumerate(wallets):
+            state = self.checkpoint.wallets[i] if self.checkpoint else None
+            if wallet.get("start_block") or (state and (state["status"] != "pending" or state["cursors"])):
+                continue
+            candidates.append(i)
+
+        def probe(i: int):
+            address = wallets[i]["address"]
+            try:
+                newest, shared = self._flights.do(
+                    ("latest_transfer", self.client.CHAIN_ID, address.lower()),
+                    lambda: self.client.get_latest_transfer(address)
+                )
+            except EtherscanAPIError:
+                return i, False
+            if shared:
+                self._reused.add(i)
+            return i, newest
+
+        unchanged = set()
+        probes = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.fetch_workers)) as executor:
+            for i, newest in executor.map(probe, candidates):
+                if newest is False:
+                    continue
+                wallet = wallets[i]
+                filters = filter_signature(wallet)
+                tx_hash = newest.get("hash", "") if newest else ""
+                block = int(newest.get("blockNumber") or 0) if newest else 0
+                probes[i] = (tx_hash, block, filters)
+
+                cursor = self.cursors.get(self._cursor_key(wallet)) or {}
+                if (
+                    "last_hash" in cursor
+                    and cursor["last_hash"] == tx_hash
+                    and cursor.get("last_block") == block
+                    and cursor.get("filters") == filters
+                    and create_handler(wallet["file_path"], wallet.get("shard_mode")).file_exists()
+                ):
+                    unchanged.add(i)
+        return unchanged, probes
+
+    def _block_range(
+        self,
+        start_timestamp: int | None,
+        end_timestamp: int | None,
+        end_block: int
+    ) -> tuple[int, int]:
+        """
+        Narrow a date range to block bounds using the block index.
+
+        Returns:
+            Tuple of (first block, last block) to fetch; rows are still
+            filtered by timestamp afterwards
+        """
+        first_block = 0
+        if self.block_index:
+            if start_timestamp:
+                first_block = self.block_index.first_block_at_or_after(start_timestamp)
+            if end_timestamp:
+                end_block = min(end_block, self.block_index.last_block_at_or_before(end_timestamp, end_block))
+        return first_block, end_block
+
+    def _coverage_tracked(self, wallets: list[dict], end_block: int) -> set[int]:
+        """
+        Find the wallets whose exported time range is tracked in their cursor.
+
+        Coverage needs the cursor store and the block index, and is only
+        tracked for runs bounded by time alone: an explicit end block or
+        wallet "start_block" cuts the range at a block whose time is not
+        known. Wallets resumed mid-fetch are left out, as their rows come
+        from an earlier session.
+        """
+        if not self.cursors or not self.block_index or end_block != DEFAULT_END_BLOCK:
+            return set()
+        tracked = set()
+        for i, wallet in enumerate(wallets):
+            state = self.checkpoint.wallets[i] if self.checkpoint else None
+            if wallet.get("start_block") or (state and (state["status"] != "pending" or state["cursors"])):
+                continue
+            tracked.add(i)
+        return tracked
+
+    def _missing_block_ranges(
+        self,
+        wallet: dict,
+        start_timestamp: int | None,
+        end_timestamp: int,
+        first_block: int,
+        last_block: int
+    ) -> list[tuple[int, int]]:
+        """
+        Get the block ranges holding the parts of a date range not yet exported.
+
+        The time gaps are turned into conservative block bounds with the
+        block index; ranges that touch are merged, so the result is sorted
+        and disjoint and a single per-stream checkpoint cursor still works.
+
+        Returns:
+            (first block, last block) ranges; empty if nothing is missing
+        """
+        intervals = []
+        if create_handler(wallet["file_path"], wallet.get("shard_mode")).file_exists():
+            intervals = covered_intervals(self.cursors.get(self._cursor_key(wallet)), wallet)
+
+        ranges = []
+        for first, last in missing_intervals(intervals, start_timestamp or 0, end_timestamp):
+            low = self.block_index.first_block_at_or_after(first) if first else 0
+            high = self.block_index.last_block_at_or_before(last, last_block)
+            low, high = max(low, first_block), min(high, last_block)
+            if low > high:
+                continue
+            if ranges and low <= ranges[-1][1] + 1:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], high))
+            else:
+                ranges.append((low, high))
+        return ranges
+
+    def _fetch_key(self, wallet: dict, ranges: list[tuple[int, int]]) -> tuple:
+        """
+        Key of the formatted rows an entry needs in this run.
+
+        Entries with equal keys fetch the same pages and format them the
+        same way (the date range is the same for the whole run).
+        """
+        return (
+            "tokentx",
+            self.client.CHAIN_ID,
+            wallet["address"].lower(),
+            tuple(ranges),
+            tuple(contract.lower() for contract in wallet.get("token_allowlist") or []),
+            tuple(sorted(contract.lower() for contract in wallet.get("token_denylist") or []))
+        )
+
+    def _cursor_key(self, wallet: dict) -> str:
+        """Cursor key of a wallet entry."""
+        return CursorStore.key(self.client.CHAIN_ID, wallet["address"], wallet["file_path"])
+
+    def _stage_callback(self, file_path: str):
+        """
+        Stage callback for writing file_path, or None when nothing listens.
+
+        Stages go to the tracker as the file's write stage (writes overlap
+        fetching, so the current wallet's stage stays with its fetch) and
+        to the profiler as labels.
+        """
+        if not self.tracker and not self.profiler:
+            return None
+
+        def stage_changed(stage: str):
+            if self.tracker:
+                self.tracker.write_stage_changed(file_path, stage)
+            if self.profiler:
+                self.profiler.label(stage=stage)
+
+        return stage_changed
+
+    @staticmethod
+    def _group_by_file(wallets: list[dict]) -> list[tuple[str, list[int]]]:
+        """
+        Group wallet indices by target file, in order of first appearance.
+
+        Returns:
+            List of (file_path, wallet indices) tuples
+        """
+        groups = {}
+        for i, wallet in enumerate(wallets):
+            file_path = wallet["file_path"]
+            key = os.path.normcase(os.path.abspath(os.path.expanduser(file_path)))
+            groups.setdefault(key, (file_path, []))[1].append(i)
+        return list(groups.values())
+
+    @staticmethod
+    def _merge_rows(fetched: dict[int, list[dict]]) -> tuple[list[dict], dict[str, int]]:
+        """
+        Merge the rows of several wallets sharing a file.
+
+        A transaction seen by more than one wallet (e.g. a transfer between
+        two wallets of the group) is kept once and attributed to the first
+        wallet.
+
+        Args:
+            fetched: Mapping of wallet index to formatted rows
+
+        Returns:
+            Tuple of (merged rows, mapping of transaction hash to owning wallet index)
+        """
+        merged = []
+        owners = {}
+        for i, rows in fetched.items():
+            for row in rows:
+                tx_hash = row.get("Transaction Hash")
+                owner = owners.setdefault(tx_hash, i)
+                if owner == i:
+                    merged.append(row)
+        return merged, owners
+
+    def _transform(self, item: tuple) -> None:
+        """
+        Handle one event of the fetch stage (transform stage).
+
+        Events, in the order the fetch stage produced them:
+
+        - ("page", index, raw page, next block, stream): format the page and
+          commit it to the checkpoint
+        - ("fetched", index, consumers): the wallet's rows are complete;
+          consumers later entries of the run will share them
+        - ("shared", index, fetch key, source index): the wallet needs the
+          same rows as an entry fetched earlier in the run
+        - ("error", index, file_path, message): the wallet's fetch failed
+        - ("file", file_path, indices): every wallet of the file was handled;
+          merge and de-duplicate their rows and hand them to the write stage
+        """
+        kind, index = item[0], item[1]
+
+        if kind == "page":
+            _, _, page, next_block, stream = item
+            start_timestamp, end_timestamp = self._time_range
+            formatted = self.client.format_transactions(
+                page,
+                start_timestamp,
+                end_timestamp,
+                exclude_contracts=self._wallets[index].get("token_denylist") or []
+            )
+            if self.checkpoint:
+                self.checkpoint.record_page(index, formatted, next_block, stream)
+                row_count = self.checkpoint.wallets[index]["rows"]
+            else:
+                rows = self._rows.setdefault(index, [])
+                rows.extend(formatted)
+                row_count = len(rows)
+            if self.tracker:
+                self.tracker.page_fetched(row_count, self.client.api_calls, self.client.rate_limit_wait)
+
+        elif kind == "fetched":
+            consumers = item[2]
+            if self.checkpoint:
+                if self.checkpoint.wallets[index]["status"] != "fetched":
+                    self.checkpoint.mark_fetched(index)
+                rows = self.checkpoint.read_rows(index)
+            else:
+                rows = self._rows.pop(index, [])
+            if len(self._wallets[index].get("token_allowlist") or []) > 1:
+                # Streams were fetched one contract at a time; restore block order
+                rows.sort(key=lambda tx: int(tx["Blockno"] or 0))
+            self._fetched[index] = rows
+            if index in self._costs:
+                self._costs[index]["rows"] = len(rows)
+            if consumers:
+                self._shared_rows[self._fetch_keys[index]] = [rows, consumers]
+
+        elif kind == "shared":
+            _, _, key, source = item
+            shared = self._shared_rows[key]
+            rows = shared[0]
+            shared[1] -= 1
+            if not shared[1]:
+                del self._shared_rows[key]  # Last entry needing them
+            if self.checkpoint:
+                # Give the entry its own spool so a resumed run can write it
+                cursors = dict(self.checkpoint.wallets[source]["cursors"])
+                for n, (stream, next_block) in enumerate(cursors.items()):
+                    self.checkpoint.record_page(index, rows if n == 0 else [], next_block, stream)
+                self.checkpoint.mark_fetched(index)
+            self._fetched[index] = rows
+            self._costs[index]["rows"] = len(rows)
+
+        elif kind == "error":
+            _, _, file_path, error = item
+            self._rows.pop(index, None)
+            self._results[index] = self._result(self._wallets[index]["address"], file_path, 0, error)
+            if self.checkpoint:
+                self.checkpoint.mark_error(index, error)
+            if self.tracker:
+                self.tracker.wallet_finished(index + 1)
+
+        elif kind == "file":
+            _, file_path, indices = item
+            fetched = {i: self._fetched.pop(i) for i in indices if i in self._fetched}
+            if not fetched:
+                return
+            if self.profiler:
+                self.profiler.label(os.path.basename(file_path), "dedupe")
+            merged, owners = self._merge_rows(fetched)
+            # The first wallet of a file decides how it is sharded
+            shard_mode = self._wallets[indices[0]].get("shard_mode")
+            addresses = [self._wallets[i]["address"] for i in indices]
+            self._writer.put((file_path, shard_mode, merged, owners, fetched, addresses))
+            if self.tracker:
+                self.tracker.queue_depths(self._queue_depths())
+
+    def _write_file(self, job: tuple) -> None:
+        """
+        Write the merged rows of one file (write stage).
+
+        With a process pool the write is submitted and finished later;
+        writes to the same file stay in order, and at most two per worker
+        are in flight so the rows held in memory stay bounded.
+
+        Args:
+            job: (file_path, shard_mode, merged rows, owners, fetched, addresses)
+        """
+        file_path, shard_mode, merged, owners, fetched, addresses = job
+
+        if self._pool:
+            key = os.path.normcase(os.path.abspath(os.path.expanduser(file_path)))
+            while self._pending and (
+                len(self._pending) >= 2 * self.write_workers
+                or any(entry[0] == key for entry in self._pending)
+            ):
+                self._finish_write(*self._pending.pop(0)[1:])
+            future = self._pool.submit(
+                _write_job,
+                file_path,
+                shard_mode,
+                _pack_rows(merged),
+                addresses,
+                self.write_summaries,
+                self.client.CHAIN_ID
+            )
+            self._pending.append((key, future, file_path, fetched, owners))
+            if self.tracker:
+                # The stages inside a write process can't be followed
+                self.tracker.write_stage_changed(file_path, "write")
+        else:
+            future = Future()
+            if self.profiler:
+                self.profiler.label(os.path.basename(file_path))
+            write_started = time.monotonic()
+            try:
+                added_rows = write_export_file(
+                    file_path,
+                    shard_mode,
+                    merged,
+                    addresses,
+                    self.write_summaries,
+                    stage_callback=self._stage_callback(file_path),
+                    chain_id=self.client.CHAIN_ID
+                )
+                future.set_result((
+                    [row.get("Transaction Hash") for row in added_rows],
+                    time.monotonic() - write_started
+                ))
+            except Exception as e:
+                future.set_exception(e)
+            self._finish_write(future, file_path, fetched, owners)
+
+        # Record writes that finished in the background meanwhile
+        while self._pending and self._pending[0][1].done():
+            self._finish_write(*self._pending.pop(0)[1:])
+
+    def _finish_write(
+        self,
+        future: Future,
+        file_path: str,
+        fetched: dict[int, list[dict]],
+        owners: dict[str, int]
+    ) -> int:
+        """
+        Record the outcome of a file write in the results, checkpoint and progress.
+
+        A failed write is reported as an error on every wallet of the file;
+        their rows stay in the checkpoint, so resuming retries the write.
+
+        The write time is shared between the file's wallets by row count.
+
+        Args:
+            future: Future resolving to (hashes of the rows added, seconds taken)
+            file_path: Target Excel file
+            fetched: Mapping of wallet index to formatted rows
+            owners: Mapping of transaction hash to owning wallet index
+
+        Returns:
+            Number of rows added to the file
+        """
+        if self.tracker:
+            self.tracker.write_stage_changed(file_path, None)
+        try:
+            added_hashes, seconds = future.result()
+        except Exception as e:
+            error = f"Could not write {file_path}: {e}"
+            for i in fetched:
+                self._results[i] = self._result(self._wallets[i]["address"], file_path, 0, error)
+                if self.checkpoint:
+                    self.checkpoint.mark_error(i, error)
+                if self.tracker:
+                    self.tracker.wallet_finished(i + 1)
+            return 0
+
+        total_rows = sum(len(rows) for rows in fetched.values())
+        for i, rows in fetched.items():
+            if i in self._costs:
+                share = len(rows) / total_rows if total_rows else 1 / len(fetched)
+                self._costs[i]["write"] = seconds * share
+
+        added = {i: 0 for i in fetched}
+        for tx_hash in added_hashes:
+            added[owners[tx_hash]] += 1
+        for i, count in added.items():
+            if self.checkpoint:
+                self.checkpoint.mark_written(i, count)
+            self._results[i] = self._result(self._wallets[i]["address"], file_path, count)
+        if self.tracker:
+            self.tracker.rows_written(len(added_hashes))
+            for i in fetched:
+                self.tracker.wallet_finished(i + 1)
+        return len(added_hashes)
+
+    def _fetch_job(self, index: int, wallet: dict, ranges: list[tuple[int, int]]) -> tuple[bool, float, int]:
+        """
+        Fetch one wallet, possibly in a fetch thread (see _fetch_wallet).
+
+        Returns:
+            Tuple of (True unless cancelled, seconds taken, API calls made).
+            Calls of wallets fetched at the same time are counted by each.
+        """
+        if self.tracker:
+            self.tracker.wallet_started(index + 1, wallet["address"])
+        if self.profiler:
+            self.profiler.label(wallet["address"], "fetch")
+        started = time.monotonic()
+        calls_before = self.client.api_calls
+        completed = self._fetch_wallet(index, wallet, ranges)
+        return completed, time.monotonic() - started, self.client.api_calls - calls_before
+
+    def _fetch_wallet(self, index: int, wallet: dict, ranges: list[tuple[int, int]]) -> bool:
+        """
+        Fetch a wallet's transactions page by page into the transform stage.
+
+        Only the given block ranges (sorted, disjoint) are fetched. A wallet
+        with a "token_allowlist" is fetched as one server-side filtered
+        stream per contract; "token_denylist" contracts are dropped when
+        the pages are formatted. Streams are split into block windows only
+        when their first page comes back full (see
+        EtherscanClient.iter_transaction_pages), so a contract with few
+        transfers costs one request.
+
+        Returns:
+            True once every page was handed on, False if the run was cancelled
+        """
+        state = self.checkpoint.wallets[index] if self.checkpoint else None
+        if state and state["status"] == "fetched":
+            return True  # Rows are in the checkpoint spool
+
+        for contract in wallet.get("token_allowlist") or [None]:
+            stream = contract or "*"
+            for first_block, last_block in ranges:
+                start_block = first_block
+                if state:
+                    start_block = max(start_block, state["cursors"].get(stream, start_block))
+                if start_block > last_block:
+                    continue  # Fetched before the run was interrupted
+
+                pages = self.client.iter_transaction_pages(
+                    wallet["address"],
+                    start_block=start_block,
+                    end_block=last_block,
+                    max_workers=self.fetch_workers,
+                    contract_address=contract
+                )
+                for page, next_block in pages:
+                    if self.block_index:
+                        self.block_index.add_transactions(page)
+                    self._transformer.put(("page", index, page, next_block, stream))
+                    if self.tracker:
+                        self.tracker.queue_depths(self._queue_depths())
+
+                    if self._cancel_event.is_set() or self._abort_event.is_set():
+                        pages.close()  # Abandon any windows still being fetched
+                        return False
+        return True
+
+    def _queue_depths(self) -> dict[str, int]:
+        """Items waiting in front of each pipeline stage."""
+        return {
+            "transform": self._transformer.depth,
+            "write": self._writer.depth + len(self._pending)
+        }
+
+    @staticmethod
+    def _result(address: str, file_path: str, added: int, error: str | None = None) -> dict:
+        """Build a per-wallet result dictionary."""
+        return {
+            "address": address,
+            "file_path": file_path,
+            "added": added,
+            "error": error,
+            "estimated_cost": None,
+            "actual_cost": None
+        }
+
+
+def write_export_file(
+    file_path: str,
+    shard_mode: str | None,
+    rows: list[dict],
+    addresses: list[str],
+    write_summaries: bool = False,
+    stage_callback=None,
+    chain_id: int = EtherscanClient.CHAIN_ID
+) -> list[dict]:
+    """
+    Append rows to an export file (and its flow summary) in one pass.
+
+    Args:
+        file_path: Target Excel file
+        shard_mode: Optional shard mode for the file
+        rows: Merged, formatted rows of every wallet of the file
+        addresses: Addresses of every wallet exported into the file
+        write_summaries: Also update the file's flow summary
+        stage_callback: Optional callback function(stage), see XlsxHandler
+        chain_id: Chain the rows come from, recorded in the file's metadata
+
+    Returns:
+        List of rows actually added (excluding duplicates)
+    """
+    handler = create_handler(file_path, shard_mode)
+    added_rows = handler.append_new_transactions(
+        rows,
+        stage_callback=stage_callback,
+        source={"source_address": ",".join(addresses), "chain_id": chain_id}
+    )
+
+    if write_summaries and added_rows:
+        if stage_callback:
+            stage_callback("summary")
+        aggregator = BalanceAggregator(file_path)
+        aggregator.update(addresses, added_rows)
+        aggregator.save()
+
+    return added_rows
+
+
+def _write_job(
+    file_path: str,
+    shard_mode: str | None,
+    packed: tuple[list[str], list[tuple]],
+    addresses: list[str],
+    write_summaries: bool,
+    chain_id: int
+) -> tuple[list[str], float]:
+    """
+    Write one export file in a worker process.
+
+    Returns:
+        Tuple of (transaction hashes of the rows added, seconds taken). The
+        hashes are all the parent needs to attribute the rows to wallets.
+    """
+    started = time.monotonic()
+    added_rows = write_export_file(
+        file_path, shard_mode, _unpack_rows(packed), addresses, write_summaries, chain_id=chain_id
+    )
+    return [row.get("Transaction Hash") for row in added_rows], time.monotonic() - started
+
+
+def _pack_rows(rows: list[dict]) -> tuple[list[str], list[tuple]]:
+    """
+    Convert row dictionaries to a column list and value tuples.
+
+    The column names are sent to the worker process once instead of with
+    every row, which keeps the pickled payload small.
+    """
+    columns = []
+    for row in rows:
+        for column in row:
+            if column not in columns:
+                columns.append(column)
+    return columns, [tuple(row.get(column) for column in columns) for row in rows]
+
+
+def _unpack_rows(packed: tuple[list[str], list[tuple]]) -> list[dict]:
+    """Rebuild row dictionaries from _pack_rows() output."""
+    columns, values = packed
+    return [dict(zip(columns, row)) for row in values]
@@ -0,0 +1,87 @@
+"""
+Cost-aware ordering of export jobs.
+"""
+
+import statistics
+
+
+COST_SMOOTHING = 0.5  # Weight of the newest run in a wallet's cost estimate
+
+
+def order_jobs(
+    jobs: list[tuple[str, list[int]]],
+    wallets: list[dict],
+    estimates: dict[int, float | None]
+) -> list[tuple[str, list[int]]]:
+    """
+    Order file jobs shortest first, with pinned wallets ahead of the rest.
+
+    A job is a target file with the wallets written to it. Its priority is
+    the highest "priority" of its wallets (0 when unset; pinned wallets
+    have 1) and its cost the sum of its wallets' estimated seconds.
+    Wallets without history are assumed to cost the median of the known
+    estimates. Running cheap jobs first minimizes the mean time until a
+    wallet's file is done, while heavy wallets finish at the end.
+
+    Args:
+        jobs: (file_path, wallet indices) tuples in list order
+        wallets: Wallets of the run
+        estimates: Estimated seconds per wallet index (None if unknown)
+
+    Returns:
+        The jobs in run order; equal jobs keep their list order
+    """
+    known = [cost for cost in estimates.values() if cost is not None]
+    fallback = statistics.median(known) if known else 0.0
+
+    def job_key(job: tuple[str, list[int]]) -> tuple[int, float]:
+        _, indices = job
+        priority = max(int(wallets[i].get("priority") or 0) for i in indices)
+        cost = sum(
+            fallback if estimates.get(i) is None else estimates[i]
+            for i in indices
+        )
+        return -priority, cost
+
+    return sorted(jobs, key=job_key)
+
+
+def estimate_cost(history: dict | None) -> float | None:
+    """
+    Estimated seconds to export a wallet, from its recorded history.
+
+    Args:
+        history: The "cost" entry of the wallet's cursor, or None
+
+    Returns:
+        Estimated seconds, or None if the wallet has no history
+    """
+    if not history:
+        return None
+    return history.get("estimate")
+
+
+def update_cost(history: dict | None, fetch_seconds: float, write_seconds: float, api_calls: int, rows: int) -> dict:
+    """
+    Fold a run's measured cost into a wallet's history.
+
+    Args:
+        history: Previous "cost" entry, or None
+        fetch_seconds: Time spent fetching the wallet
+        write_seconds: The wallet's share of its file's write time
+        api_calls: API calls made for the wallet
+        rows: Rows fetched for the wallet
+
+    Returns:
+        New "cost" entry with the last run's figures and a smoothed estimate
+    """
+    actual = fetch_seconds + write_seconds
+    previous = estimate_cost(history)
+    estimate = actual if previous is None else COST_SMOOTHING * actual + (1 - COST_SMOOTHING) * previous
+    return {
+        "estimate": round(estimate, 3),
+        "fetch_seconds": round(fetch_seconds, 3),
+        "write_seconds": round(write_seconds, 3),
+        "api_calls": api_calls,
+        "rows": rows
+    }
@@ -0,0 +1,328 @@
+"""
+Sharded Excel export: split large exports across per-period or fixed-size files.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Callable
+from openpyxl import load_workbook
+
+# Add parent directory to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from export.xlsx_handler import XlsxHandler
+from utils.helpers import unix_to_datetime
+
+
+# Shard modes offered in the GUI: label -> mode string
+SHARD_MODES = {
+    "None": None,
+    "By month": "month",
+    "By year": "year",
+    "Every 100k rows": "rows:100000",
+}
+
+
+def create_handler(file_path: str, shard_mode: str | None = None):
+    """
+    Create the Excel handler for an export target.
+
+    Args:
+        file_path: Path to the Excel file (the base name when sharded)
+        shard_mode: None, "month", "year" or "rows:<budget>"
+
+    Returns:
+        XlsxHandler, or ShardedXlsxHandler when a shard mode is set
+    """
+    if shard_mode:
+        return ShardedXlsxHandler(file_path, shard_mode)
+    return XlsxHandler(file_path)
+
+
+class ShardedXlsxHandler:
+    """
+    Handler that rolls an export into several workbooks.
+
+    With "month" or "year" every row goes to the shard of its period
+    (report_2024-01.xlsx, ...). With "rows:<budget>" rows fill the newest
+    shard (report_001.xlsx, ...) until it holds the budget, then a new shard
+    is started. A small manifest next to the base file records each shard's
+    row count and timestamp range, so appends only open the shards the new
+    rows belong to and the last timestamp is read without opening any
+    workbook.
+
+    Shards and manifest can't be saved together, so the shards an append
+    will write are listed as pending in the manifest first. A pending entry
+    left by an interrupted append is rebuilt from its workbook on load, and
+    the rows already in the shard are not written twice.
+    """
+
+    def __init__(self, file_path: str, shard_mode: str):
+        """
+        Initialize the sharded handler.
+
+        Args:
+            file_path: Base path; shard files are created next to it
+            shard_mode: "month", "year" or "rows:<budget>"
+
+        Raises:
+            ValueError: If the shard mode is not recognized
+        """
+        self.file_path = Path(file_path)
+        self.shard_mode = shard_mode
+        self.manifest_path = self.file_path.with_name(self.file_path.stem + ".manifest.json")
+
+        if shard_mode in ("month", "year"):
+            self.row_budget = None
+        elif shard_mode.startswith("rows:") and shard_mode[5:].isdigit() and int(shard_mode[5:]) > 0:
+            self.row_budget = int(shard_mode[5:])
+        else:
+            raise ValueError(f"Unknown shard mode: {shard_mode}")
+
+    def file_exists(self) -> bool:
+        """Check if any shard has been written."""
+        return self.manifest_path.exists()
+
+    def shard_paths(self) -> list[Path]:
+        """Paths of all shards, oldest first."""
+        return [self._shard_path(shard["key"]) for shard in self._load_manifest()["shards"]]
+
+    def get_existing_hashes(self) -> set[str]:
+        """
+        Get all existing transaction hashes across every shard.
+
+        Returns:
+            Set of transaction hashes already exported
+        """
+        hashes = set()
+        for path in self.shard_paths():
+            hashes |= XlsxHandler(path).get_existing_hashes()
+        return hashes
+
+    def get_last_timestamp(self) -> int | None:
+        """
+        Get the last (most recent) Unix timestamp from the manifest.
+
+        Returns:
+            Last Unix timestamp or None if no data
+        """
+        timestamps = [
+            shard["max_timestamp"] for shard in self._load_manifest()["shards"]
+            if shard["max_timestamp"] is not None
+        ]
+        return max(timestamps) if timestamps else None
+
+    def get_row_count(self) -> int:
+        """
+        Get the number of data rows across every shard.
+
+        Returns:
+            Number of data rows
+        """
+        return sum(shard["rows"] for shard in self._load_manifest()["shards"])
+
+    def append_transactions(
+        self,
+        transactions: list[dict],
+        stage_callback: Callable[[str], None] | None = None
+    ) -> int:
+        """
+        Append transactions to their shards, skipping duplicates.
+
+        Args:
+            transactions: List of transaction dictionaries
+            stage_callback: Optional callback function(stage), see XlsxHandler
+
+        Returns:
+            Number of transactions actually added (excluding duplicates)
+        """
+        return len(self.append_new_transactions(transactions, stage_callback))
+
+    def append_new_transactions(
+        self,
+        transactions: list[dict],
+        stage_callback: Callable[[str], None] | None = None,
+        source: dict | None = None
+    ) -> list[dict]:
+        """
+        Append transactions to their shards and return the rows written.
+
+        Args:
+            transactions: List of transaction dictionaries
+            stage_callback: Optional callback function(stage), see XlsxHandler
+            source: Optional metadata for each shard, see XlsxHandler
+
+        Returns:
+            List of transactions actually added (excluding duplicates)
+        """
+        if not transactions:
+            return []
+
+        manifest = self._load_manifest()
+        known_hashes = {}
+        if self.row_budget:
+            buckets = self._assign_by_rows(manifest, transactions, known_hashes)
+        else:
+            buckets = self._assign_by_period(transactions)
+
+        # List the shards before writing them, so none is unknown after a crash
+        for key in buckets:
+            self._get_shard(manifest, key)["pending"] = True
+        self._save_manifest(manifest)
+
+        added = []
+        for key, rows in buckets.items():
+            shard = self._get_shard(manifest, key)
+            shard_added = XlsxHandler(self._shard_path(key)).append_new_transactions(
+                rows,
+                stage_callback,
+                existing_hashes=known_hashes.get(key),
+                source=source
+            )
+            self._update_shard(shard, shard_added)
+            del shard["pending"]
+            added.extend(shard_added)
+
+        self._save_manifest(manifest)
+        return added
+
+    def _assign_by_period(self, transactions: list[dict]) -> dict[str, list[dict]]:
+        """Bucket rows by the month or year of their timestamp."""
+        fmt = "%Y-%m" if self.shard_mode == "month" else "%Y"
+        buckets = {}
+        for tx in transactions:
+            key = unix_to_datetime(_timestamp(tx)).strftime(fmt)
+            buckets.setdefault(key, []).append(tx)
+        return dict(sorted(buckets.items()))
+
+    def _assign_by_rows(
+        self,
+        manifest: dict,
+        transactions: list[dict],
+        known_hashes: dict[str, set[str]]
+    ) -> dict[str, list[dict]]:
+        """
+        Drop rows already exported, then fill the newest shard up to the row
+        budget and roll the rest into new shards.
+
+        Args:
+            manifest: Loaded manifest
+            transactions: Rows to assign
+            known_hashes: Filled with the hashes read per shard key, so
+                shards are not scanned twice
+
+        Returns:
+            Mapping of shard key to rows
+        """
+        shards = manifest["shards"]
+        timestamps = [_timestamp(tx) for tx in transactions]
+        low, high = min(timestamps), max(timestamps)
+
+        # Only shards whose time range overlaps the new rows can hold duplicates
+        seen = set()
+        for shard in shards:
+            if shard["min_timestamp"] is None:
+                continue
+            if shard["min_timestamp"] <= high and shard["max_timestamp"] >= low:
+                hashes = XlsxHandler(self._shard_path(shard["key"])).get_existing_hashes()
+                known_hashes[shard["key"]] = hashes
+                seen |= hashes
+
+        buckets = {}
+        number = len(shards) or 1
+        used = shards[-1]["rows"] if shards else 0
+        for tx in transactions:
+            tx_hash = tx.get("Transaction Hash")
+            if tx_hash in seen:
+                continue
+            if used >= self.row_budget:
+                number += 1
+                used = 0
+            key = f"{number:03d}"
+            buckets.setdefault(key, []).append(tx)
+            # Shards started here are empty; the newest one was read if it overlaps
+            known_hashes.setdefault(key, set())
+            used += 1
+        return buckets
+
+    def _shard_path(self, key: str) -> Path:
+        """Path of the shard with the given key."""
+        return self.file_path.with_name(f"{self.file_path.stem}_{key}{self.file_path.suffix}")
+
+    @staticmethod
+    def _get_shard(manifest: dict, key: str) -> dict:
+        """Get a shard entry from the manifest, adding it if new."""
+        for shard in manifest["shards"]:
+            if shard["key"] == key:
+                return shard
+        shard = {"key": key, "rows": 0, "min_timestamp": None, "max_timestamp": None}
+        manifest["shards"].append(shard)
+        manifest["shards"].sort(key=lambda entry: entry["key"])
+        return shard
+
+    @staticmethod
+    def _update_shard(shard: dict, rows: list[dict]) -> None:
+        """Update a shard entry's row count and timestamp range."""
+        if not rows:
+            return
+        timestamps = [_timestamp(tx) for tx in rows]
+        shard["rows"] += len(rows)
+        if shard["min_timestamp"] is not None:
+            timestamps += [shard["min_timestamp"], shard["max_timestamp"]]
+        shard["min_timestamp"] = min(timestamps)
+        shard["max_timestamp"] = max(timestamps)
+
+    def _load_manifest(self) -> dict:
+        """Load the manifest, or an empty one if none exists yet."""
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, 'r') as f:
+                    manifest = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                pass
+            else:
+                pending = [shard for shard in manifest["shards"] if shard.get("pending")]
+                if pending:
+                    for shard in pending:
+                        self._rebuild_shard(shard)
+                    self._save_manifest(manifest)
+                return manifest
+        return {"shard_mode": self.shard_mode, "shards": []}
+
+    def _rebuild_shard(self, shard: dict) -> None:
+        """Recount a shard entry left pending by an interrupted append from its workbook."""
+        shard.update({"rows": 0, "min_timestamp": None, "max_timestamp": None})
+        del shard["pending"]
+        path = self._shard_path(shard["key"])
+        if not path.exists():
+            return
+
+        wb = load_workbook(path, read_only=True)
+        ws = wb.active
+        timestamps = []
+        # Transaction Hash is column 1, UnixTimestamp column 3
+        for tx_hash, _, timestamp in ws.iter_rows(min_row=2, max_col=3, values_only=True):
+            if tx_hash:
+                timestamps.append(_timestamp({"UnixTimestamp": timestamp}))
+        wb.close()
+        if timestamps:
+            shard["rows"] = len(timestamps)
+            shard["min_timestamp"] = min(timestamps)
+            shard["max_timestamp"] = max(timestamps)
+
+    def _save_manifest(self, manifest: dict) -> None:
+        """Write the manifest atomically."""
+        temp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+
+def _timestamp(tx: dict) -> int:
+    """Unix timestamp of a formatted transaction (0 if missing)."""
+    try:
+        return int(tx.get("UnixTimestamp") or 0)
+    except (ValueError, TypeError):
+        return 0
@@ -0,0 +1,146 @@
+"""
+Headless watch mode that keeps exports continuously up to date.
+"""
+
+import threading
+import time
+from typing import Callable
+
+# Add parent directory to path for imports
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.etherscan import EtherscanClient, EtherscanAPIError
+from export.cursors import CursorStore
+from export.runner import ExportRunner
+from utils.config import Config
+
+
+class WalletWatcher:
+    """
+    Poll the saved wallet list and append new transfers as they appear.
+
+    Each wallet entry has a cursor (next block to fetch) kept in memory and
+    on disk, so every poll only fetches blocks that have not been exported
+    yet. Poll intervals adapt per wallet: an active wallet is polled at
+    up to min_interval, an idle one backs off towards max_interval, so the
+    API budget goes to the wallets that are actually moving.
+    """
+
+    CONFIRMATIONS = 12  # Stay this many blocks behind the chain head
+
+    def __init__(
+        self,
+        client: EtherscanClient,
+        config: Config,
+        interval: float = 300,
+        min_interval: float | None = None,
+        max_interval: float | None = None,
+        log: Callable[[str], None] = print,
+        write_summaries: bool = False
+    ):
+        """
+        Initialize the watcher.
+
+        Args:
+            client: Etherscan client used for fetching
+            config: Config providing the saved wallet list
+            interval: Base poll interval in seconds for new wallets
+            min_interval: Shortest interval for busy wallets (default interval / 4)
+            max_interval: Longest interval for idle wallets (default interval * 12)
+            log: Callable receiving one line of status text per event
+            write_summaries: Update per-token flow summaries with each delta
+        """
+        self.client = client
+        self.config = config
+        self.interval = interval
+        self.min_interval = min_interval or interval / 4
+        self.max_interval = max_interval or interval * 12
+        self.log = log
+        self.write_summaries = write_summaries
+        self.cursors = CursorStore(config.config_dir / "cursors.json")
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """Stop the watch loop after the current poll."""
+        self._stop_event.set()
+
+    def run(self):
+        """Poll until stop() is called."""
+        self.log(f"Watching saved wallets (base interval {self.interval:.0f}s)")
+        while not self._stop_event.is_set():
+            next_due = self.poll_once()
+            delay = max(1.0, next_due - time.time())
+            self._stop_event.wait(delay)
+
+    def poll_once(self) -> float:
+        """
+        Export new transfers for every wallet whose poll is due.
+
+        Returns:
+            Unix time at which the next wallet becomes due
+        """
+        wallets = [
+            wallet for wallet in self.config.get_wallet_list()
+            if wallet.get("address") and wallet.get("file_path")
+        ]
+        now = time.time()
+        due = []
+        next_due = now + self.max_interval
+
+        for wallet in wallets:
+            cursor = self.cursors.get(self._key(wallet)) or {}
+            poll_at = cursor.get("next_poll", 0)
+            if poll_at <= now:
+                due.append(dict(wallet, start_block=cursor.get("next_block", 0)))
+            else:
+                next_due = min(next_due, poll_at)
+
+        if not due:
+            return next_due
+
+        try:
+            end_block = self.client.get_latest_block() - self.CONFIRMATIONS
+        except EtherscanAPIError as e:
+            self.log(f"Could not read the latest block: {e}")
+            return now + self.min_interval
+
+        runner = ExportRunner(
+            self.client,
+            write_summaries=self.write_summaries,
+            write_workers=ExportRunner.default_write_workers()
+        )
+        results = runner.run(due, end_block=end_block)
+
+        for wallet, result in zip(due, results):
+            key = self._key(wallet)
+            cursor = self.cursors.get(key) or {}
+            interval = cursor.get("interval", self.interval)
+
+            if result["error"]:
+                self.log(f"{wallet['address'][:10]}...: {result['error']}")
+                # Retry soon, but don't hammer a failing wallet
+                interval = min(self.max_interval, max(interval, self.min_interval))
+                self.cursors.update(key, interval=interval, next_poll=now + interval)
+            else:
+                if result["added"]:
+                    interval = max(self.min_interval, interval / 2)
+                    self.log(f"{wallet['address'][:10]}...: +{result['added']} tx")
+                else:
+                    interval = min(self.max_interval, interval * 2)
+                self.cursors.update(
+                    key,
+                    next_block=end_block + 1,
+                    interval=interval,
+                    next_poll=now + interval,
+                    last_polled=now
+                )
+            next_due = min(next_due, now + interval)
+
+        self.cursors.save()
+        return next_due
+
+    def _key(self, wallet: dict) -> str:
+        """Cursor key of a wallet entry."""
+        return CursorStore.key(self.client.CHAIN_ID, wallet["address"], wallet["file_path"])
@@ -2,13 +2,43 @@
 Excel file handler for reading and writing transaction data.
 """
 
+import os
+import posixpath
+import re
+import zipfile
 from pathlib import Path
+from typing import Callable
+from xml.etree import ElementTree
 from openpyxl import Workbook, load_workbook
+from openpyxl.packaging.custom import StringProperty
 from openpyxl.utils import get_column_letter
 
 
+# Export metadata kept in the workbook's custom document properties
+METADATA_PREFIX = "WalletExporter."
+METADATA_FIELDS = ("row_count", "last_block", "last_timestamp", "source_address", "chain_id")
+_INT_FIELDS = ("row_count", "last_block", "last_timestamp", "chain_id")
+_DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension ref="(?:[A-Z]+\d+:)?[A-Z]+(\d+)"')
+_NS = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+    "props": "http://schemas.openxmlformats.org/officeDocument/2006/custom-properties",
+}
+_R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+
+
 class XlsxHandler:
-    """Handler for Excel file operations."""
+    """
+    Handler for Excel file operations.
+
+    Every append also records export metadata (row count, last block, last
+    timestamp, source address and chain) in the workbook's custom document
+    properties. read_metadata() reads them straight from the xlsx zip and
+    checks the row count against the sheet's dimension record, so "where
+    does this file end" questions never load the sheet data. Files from
+    older versions, or edited by hand so the counts no longer match, fall
+    back to a scan.
+    """
 
     # Column headers in order
     HEADERS = [
@@ -72,7 +102,58 @@ class XlsxHandler:
         # Freeze the header row
         ws.freeze_panes = "A2"
 
-        wb.save(self.file_path)
+        self._set_metadata(wb, {"row_count": 0})
+        self._save_workbook(wb)
+
+    def _save_workbook(self, wb: Workbook) -> None:
+        """
+        Save a workbook atomically.
+
+        The workbook is written to a temporary file next to the target and
+        then moved over it, so an interrupted save never leaves a truncated
+        file behind.
+        """
+        temp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+        try:
+            wb.save(temp_path)
+            os.replace(temp_path, self.file_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+    def read_metadata(self) -> dict | None:
+        """
+        Read the export metadata without loading the workbook.
+
+        Returns:
+            Dictionary with the METADATA_FIELDS that are set, or None if the
+            file has no metadata or it no longer matches the sheet
+        """
+        if not self.file_exists():
+            return None
+        try:
+            with zipfile.ZipFile(self.file_path) as archive:
+                metadata = _read_custom_properties(archive)
+                if "row_count" not in metadata:
+                    return None
+                # Rows added or removed outside the exporter make it stale
+                if _read_dimension_rows(archive) != metadata["row_count"] + 1:
+                    return None
+                return metadata
+        except (zipfile.BadZipFile, KeyError, ValueError, ElementTree.ParseError, OSError):
+            return None
+
+    def get_last_block(self) -> int | None:
+        """
+        Get the highest block number exported to the file.
+
+        Returns:
+            Last block number or None if no data
+        """
+        metadata = self.read_metadata()
+        if metadata is not None and "last_block" in metadata:
+            return metadata["last_block"]
+        return self._scan_column_max(2)
 
     def get_last_row(self) -> int:
         """
@@ -84,6 +165,10 @@ class XlsxHandler:
         if not self.file_exists():
             return 0
 
+        metadata = self.read_metadata()
+        if metadata is not None:
+            return metadata["row_count"] + 1
+
         wb = load_workbook(self.file_path, read_only=True)
         ws = wb.active
         last_row = ws.max_row
@@ -120,27 +205,38 @@ class XlsxHandler:
         Returns:
             Last Unix timestamp or None if no data
         """
+        metadata = self.read_metadata()
+        if metadata is not None and "last_timestamp" in metadata:
+            return metadata["last_timestamp"]
+        # UnixTimestamp is column 3
+        return self._scan_column_max(3)
+
+    def _scan_column_max(self, column: int) -> int | None:
+        """Scan a numeric column for its largest value (None if empty)."""
         if not self.file_exists():
             return None
 
         wb = load_workbook(self.file_path, read_only=True)
         ws = wb.active
 
-        last_timestamp = None
-        # UnixTimestamp is column 3
-        for row in ws.iter_rows(min_row=2, min_col=3, max_col=3, values_only=True):
+        largest = None
+        for row in ws.iter_rows(min_row=2, min_col=column, max_col=column, values_only=True):
             if row[0]:
                 try:
-                    timestamp = int(row[0])
-                    if last_timestamp is None or timestamp > last_timestamp:
-                        last_timestamp = timestamp
+                    value = int(row[0])
+                    if largest is None or value > largest:
+                        largest = value
                 except (ValueError, TypeError):
                     continue
 
         wb.close()
-        return last_timestamp
+        return largest
 
-    def append_transactions(self, transactions: list[dict]) -> int:
+    def append_transactions(
+        self,
+        transactions: list[dict],
+        stage_callback: Callable[[str], None] | None = None
+    ) -> int:
         """
         Append transactions to the Excel file.
         Will not modify existing data, formulas, or formatting.
@@ -148,19 +244,54 @@ class XlsxHandler:
 
         Args:
             transactions: List of transaction dictionaries
+            stage_callback: Optional callback function(stage) called with
+                "dedupe", "write" and "save" as each stage starts
 
         Returns:
             Number of transactions actually added (excluding duplicates)
         """
+        return len(self.append_new_transactions(transactions, stage_callback))
+
+    def append_new_transactions(
+        self,
+        transactions: list[dict],
+        stage_callback: Callable[[str], None] | None = None,
+        existing_hashes: set[str] | None = None,
+        source: dict | None = None
+    ) -> list[dict]:
+        """
+        Append transactions to the Excel file and return the rows written.
+
+        Same as append_transactions(), but returns the transactions that were
+        not already in the file so callers can attribute them.
+
+        Args:
+            transactions: List of transaction dictionaries
+            stage_callback: Optional callback function(stage) called with
+                "dedupe", "write" and "save" as each stage starts
+            existing_hashes: Hashes already in the file, if the caller has
+                read them; skips scanning the file again
+            source: Optional "source_address" and "chain_id" to record in
+                the file's metadata
+
+        Returns:
+            List of transactions actually added (excluding duplicates)
+        """
         if not transactions:
-            return 0
+            return []
 
         # Create file if it doesn't exist
         if not self.file_exists():
             self.create_new_file()
 
+        # Read before the workbook is rewritten; None means rebuild it below
+        metadata = self.read_metadata()
+
         # Get existing hashes to avoid duplicates
-        existing_hashes = self.get_existing_hashes()
+        if stage_callback:
+            stage_callback("dedupe")
+        if existing_hashes is None:
+            existing_hashes = self.get_existing_hashes()
 
         # Filter out duplicates
         new_transactions = [
@@ -169,15 +300,24 @@ class XlsxHandler:
         ]
 
         if not new_transactions:
-            return 0
+            return []
 
         # Load workbook (not read-only so we can write)
+        if stage_callback:
+            stage_callback("write")
         wb = load_workbook(self.file_path)
         ws = wb.active
 
         # Find the next empty row
         next_row = ws.max_row + 1
 
+        if metadata is None:
+            # Older or hand-edited file: rebuild from the loaded sheet
+            metadata = {
+                "last_block": _column_max(ws, 2),
+                "last_timestamp": _column_max(ws, 3)
+            }
+
         # Append each transaction - values only, no formatting applied
         for tx in new_transactions:
             for col, header in enumerate(self.HEADERS, start=1):
@@ -186,8 +326,30 @@ class XlsxHandler:
                 ws.cell(row=next_row, column=col, value=value)
             next_row += 1
 
-        wb.save(self.file_path)
-        return len(new_transactions)
+        metadata.update(source or {})
+        metadata["row_count"] = next_row - 2
+        for field, column in (("last_block", "Blockno"), ("last_timestamp", "UnixTimestamp")):
+            values = [_to_int(tx.get(column)) for tx in new_transactions]
+            values = [value for value in values + [metadata.get(field)] if value is not None]
+            metadata[field] = max(values) if values else None
+        self._set_metadata(wb, metadata)
+
+        if stage_callback:
+            stage_callback("save")
+        self._save_workbook(wb)
+        return new_transactions
+
+    @staticmethod
+    def _set_metadata(wb: Workbook, metadata: dict) -> None:
+        """Store export metadata in the workbook's custom document properties."""
+        names = {METADATA_PREFIX + field for field in METADATA_FIELDS}
+        props = wb.custom_doc_props
+        props.props = [prop for prop in props.props if prop.name not in names]
+        for field in METADATA_FIELDS:
+            value = metadata.get(field)
+            if value is not None:
+                # Stored as text: Excel's integer property type is 32-bit
+                props.append(StringProperty(name=METADATA_PREFIX + field, value=str(value)))
 
     def get_row_count(self) -> int:
         """
@@ -198,3 +360,63 @@ class XlsxHandler:
         """
         last_row = self.get_last_row()
         return max(0, last_row - 1)  # Subtract header row
+
+
+def _to_int(value) -> int | None:
+    """Convert a cell value to int, or None if it isn't a number."""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _column_max(ws, column: int) -> int | None:
+    """Largest numeric value in a column of a loaded worksheet (None if empty)."""
+    values = [
+        _to_int(row[0])
+        for row in ws.iter_rows(min_row=2, min_col=column, max_col=column, values_only=True)
+    ]
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def _read_custom_properties(archive: zipfile.ZipFile) -> dict:
+    """Read the exporter's custom document properties from an xlsx zip."""
+    try:
+        root = ElementTree.fromstring(archive.read("docProps/custom.xml"))
+    except KeyError:
+        return {}
+
+    metadata = {}
+    for prop in root.findall("props:property", _NS):
+        name = prop.get("name", "")
+        if not name.startswith(METADATA_PREFIX) or len(prop) == 0:
+            continue
+        field = name[len(METADATA_PREFIX):]
+        value = prop[0].text or ""
+        metadata[field] = int(value) if field in _INT_FIELDS else value
+    return metadata
+
+
+def _read_dimension_rows(archive: zipfile.ZipFile) -> int | None:
+    """
+    Read the last row of the first worksheet from its dimension record.
+
+    Only the start of the sheet XML is decompressed; the dimension record
+    precedes the sheet data.
+    """
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    sheet = workbook.find("main:sheets/main:sheet", _NS)
+    rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    target = None
+    for rel in rels.findall("rel:Relationship", _NS):
+        if rel.get("Id") == sheet.get(_R_ID):
+            target = rel.get("Target")
+    if target is None:
+        return None
+    part = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+
+    with archive.open(part) as f:
+        head = f.read(4096)
+    match = _DIMENSION_RE.search(head)
+    return int(match.group(1)) if match else None
@@ -14,18 +14,43 @@ from ttkbootstrap.dialogs import Messagebox
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from api.block_index import BlockIndex
 from api.etherscan import EtherscanClient, EtherscanAPIError
-from export.xlsx_handler import XlsxHandler
+from api.rpc import RpcClient
+from api.token_registry import TokenRegistry
+from api.key_pool import format_key_stats
+from export.checkpoint import Checkpoint
+from export.cursors import CursorStore
+from export.pipeline import format_stage_stats
+from export.runner import ExportRunner
+from export.sharding import SHARD_MODES
+from gui.wallet_list import WalletListModel, WalletListView
 from utils.helpers import (
     validate_eth_address,
-    get_date_range_blocks
+    get_date_range_blocks,
+    parse_batch_addresses,
+    parse_wallet_import,
+    plan_wallet_import,
+    parse_api_keys,
+    format_api_keys
 )
 from utils.config import Config
+from utils.profiling import RunProfiler
+from utils.progress import ProgressTracker, ProgressQueue, format_cost, format_duration
 
 
 class WalletExporterApp:
     """Main application window for the ERC-20 Transaction Exporter."""
 
+    PROGRESS_POLL_MS = 100  # How often the UI drains the progress queue
+
+    # Token filter modes: label -> wallet key holding the contract list
+    TOKEN_FILTERS = {
+        "All tokens": None,
+        "Only these": "token_allowlist",
+        "Exclude these": "token_denylist",
+    }
+
     def __init__(self):
         """Initialize the application."""
         self.root = ttk.Window(
@@ -41,15 +66,22 @@ class WalletExporterApp:
 
         # Variables
         self.api_key_var = ttk.StringVar()
+        self.rpc_url_var = ttk.StringVar()
         self.is_exporting = False
+        self.progress_queue = ProgressQueue()
+        self.runner = None
 
-        # Batch wallet list: [(address, file_path, selected_var), ...]
-        self.batch_wallets = []
+        # Checkpoint of the last run, used by "Resume Last Run"
+        self.checkpoint = Checkpoint(self.config.config_dir / "checkpoint")
 
-        # Load saved API key
-        saved_key = self.config.get_api_key()
-        if saved_key:
-            self.api_key_var.set(saved_key)
+        # Batch wallet list ({"address", "file_path"} dicts with selection state)
+        self.wallet_model = WalletListModel()
+
+        # Load saved API keys
+        saved_keys = self.config.get_api_keys()
+        if saved_keys:
+            self.api_key_var.set(format_api_keys(saved_keys))
+        self.rpc_url_var.set(self.config.get_rpc_url())
 
         self._create_widgets()
         self._load_saved_wallets()
@@ -77,7 +109,7 @@ class WalletExporterApp:
 
     def _create_api_section(self, parent):
         """Create the API key input section."""
-        frame = ttk.LabelFrame(parent, text="Etherscan API Key")
+        frame = ttk.LabelFrame(parent, text="Etherscan API Keys (comma-separated, KEY:2 for a double-rate key)")
         frame.pack(fill=X, pady=(0, 10))
 
         inner = ttk.Frame(frame, padding=10)
@@ -106,12 +138,26 @@ class WalletExporterApp:
             width=8
         ).pack(side=LEFT)
 
+        rpc_row = ttk.Frame(frame, padding=(10, 0, 10, 10))
+        rpc_row.pack(fill=X)
+
+        ttk.Label(rpc_row, text="RPC URL (optional, used instead of Etherscan):").pack(side=LEFT, padx=(0, 5))
+        ttk.Entry(
+            rpc_row,
+            textvariable=self.rpc_url_var,
+            width=40
+        ).pack(side=LEFT, fill=X, expand=YES)
+
     def _save_api_key(self):
-        """Save the API key to config."""
-        api_key = self.api_key_var.get().strip()
-        if api_key:
-            self.config.save_api_key(api_key)
-            Messagebox.show_info("API key saved!", "Saved")
+        """Save the API keys and RPC URL to config."""
+        keys = parse_api_keys(self.api_key_var.get())
+        rpc_url = self.rpc_url_var.get().strip()
+        self.config.save_rpc_url(rpc_url)
+        if keys:
+            self.config.save_api_keys(keys)
+            Messagebox.show_info(f"{len(keys)} API key(s) saved!", "Saved")
+        elif rpc_url:
+            Messagebox.show_info("RPC URL saved!", "Saved")
         else:
             Messagebox.show_warning("Please enter an API key first.", "No Key")
 
@@ -163,14 +209,59 @@ class WalletExporterApp:
             width=8
         ).pack(side=LEFT)
 
-        # Add button
+        # Sharding for high-volume exports
+        shard_frame = ttk.Frame(inner)
+        shard_frame.pack(fill=X, pady=(0, 5))
+
+        ttk.Label(shard_frame, text="Split:", width=8).pack(side=LEFT)
+        self.batch_shard_var = ttk.StringVar(value="None")
+        ttk.Combobox(
+            shard_frame,
+            textvariable=self.batch_shard_var,
+            values=list(SHARD_MODES),
+            state="readonly",
+            width=18
+        ).pack(side=LEFT)
+
+        # Token allowlist/denylist
+        token_frame = ttk.Frame(inner)
+        token_frame.pack(fill=X, pady=(0, 5))
+
+        ttk.Label(token_frame, text="Tokens:", width=8).pack(side=LEFT)
+        self.batch_token_mode_var = ttk.StringVar(value="All tokens")
+        ttk.Combobox(
+            token_frame,
+            textvariable=self.batch_token_mode_var,
+            values=list(self.TOKEN_FILTERS),
+            state="readonly",
+            width=14
+        ).pack(side=LEFT, padx=(0, 10))
+
+        self.batch_tokens_var = ttk.StringVar()
+        ttk.Entry(
+            token_frame,
+            textvariable=self.batch_tokens_var
+        ).pack(side=LEFT, fill=X, expand=YES)
+
+        # Add / import buttons
+        add_frame = ttk.Frame(inner)
+        add_frame.pack(pady=(5, 0))
+
         ttk.Button(
-            inner,
+            add_frame,
             text="Add to List",
             command=self._add_batch_wallet,
             bootstyle="success",
             width=15
-        ).pack(pady=(5, 0))
+        ).pack(side=LEFT, padx=(0, 5))
+
+        ttk.Button(
+            add_frame,
+            text="Bulk Import...",
+            command=self._open_import_dialog,
+            bootstyle="success-outline",
+            width=15
+        ).pack(side=LEFT)
 
     def _create_wallet_list_section(self, parent):
         """Create the wallet list section with checkboxes."""
@@ -197,6 +288,14 @@ class WalletExporterApp:
             width=12
         ).pack(side=LEFT, padx=(0, 5))
 
+        ttk.Button(
+            btn_frame,
+            text="Pin / Unpin",
+            command=self._toggle_pin_selected_wallets,
+            bootstyle="warning-outline",
+            width=12
+        ).pack(side=LEFT, padx=(0, 5))
+
         ttk.Button(
             btn_frame,
             text="Remove Selected",
@@ -205,52 +304,38 @@ class WalletExporterApp:
             width=15
         ).pack(side=RIGHT)
 
-        # Scrollable frame for wallet list
-        list_container = ttk.Frame(frame, padding=10)
-        list_container.pack(fill=BOTH, expand=YES)
-
-        # Canvas and scrollbar for scrolling
-        self.canvas = ttk.Canvas(list_container, height=150)
-        scrollbar = ttk.Scrollbar(list_container, orient=VERTICAL, command=self.canvas.yview)
-
-        self.wallet_list_frame = ttk.Frame(self.canvas)
-
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-
-        scrollbar.pack(side=RIGHT, fill=Y)
-        self.canvas.pack(side=LEFT, fill=BOTH, expand=YES)
-
-        self.canvas_window = self.canvas.create_window((0, 0), window=self.wallet_list_frame, anchor=NW)
+        # Filter row
+        filter_frame = ttk.Frame(frame, padding=(10, 10, 10, 0))
+        filter_frame.pack(fill=X)
 
-        self.wallet_list_frame.bind("<Configure>", self._on_frame_configure)
-        self.canvas.bind("<Configure>", self._on_canvas_configure)
+        ttk.Label(filter_frame, text="Filter:", width=8).pack(side=LEFT)
+        self.wallet_filter_var = ttk.StringVar()
+        self.wallet_filter_var.trace_add("write", lambda *args: self._apply_wallet_filter())
+        ttk.Entry(
+            filter_frame,
+            textvariable=self.wallet_filter_var
+        ).pack(side=LEFT, fill=X, expand=YES)
 
-    def _on_frame_configure(self, event):
-        """Reset the scroll region to encompass the inner frame."""
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        # Virtualized list (only visible rows are rendered)
+        self.wallet_list_view = WalletListView(frame, self.wallet_model, padding=10)
+        self.wallet_list_view.pack(fill=BOTH, expand=YES)
 
-    def _on_canvas_configure(self, event):
-        """Resize the inner frame to match canvas width."""
-        self.canvas.itemconfig(self.canvas_window, width=event.width)
+    def _apply_wallet_filter(self):
+        """Filter the wallet list by the filter text."""
+        self.wallet_model.set_filter(self.wallet_filter_var.get())
+        self.wallet_list_view.refresh()
 
     def _load_saved_wallets(self):
         """Load saved wallet list from config."""
         saved_wallets = self.config.get_wallet_list()
         for wallet in saved_wallets:
-            address = wallet.get("address", "")
-            file_path = wallet.get("file_path", "")
-            if address and file_path:
-                selected_var = ttk.BooleanVar(value=True)
-                self.batch_wallets.append((address, file_path, selected_var))
-                self._add_wallet_row(address, file_path, selected_var)
+            if wallet.get("address") and wallet.get("file_path"):
+                self.wallet_model.add(wallet)
+        self.wallet_list_view.refresh()
 
     def _save_wallet_list(self):
         """Save current wallet list to config."""
-        wallets = [
-            {"address": addr, "file_path": path}
-            for addr, path, _ in self.batch_wallets
-        ]
-        self.config.save_wallet_list(wallets)
+        self.config.save_wallet_list(self.wallet_model.entries())
 
     def _select_batch_wallet_file(self):
         """Select existing file for batch wallet."""
@@ -295,14 +380,25 @@ class WalletExporterApp:
             )
             return
 
-        # Create checkbox variable
-        selected_var = ttk.BooleanVar(value=True)
-
-        # Add to list
-        self.batch_wallets.append((address, file_path, selected_var))
-
-        # Create row in UI
-        self._add_wallet_row(address, file_path, selected_var)
+        wallet = {"address": address, "file_path": file_path}
+        shard_mode = SHARD_MODES.get(self.batch_shard_var.get())
+        if shard_mode:
+            wallet["shard_mode"] = shard_mode
+
+        token_key = self.TOKEN_FILTERS.get(self.batch_token_mode_var.get())
+        if token_key:
+            contracts = parse_batch_addresses(self.batch_tokens_var.get())
+            if not contracts:
+                Messagebox.show_warning(
+                    "Please enter one or more token contract addresses (0x...).",
+                    "Missing Tokens"
+                )
+                return
+            wallet[token_key] = list(dict.fromkeys(contract.lower() for contract in contracts))
+
+        # Add to list and render
+        self.wallet_model.add(wallet)
+        self.wallet_list_view.refresh()
 
         # Save to config
         self._save_wallet_list()
@@ -310,57 +406,149 @@ class WalletExporterApp:
         # Clear inputs
         self.batch_addr_var.set("")
         self.batch_file_var.set("")
+        self.batch_tokens_var.set("")
 
-    def _add_wallet_row(self, address: str, file_path: str, selected_var):
-        """Add a wallet row to the list UI."""
-        row_frame = ttk.Frame(self.wallet_list_frame)
-        row_frame.pack(fill=X, pady=2)
+    def _open_import_dialog(self):
+        """Open the bulk import dialog for pasted text or CSV files."""
+        dialog = ttk.Toplevel(title="Bulk Import Wallets")
+        dialog.transient(self.root)
 
-        ttk.Checkbutton(
-            row_frame,
-            variable=selected_var,
-            bootstyle="success-round-toggle"
-        ).pack(side=LEFT, padx=(0, 10))
+        frame = ttk.Frame(dialog, padding=15)
+        frame.pack(fill=BOTH, expand=YES)
 
         ttk.Label(
-            row_frame,
-            text=f"{address[:20]}...",
-            width=25
+            frame,
+            text="Paste addresses (one per line, or comma/space separated)\n"
+                 "or \"address,file.xlsx\" lines, or load a CSV file:"
+        ).pack(fill=X, pady=(0, 5))
+
+        text = ttk.Text(frame, width=70, height=12)
+        text.pack(fill=BOTH, expand=YES, pady=(0, 10))
+
+        def load_csv():
+            file_path = filedialog.askopenfilename(
+                parent=dialog,
+                title="Select CSV File",
+                filetypes=[("CSV files", "*.csv"), ("Text files", "*.txt"), ("All files", "*.*")],
+                initialdir=self.config.get_last_directory()
+            )
+            if file_path:
+                with open(file_path, 'r', newline='') as f:
+                    text.delete("1.0", END)
+                    text.insert("1.0", f.read())
+
+        ttk.Button(
+            frame,
+            text="Load CSV...",
+            command=load_csv,
+            bootstyle="info-outline",
+            width=12
+        ).pack(anchor=W, pady=(0, 10))
+
+        # Directory for generated/relative file names
+        dir_frame = ttk.Frame(frame)
+        dir_frame.pack(fill=X, pady=(0, 5))
+
+        ttk.Label(dir_frame, text="Folder:", width=10).pack(side=LEFT)
+        dir_var = ttk.StringVar(value=self.config.get_last_directory())
+        ttk.Entry(dir_frame, textvariable=dir_var).pack(side=LEFT, fill=X, expand=YES, padx=(0, 10))
+
+        def select_dir():
+            directory = filedialog.askdirectory(parent=dialog, initialdir=dir_var.get())
+            if directory:
+                dir_var.set(directory)
+
+        ttk.Button(
+            dir_frame,
+            text="Select",
+            command=select_dir,
+            bootstyle="info-outline",
+            width=8
         ).pack(side=LEFT)
 
-        ttk.Label(
-            row_frame,
-            text=Path(file_path).name,
-            width=30
-        ).pack(side=LEFT, padx=(10, 0))
+        # Naming template for addresses without a file
+        template_frame = ttk.Frame(frame)
+        template_frame.pack(fill=X, pady=(0, 10))
 
-    def _refresh_wallet_list(self):
-        """Refresh the wallet list UI."""
-        # Clear existing widgets
-        for widget in self.wallet_list_frame.winfo_children():
-            widget.destroy()
+        ttk.Label(template_frame, text="File name:", width=10).pack(side=LEFT)
+        template_var = ttk.StringVar(value="{address}.xlsx")
+        ttk.Entry(template_frame, textvariable=template_var).pack(side=LEFT, fill=X, expand=YES)
+        ttk.Label(
+            frame,
+            text="Template fields: {address}, {short}, {index}. "
+                 "Use a fixed name (e.g. all.xlsx) to share one file.",
+            bootstyle="secondary"
+        ).pack(fill=X, pady=(0, 10))
+
+        def do_import():
+            try:
+                self._import_wallets(
+                    text.get("1.0", END),
+                    dir_var.get().strip(),
+                    template_var.get().strip() or "{address}.xlsx"
+                )
+            except (KeyError, ValueError, IndexError) as e:
+                Messagebox.show_warning(f"Invalid file name template: {e}", "Invalid Template", parent=dialog)
+                return
+            dialog.destroy()
 
-        # Recreate rows
-        for address, file_path, selected_var in self.batch_wallets:
-            self._add_wallet_row(address, file_path, selected_var)
+        ttk.Button(
+            frame,
+            text="Import",
+            command=do_import,
+            bootstyle="success",
+            width=15
+        ).pack()
+
+    def _import_wallets(self, text: str, directory: str, template: str):
+        """
+        Validate, de-duplicate and add imported wallets, saving the list once.
+
+        Args:
+            text: Pasted text or CSV content
+            directory: Folder for generated and relative file names
+            template: File name template for addresses without a file
+        """
+        entries, invalid = parse_wallet_import(text)
+        existing = [wallet["address"] for wallet in self.wallet_model.entries()]
+        wallets, duplicates = plan_wallet_import(entries, existing, directory, template)
+
+        for wallet in wallets:
+            self.wallet_model.add(wallet)
+
+        if wallets:
+            self.wallet_list_view.refresh()
+            self._save_wallet_list()
+            if directory:
+                self.config.save_last_directory(directory)
+
+        Messagebox.show_info(
+            f"Imported {len(wallets)} wallets\n"
+            f"Skipped {duplicates} duplicates\n"
+            f"Skipped {invalid} invalid entries",
+            "Import Complete"
+        )
 
     def _select_all_wallets(self):
         """Select all wallets."""
-        for _, _, selected_var in self.batch_wallets:
-            selected_var.set(True)
+        self.wallet_model.select_all(True)
+        self.wallet_list_view.refresh()
 
     def _deselect_all_wallets(self):
         """Deselect all wallets."""
-        for _, _, selected_var in self.batch_wallets:
-            selected_var.set(False)
+        self.wallet_model.select_all(False)
+        self.wallet_list_view.refresh()
+
+    def _toggle_pin_selected_wallets(self):
+        """Pin checked wallets so they are exported first (or unpin them)."""
+        self.wallet_model.toggle_pin_selected()
+        self.wallet_list_view.refresh()
+        self._save_wallet_list()
 
     def _remove_selected_wallets(self):
         """Remove wallets that are checked."""
-        self.batch_wallets = [
-            (addr, path, var) for addr, path, var in self.batch_wallets
-            if not var.get()
-        ]
-        self._refresh_wallet_list()
+        self.wallet_model.remove_selected()
+        self.wallet_list_view.refresh()
         self._save_wallet_list()
 
     def _create_date_section(self, parent):
@@ -417,28 +605,94 @@ class WalletExporterApp:
             mode="determinate",
             bootstyle="success-striped"
         )
-        self.progress_bar.pack(fill=X, pady=(0, 10))
+        self.progress_bar.pack(fill=X, pady=(0, 5))
+
+        # Status line (wallet, page, throughput, ETA)
+        self.status_var = ttk.StringVar(value="")
+        ttk.Label(
+            parent,
+            textvariable=self.status_var,
+            bootstyle="secondary"
+        ).pack(fill=X, pady=(0, 10))
+
+        # Options
+        self.summary_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            parent,
+            text="Update flow summary (<file>_summary.xlsx)",
+            variable=self.summary_var,
+            bootstyle="round-toggle"
+        ).pack(pady=(0, 5))
+
+        self.profile_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            parent,
+            text="Profile this run (saves timing data for troubleshooting)",
+            variable=self.profile_var,
+            bootstyle="round-toggle"
+        ).pack(pady=(0, 10))
+
+        btn_frame = ttk.Frame(parent)
+        btn_frame.pack()
 
         # Export Button
         self.export_btn = ttk.Button(
-            parent,
+            btn_frame,
             text="Export Selected Wallets",
             command=self._start_export,
             bootstyle="success",
             width=25
         )
-        self.export_btn.pack()
+        self.export_btn.pack(side=LEFT, padx=(0, 5))
+
+        self.resume_btn = ttk.Button(
+            btn_frame,
+            text="Resume Last Run",
+            command=self._resume_export,
+            bootstyle="primary-outline",
+            width=18
+        )
+        self.resume_btn.pack(side=LEFT, padx=(0, 5))
+
+        self.cancel_btn = ttk.Button(
+            btn_frame,
+            text="Cancel",
+            command=self._cancel_export,
+            bootstyle="danger-outline",
+            width=10,
+            state="disabled"
+        )
+        self.cancel_btn.pack(side=LEFT)
+
+        self._update_resume_button()
 
     def _test_api_connection(self):
-        """Test the API key connection."""
-        api_key = self.api_key_var.get().strip()
-        if not api_key:
+        """Test the RPC endpoint if set, otherwise each API key's connection."""
+        rpc_url = self.rpc_url_var.get().strip()
+        if rpc_url:
+            try:
+                connected = RpcClient(rpc_url).test_connection()
+            except EtherscanAPIError:
+                connected = False  # The chain id could not be asked for
+            if connected:
+                Messagebox.show_info("RPC connection successful!", "Success")
+            else:
+                Messagebox.show_error("RPC endpoint did not answer.", "Error")
+            return
+
+        keys = parse_api_keys(self.api_key_var.get())
+        if not keys:
             Messagebox.show_warning("Please enter an API key.", "Missing API Key")
             return
 
-        client = EtherscanClient(api_key)
-        if client.test_connection():
+        working = sum(1 for entry in keys if EtherscanClient(entry["key"]).test_connection())
+        if working == len(keys):
             Messagebox.show_info("API connection successful!", "Success")
+        elif working:
+            Messagebox.show_warning(
+                f"{working} of {len(keys)} API keys work; the others will be skipped.",
+                "Some Keys Failed"
+            )
         else:
             Messagebox.show_error("Invalid API key or connection failed.", "Error")
 
@@ -469,16 +723,12 @@ class WalletExporterApp:
             return
 
         # Validate inputs
-        api_key = self.api_key_var.get().strip()
-        if not api_key:
-            Messagebox.show_warning("Please enter your Etherscan API key.", "Missing API Key")
+        if not self._has_data_source():
+            Messagebox.show_warning("Please enter your Etherscan API key or an RPC URL.", "Missing API Key")
             return
 
         # Get selected wallets
-        selected_wallets = [
-            (addr, path) for addr, path, var in self.batch_wallets
-            if var.get()
-        ]
+        selected_wallets = self.wallet_model.selected_entries()
 
         if not selected_wallets:
             Messagebox.show_warning(
@@ -487,49 +737,127 @@ class WalletExporterApp:
             )
             return
 
+        start_ts, end_ts = self._get_date_range()
+        self._begin_export(
+            len(selected_wallets),
+            lambda runner: runner.run(selected_wallets, start_timestamp=start_ts, end_timestamp=end_ts)
+        )
+
+    def _resume_export(self):
+        """Resume the last interrupted export from its checkpoint."""
+        if self.is_exporting:
+            return
+
+        if not self._has_data_source():
+            Messagebox.show_warning("Please enter your Etherscan API key or an RPC URL.", "Missing API Key")
+            return
+
+        if not self.checkpoint.load() or not self.checkpoint.is_resumable():
+            Messagebox.show_info("There is no interrupted export to resume.", "Nothing to Resume")
+            self._update_resume_button()
+            return
+
+        self._begin_export(len(self.checkpoint.wallets), lambda runner: runner.resume())
+
+    def _cancel_export(self):
+        """Stop the running export at the next page boundary."""
+        if self.runner:
+            self.runner.cancel()
+            self.cancel_btn.configure(state="disabled")
+            self.status_var.set("Cancelling after the current page...")
+
+    def _has_data_source(self) -> bool:
+        """Check that an API key or an RPC URL is entered."""
+        return bool(self.api_key_var.get().strip() or self.rpc_url_var.get().strip())
+
+    def _create_client(self) -> EtherscanClient | RpcClient:
+        """Create the client for the configured data source."""
+        rpc_url = self.rpc_url_var.get().strip()
+        registry = TokenRegistry(self.config.config_dir / "tokens.json")
+        if rpc_url:
+            return RpcClient(rpc_url, token_registry=registry)
+        return EtherscanClient(parse_api_keys(self.api_key_var.get()), registry)
+
+    def _begin_export(self, wallet_count: int, start):
+        """
+        Prepare the UI and run an export in a worker thread.
+
+        Args:
+            wallet_count: Number of wallets in the run
+            start: Callable taking the ExportRunner and returning its results
+        """
+        try:
+            client = self._create_client()
+        except EtherscanAPIError as e:
+            Messagebox.show_error(f"Could not reach the data source: {e}", "Connection Error")
+            return
+        tracker = ProgressTracker(wallet_count, sink=self.progress_queue.put)
+        self.runner = ExportRunner(
+            client,
+            tracker,
+            checkpoint=self.checkpoint,
+            write_summaries=self.summary_var.get(),
+            write_workers=ExportRunner.default_write_workers(),
+            profiler=RunProfiler(self.config.config_dir / "profiles") if self.profile_var.get() else None,
+            cursors=CursorStore(self.config.config_dir / "cursors.json"),
+            block_index=BlockIndex(self.config.config_dir / f"block_index_{client.CHAIN_ID}.json", client)
+        )
+
         self.is_exporting = True
         self.export_btn.configure(state="disabled")
-        self.progress_bar["maximum"] = len(selected_wallets)
+        self.resume_btn.configure(state="disabled")
+        self.cancel_btn.configure(state="normal")
+        self.progress_bar["maximum"] = wallet_count
         self.progress_bar["value"] = 0
+        self.status_var.set("Starting export...")
+        self.root.after(self.PROGRESS_POLL_MS, self._poll_progress)
 
         # Run export in separate thread
         thread = threading.Thread(
             target=self._run_export,
-            args=(selected_wallets,),
+            args=(self.runner, start),
             daemon=True
         )
         thread.start()
 
-    def _run_export(self, wallets: list):
+    def _run_export(self, runner: ExportRunner, start):
         """Execute the export (runs in thread)."""
+        profile_dir = None
         try:
-            api_key = self.api_key_var.get().strip()
-            start_ts, end_ts = self._get_date_range()
-
-            client = EtherscanClient(api_key)
-            total_added = 0
-            results = []
-
-            for i, (address, file_path) in enumerate(wallets, 1):
-                self.root.after(0, lambda v=i: self.progress_bar.configure(value=v))
-
-                try:
-                    transactions = client.get_erc20_transactions(
-                        address,
-                        start_timestamp=start_ts,
-                        end_timestamp=end_ts
-                    )
-                    handler = XlsxHandler(file_path)
-                    added = handler.append_transactions(transactions)
-                    total_added += added
-                    results.append(f"{address[:10]}...: {added} tx")
-                except EtherscanAPIError as e:
-                    results.append(f"{address[:10]}...: Error")
-
-            result_text = "\n".join(results)
+            if runner.profiler:
+                runner.profiler.start()
+            try:
+                results = start(runner)
+            finally:
+                if runner.profiler:
+                    profile_dir = runner.profiler.stop()
+
+            total_added = sum(result["added"] for result in results)
+            result_text = "\n".join(
+                f"{result['address'][:10]}...: "
+                + ("Error" if result["error"] else f"{result['added']} tx")
+                + format_cost(result)
+                for result in results
+            )
+            if runner.cancelled:
+                title = "Export Cancelled"
+                summary = "Export cancelled. Use \"Resume Last Run\" to continue."
+            else:
+                title = "Export Complete"
+                summary = f"Processed {len(results)} wallets"
+            key_pool = getattr(runner.client, "key_pool", None)
+            key_stats = key_pool.stats() if key_pool else []
+            if len(key_stats) > 1:
+                result_text += "\n\nAPI keys:\n" + format_key_stats(key_stats)
+            if runner.coalesced:
+                result_text += f"\n\n{runner.coalesced} duplicate wallet entries reused another entry's requests"
+            if runner.stage_stats:
+                result_text += "\n\nPipeline:\n" + format_stage_stats(runner.stage_stats)
+            if profile_dir:
+                result_text += f"\n\nProfile saved to {profile_dir}"
             self.root.after(0, lambda: Messagebox.show_info(
-                f"Processed {len(wallets)} wallets\nTotal: {total_added} transactions\n\n{result_text}",
-                "Export Complete"
+                f"{summary}\nTotal: {total_added} transactions\n\n{result_text}",
+                title
             ))
 
         except Exception as e:
@@ -539,10 +867,45 @@ class WalletExporterApp:
             self.is_exporting = False
             self.root.after(0, self._reset_ui)
 
+    def _poll_progress(self):
+        """Render the newest progress snapshot (runs on the Tk loop)."""
+        snapshot = self.progress_queue.drain()
+        if snapshot:
+            self.progress_bar["value"] = snapshot["progress"]
+            self.status_var.set(
+                f"Wallet {snapshot['wallet_index']}/{snapshot['total_wallets']} "
+                f"({snapshot['address'][:10]}...) {snapshot['stage']} | "
+                f"page {snapshot['pages']}, {snapshot['rows']:,} rows | "
+                f"{snapshot['rows_per_sec']:.0f} rows/s, "
+                f"{snapshot['calls_per_sec']:.1f} calls/s | "
+                f"waited {snapshot['rate_limit_wait']:.1f}s | "
+                f"ETA {format_duration(snapshot['eta'])}"
+                + (
+                    f" | {Path(snapshot['write_file']).name}: {snapshot['write_stage']}"
+                    if snapshot["write_stage"] else ""
+                )
+                + "".join(
+                    f" | {stage} queue {depth}"
+                    for stage, depth in snapshot["queues"].items() if depth
+                )
+            )
+        if self.is_exporting:
+            self.root.after(self.PROGRESS_POLL_MS, self._poll_progress)
+
+    def _update_resume_button(self):
+        """Enable "Resume Last Run" only when an interrupted run exists."""
+        resumable = self.checkpoint.load() and self.checkpoint.is_resumable()
+        self.resume_btn.configure(state="normal" if resumable else "disabled")
+
     def _reset_ui(self):
         """Reset UI after export."""
+        self.runner = None
         self.export_btn.configure(state="normal")
+        self.cancel_btn.configure(state="disabled")
+        self._update_resume_button()
         self.progress_bar["value"] = 0
+        self.progress_queue.drain()
+        self.status_var.set("")
 
     def run(self):
         """Start the application."""
@@ -0,0 +1,308 @@
+"""
+Virtualized wallet list backed by a Treeview.
+"""
+
+from pathlib import Path
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+
+
+class WalletListModel:
+    """
+    In-memory wallet list with filtering, sorting and selection.
+
+    Entries are the wallet dictionaries saved in Config ("address",
+    "file_path" and any extra keys). Selection is stored as a default state
+    plus a set of exceptions, so selecting or deselecting every wallet is a
+    constant-time operation regardless of list size.
+    """
+
+    SORT_KEYS = {
+        "selected": lambda model, uid: not model.is_selected(uid),
+        "address": lambda model, uid: model.get(uid)["address"].lower(),
+        "file": lambda model, uid: Path(model.get(uid)["file_path"]).name.lower(),
+    }
+
+    def __init__(self):
+        """Initialize an empty model."""
+        self._entries = {}  # id -> wallet dict, in insertion order
+        self._next_id = 0
+        self._default_selected = True
+        self._exceptions = set()
+        self._filter_text = ""
+        self._sort_key = None
+        self._sort_reverse = False
+        self._view = None  # Cached list of visible ids
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, wallet: dict, selected: bool = True) -> int:
+        """
+        Add a wallet entry.
+
+        Args:
+            wallet: Wallet dictionary with at least "address" and "file_path"
+            selected: Initial selection state
+
+        Returns:
+            Id of the new entry
+        """
+        uid = self._next_id
+        self._next_id += 1
+        self._entries[uid] = wallet
+        if selected != self._default_selected:
+            self._exceptions.add(uid)
+        self._view = None
+        return uid
+
+    def get(self, uid: int) -> dict:
+        """Get the wallet dictionary for an id."""
+        return self._entries[uid]
+
+    def entries(self) -> list[dict]:
+        """All wallet dictionaries in insertion order."""
+        return list(self._entries.values())
+
+    def is_selected(self, uid: int) -> bool:
+        """Check whether an entry is selected."""
+        return self._default_selected != (uid in self._exceptions)
+
+    def set_selected(self, uid: int, selected: bool):
+        """Select or deselect a single entry."""
+        if selected == self._default_selected:
+            self._exceptions.discard(uid)
+        else:
+            self._exceptions.add(uid)
+        if self._sort_key == "selected":
+            self._view = None
+
+    def toggle(self, uid: int):
+        """Flip the selection of a single entry."""
+        self.set_selected(uid, not self.is_selected(uid))
+
+    def select_all(self, selected: bool = True):
+        """Select or deselect every entry in constant time."""
+        self._default_selected = selected
+        self._exceptions = set()
+        if self._sort_key == "selected":
+            self._view = None
+
+    def selected_entries(self) -> list[dict]:
+        """Wallet dictionaries of all selected entries, in insertion order."""
+        return [wallet for uid, wallet in self._entries.items() if self.is_selected(uid)]
+
+    def remove_selected(self) -> int:
+        """
+        Remove all selected entries.
+
+        Returns:
+            Number of entries removed
+        """
+        before = len(self._entries)
+        self._entries = {
+            uid: wallet for uid, wallet in self._entries.items()
+            if not self.is_selected(uid)
+        }
+        # Every remaining entry is deselected
+        self._default_selected = False
+        self._exceptions = set()
+        self._view = None
+        return before - len(self._entries)
+
+    def toggle_pin_selected(self) -> bool:
+        """
+        Pin all selected entries, or unpin them if they are all pinned.
+
+        Pinned wallets ("priority" 1) are exported before the others.
+
+        Returns:
+            True if the entries were pinned, False if unpinned
+        """
+        selected = [uid for uid in self._entries if self.is_selected(uid)]
+        pin = not all(self._entries[uid].get("priority") for uid in selected)
+        for uid in selected:
+            if pin:
+                self._entries[uid]["priority"] = 1
+            else:
+                self._entries[uid].pop("priority", None)
+        return pin
+
+    def set_filter(self, text: str):
+        """Show only entries whose address or file name contains the text."""
+        self._filter_text = text.strip().lower()
+        self._view = None
+
+    def set_sort(self, key: str | None):
+        """
+        Sort the view by a column, toggling direction when sorted by it already.
+
+        Args:
+            key: One of SORT_KEYS, or None for insertion order
+        """
+        if key == self._sort_key:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_key = key
+            self._sort_reverse = False
+        self._view = None
+
+    def view(self) -> list[int]:
+        """Ids of the entries that pass the filter, in display order."""
+        if self._view is None:
+            ids = list(self._entries)
+            if self._filter_text:
+                ids = [
+                    uid for uid in ids
+                    if self._filter_text in self._entries[uid]["address"].lower()
+                    or self._filter_text in Path(self._entries[uid]["file_path"]).name.lower()
+                ]
+            if self._sort_key:
+                key = self.SORT_KEYS[self._sort_key]
+                ids.sort(key=lambda uid: key(self, uid), reverse=self._sort_reverse)
+            self._view = ids
+        return self._view
+
+
+class WalletListView(ttk.Frame):
+    """
+    Treeview that renders only the rows currently visible.
+
+    The Treeview holds at most one item per visible line. Scrolling moves a
+    window over the model's view and rewrites those items, so opening,
+    filtering or selecting thousands of wallets costs the same UI work as a
+    handful.
+    """
+
+    COLUMNS = ("selected", "address", "file")
+    HEADINGS = {"selected": "✓", "address": "Wallet", "file": "File"}
+    CHECKED = "☑"
+    UNCHECKED = "☐"
+    PINNED = "📌 "
+
+    def __init__(self, parent, model: WalletListModel, **kwargs):
+        """
+        Initialize the view.
+
+        Args:
+            parent: Parent widget
+            model: Wallet list model to render
+        """
+        super().__init__(parent, **kwargs)
+        self.model = model
+        self._offset = 0
+        self._visible_rows = 1
+        self._window = []  # Model ids currently rendered, by row
+
+        self.tree = ttk.Treeview(
+            self,
+            columns=self.COLUMNS,
+            show="headings",
+            selectmode="none",
+            height=7
+        )
+        for column in self.COLUMNS:
+            self.tree.heading(
+                column,
+                text=self.HEADINGS[column],
+                command=lambda key=column: self._sort_by(key)
+            )
+        self.tree.column("selected", width=40, stretch=False, anchor=CENTER)
+        self.tree.column("address", width=330)
+        self.tree.column("file", width=220)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=YES)
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<Button-1>", self._on_click)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self._scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self._scroll(3))
+
+    def refresh(self):
+        """Re-render the visible window from the model."""
+        view = self.model.view()
+        max_offset = max(0, len(view) - self._visible_rows)
+        self._offset = min(self._offset, max_offset)
+        window = view[self._offset:self._offset + self._visible_rows]
+        self._window = window
+
+        items = self.tree.get_children()
+        # Grow or shrink the pool of row items to the window size
+        for i in range(len(items), len(window)):
+            self.tree.insert("", END, iid=f"row{i}")
+        for iid in items[len(window):]:
+            self.tree.delete(iid)
+
+        for i, uid in enumerate(window):
+            wallet = self.model.get(uid)
+            self.tree.item(
+                f"row{i}",
+                values=(
+                    self.CHECKED if self.model.is_selected(uid) else self.UNCHECKED,
+                    (self.PINNED if wallet.get("priority") else "") + wallet["address"],
+                    Path(wallet["file_path"]).name
+                )
+            )
+
+        if view:
+            first = self._offset / len(view)
+            last = (self._offset + len(window)) / len(view)
+            self.scrollbar.set(first, last)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _row_uid(self, iid: str) -> int | None:
+        """Model id rendered by a row item."""
+        row = int(iid[len("row"):])
+        return self._window[row] if row < len(self._window) else None
+
+    def _sort_by(self, key: str):
+        """Sort by a column heading."""
+        self.model.set_sort(key)
+        self.refresh()
+
+    def _on_click(self, event):
+        """Toggle selection when the check column of a row is clicked."""
+        if self.tree.identify_region(event.x, event.y) != "cell":
+            return
+        iid = self.tree.identify_row(event.y)
+        if not iid or self.tree.identify_column(event.x) != "#1":
+            return
+        uid = self._row_uid(iid)
+        if uid is not None:
+            self.model.toggle(uid)
+            self.refresh()
+
+    def _on_configure(self, event):
+        """Recompute how many rows fit when the widget is resized."""
+        style = ttk.Style()
+        row_height = int(style.lookup("Treeview", "rowheight") or 20)
+        # One line is taken by the headings
+        self._visible_rows = max(1, event.height // row_height - 1)
+        self.refresh()
+
+    def _on_mousewheel(self, event):
+        """Scroll with the mouse wheel (Windows/macOS)."""
+        self._scroll(-1 if event.delta > 0 else 1)
+        return "break"
+
+    def _on_scrollbar(self, action, *args):
+        """Handle scrollbar drags and clicks."""
+        total = len(self.model.view())
+        if action == "moveto":
+            self._offset = max(0, int(float(args[0]) * total))
+            self.refresh()
+        elif action == "scroll":
+            amount = int(args[0])
+            if args[1] == "pages":
+                amount *= self._visible_rows
+            self._scroll(amount)
+
+    def _scroll(self, rows: int):
+        """Move the visible window by a number of rows."""
+        self._offset = max(0, self._offset + rows)
+        self.refresh()
+        return "break"
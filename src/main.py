@@ -3,9 +3,13 @@ ERC-20 Wallet Transaction Exporter
 Main entry point for the application.
 
 Usage:
-    python main.py
+    python main.py                 Launch the GUI
+    python main.py --export        Export all saved wallets once, without the GUI
+    python main.py --watch         Keep saved wallets up to date until Ctrl+C
 """
 
+import argparse
+import multiprocessing
 import sys
 from pathlib import Path
 
@@ -13,11 +17,135 @@ from pathlib import Path
 src_dir = Path(__file__).parent
 sys.path.insert(0, str(src_dir))
 
-from gui.app import WalletExporterApp
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="ERC-20 Wallet Transaction Exporter")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--export",
+        action="store_true",
+        help="export all saved wallets once without opening the GUI"
+    )
+    mode.add_argument(
+        "--watch",
+        action="store_true",
+        help="poll saved wallets and append new transfers until interrupted"
+    )
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        help="also update per-token flow summaries next to each export file"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="DIR",
+        help="profile an --export run; writes pstats and collapsed stacks "
+             "to DIR (default: ~/.wallet_exporter/profiles)"
+    )
+    parser.add_argument(
+        "--rpc",
+        metavar="URL",
+        help="read transfers from this JSON-RPC node instead of Etherscan "
+             "(default: the RPC URL saved in the app, if any)"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=300,
+        help="base poll interval in seconds for --watch (default: 300)"
+    )
+    # parse_known_args: macOS app bundles may pass extra arguments (e.g. -psn_...)
+    return parser.parse_known_args(argv)[0]
+
+
+def run_headless(args: argparse.Namespace) -> int:
+    """Run an export or watch loop without the GUI."""
+    from api.block_index import BlockIndex
+    from api.etherscan import EtherscanClient, EtherscanAPIError
+    from api.key_pool import format_key_stats
+    from api.rpc import RpcClient
+    from api.token_registry import TokenRegistry
+    from export.cursors import CursorStore
+    from export.pipeline import format_stage_stats
+    from export.runner import ExportRunner
+    from export.watcher import WalletWatcher
+    from utils.config import Config
+    from utils.profiling import RunProfiler
+    from utils.progress import format_cost
+
+    config = Config()
+    api_keys = config.get_api_keys()
+    rpc_url = args.rpc or config.get_rpc_url()
+    registry = TokenRegistry(config.config_dir / "tokens.json")
+    if rpc_url:
+        try:
+            client = RpcClient(rpc_url, token_registry=registry)
+        except EtherscanAPIError as e:
+            print(f"Could not reach the RPC endpoint: {e}")
+            return 1
+    elif api_keys:
+        client = EtherscanClient(api_keys, registry)
+    else:
+        print("No API key saved. Open the app once and save your Etherscan API key, or pass --rpc URL.")
+        return 1
+
+    if args.watch:
+        watcher = WalletWatcher(client, config, interval=args.interval, write_summaries=args.summary)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            watcher.cursors.save()
+            print("Stopped.")
+        return 0
+
+    wallets = [
+        wallet for wallet in config.get_wallet_list()
+        if wallet.get("address") and wallet.get("file_path")
+    ]
+    profiler = None
+    if args.profile is not None:
+        profiler = RunProfiler(args.profile or config.config_dir / "profiles")
+
+    runner = ExportRunner(
+        client,
+        write_summaries=args.summary,
+        write_workers=ExportRunner.default_write_workers(),
+        profiler=profiler,
+        cursors=CursorStore(config.config_dir / "cursors.json"),
+        block_index=BlockIndex(config.config_dir / f"block_index_{client.CHAIN_ID}.json", client)
+    )
+    if profiler:
+        profiler.start()
+    try:
+        results = runner.run(wallets)
+    finally:
+        if profiler:
+            print(f"Profile saved to {profiler.stop()}")
+    for result in results:
+        status = f"Error: {result['error']}" if result["error"] else f"{result['added']} tx"
+        print(f"{result['address']} -> {result['file_path']}: {status}{format_cost(result)}")
+    if runner.coalesced:
+        print(f"{runner.coalesced} duplicate wallet entries reused another entry's requests")
+    if runner.stage_stats:
+        print(format_stage_stats(runner.stage_stats))
+    if not rpc_url and len(api_keys) > 1:
+        print(format_key_stats(client.key_pool.stats()))
+    return 1 if any(result["error"] for result in results) else 0
 
 
 def main():
     """Launch the application."""
+    # Workbook writes may run in worker processes; required for frozen builds
+    multiprocessing.freeze_support()
+    args = parse_args()
+    if args.export or args.watch:
+        sys.exit(run_headless(args))
+
+    from gui.app import WalletExporterApp
+
     app = WalletExporterApp()
     app.run()
 
@@ -41,8 +41,34 @@ class Config:
 
     def save_api_key(self, api_key: str):
         """Save API key."""
+        self.save_api_keys([{"key": api_key, "weight": 1}])
+
+    def get_api_keys(self) -> list[dict]:
+        """Get the saved API key pool as {"key", "weight"} dicts."""
+        config = self._load()
+        keys = config.get("api_keys")
+        if keys:
+            return keys
+        # Configs saved before key pools hold a single key
+        api_key = config.get("api_key", "")
+        return [{"key": api_key, "weight": 1}] if api_key else []
+
+    def save_api_keys(self, keys: list[dict]):
+        """Save the API key pool (the first key also becomes the single key)."""
+        config = self._load()
+        config["api_keys"] = keys
+        config["api_key"] = keys[0]["key"] if keys else ""
+        self._save(config)
+
+    def get_rpc_url(self) -> str:
+        """Get the saved JSON-RPC endpoint ("" when Etherscan is used)."""
+        config = self._load()
+        return config.get("rpc_url", "")
+
+    def save_rpc_url(self, url: str):
+        """Save the JSON-RPC endpoint."""
         config = self._load()
-        config["api_key"] = api_key
+        config["rpc_url"] = url
         self._save(config)
 
     def get_last_directory(self) -> str:
@@ -2,8 +2,10 @@
 Utility functions for wallet address validation and date handling.
 """
 
+import csv
 import re
 from datetime import datetime, timezone
+from pathlib import Path
 
 
 def validate_eth_address(address: str) -> bool:
@@ -94,13 +96,149 @@ def parse_batch_addresses(text: str) -> list[str]:
     return [addr.strip() for addr in addresses if validate_eth_address(addr.strip())]
 
 
-def calculate_token_value(raw_value: str, decimals: int) -> str:
+def parse_wallet_import(text: str) -> tuple[list[tuple[str, str | None]], int]:
+    """
+    Parse pasted text or CSV content into wallet entries.
+
+    Each line is either "address,file" (an explicit address-to-file mapping)
+    or any mix of addresses separated by commas or whitespace, which get no
+    file. Header lines and other invalid tokens are skipped.
+
+    Args:
+        text: Pasted text or CSV file content
+
+    Returns:
+        Tuple of (list of (address, file or None) in input order,
+        number of invalid tokens skipped)
+    """
+    entries = []
+    invalid = 0
+
+    for row in csv.reader(text.splitlines()):
+        cells = [cell.strip() for cell in row if cell.strip()]
+        if not cells:
+            continue
+
+        # "address,file" mapping
+        if len(cells) == 2 and validate_eth_address(cells[0]) and cells[1].lower().endswith(".xlsx"):
+            entries.append((cells[0], cells[1]))
+            continue
+
+        tokens = re.split(r'[,\s\n]+', " ".join(cells))
+        addresses = parse_batch_addresses(" ".join(cells))
+        invalid += len([token for token in tokens if token]) - len(addresses)
+        entries.extend((address, None) for address in addresses)
+
+    return entries, invalid
+
+
+def plan_wallet_import(
+    entries: list[tuple[str, str | None]],
+    existing_addresses: list[str],
+    directory: str,
+    template: str = "{address}.xlsx"
+) -> tuple[list[dict], int]:
+    """
+    Turn parsed import entries into wallet dictionaries.
+
+    Addresses already in the list (or repeated in the import) are skipped,
+    compared case-insensitively. Entries without a file get one from the
+    naming template; relative file names are placed in the directory.
+
+    Args:
+        entries: List of (address, file or None) from parse_wallet_import
+        existing_addresses: Addresses already in the wallet list
+        directory: Directory for generated and relative file names
+        template: File name template; supports {address}, {short} (first
+            10 characters of the address) and {index} (1-based position)
+
+    Returns:
+        Tuple of (list of {"address", "file_path"} dictionaries,
+        number of duplicates skipped)
+    """
+    seen = {address.lower() for address in existing_addresses}
+    wallets = []
+    duplicates = 0
+
+    for address, file_name in entries:
+        key = address.lower()
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+
+        if not file_name:
+            file_name = template.format(
+                address=address,
+                short=address[:10],
+                index=len(wallets) + 1
+            )
+        file_path = Path(file_name)
+        if not file_path.is_absolute():
+            file_path = Path(directory) / file_path
+
+        wallets.append({"address": address, "file_path": str(file_path)})
+
+    return wallets, duplicates
+
+
+def parse_api_keys(text: str) -> list[dict]:
+    """
+    Parse one or more API keys from text input.
+
+    Keys are separated by commas or whitespace. A key may end in ":<weight>"
+    to give it a larger share of requests (e.g. a paid key with twice the
+    free rate limit is "KEY:2").
+
+    Args:
+        text: Text containing API keys
+
+    Returns:
+        List of {"key", "weight"} dicts, without duplicates
+    """
+    keys = []
+    seen = set()
+    for token in re.split(r'[,\s]+', text.strip()):
+        key, _, weight = token.partition(":")
+        if not key or key in seen:
+            continue
+        try:
+            weight = float(weight) if weight else 1
+        except ValueError:
+            weight = 1
+        seen.add(key)
+        keys.append({"key": key, "weight": weight if weight > 0 else 1})
+    return keys
+
+
+def format_api_keys(keys: list[dict]) -> str:
+    """
+    Format API keys for display in a single entry (inverse of parse_api_keys).
+
+    Args:
+        keys: List of {"key", "weight"} dicts
+
+    Returns:
+        Comma-separated keys, with ":<weight>" on keys whose weight isn't 1
+    """
+    parts = []
+    for entry in keys:
+        weight = entry.get("weight", 1)
+        if weight == 1:
+            parts.append(entry["key"])
+        else:
+            parts.append(f"{entry['key']}:{weight:g}")
+    return ", ".join(parts)
+
+
+def calculate_token_value(raw_value: str, decimals: int, divisor: int | None = None) -> str:
     """
     Convert raw token value to human-readable format.
 
     Args:
         raw_value: Raw token value from API (as string to handle large numbers)
         decimals: Number of decimal places for the token
+        divisor: Optional precomputed 10 ** decimals
 
     Returns:
         Human-readable token value as string
@@ -114,7 +252,7 @@ def calculate_token_value(raw_value: str, decimals: int) -> str:
             return str(raw_int)
 
         # Convert to decimal value
-        divisor = 10 ** decimals
+        divisor = divisor or 10 ** decimals
         whole_part = raw_int // divisor
         decimal_part = raw_int % divisor
 
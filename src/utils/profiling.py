@@ -0,0 +1,159 @@
+"""
+Profiling mode for export runs: per-stage cProfile data and sampled stacks.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+class RunProfiler:
+    """
+    Profile one export run, split by wallet and stage.
+
+    The runner reports what it is working on with label(). Two kinds of
+    data are collected:
+
+    - cProfile data per stage (fetch, dedupe, write, save, summary) for the
+      thread that started the profiler, saved as stage-<stage>.pstats plus
+      combined.pstats.
+    - Wall-clock stacks of every thread started for the run (including
+      parallel fetch windows), sampled every SAMPLE_INTERVAL seconds and
+      saved in collapsed form ("wallet;stage;thread;frame;... count") as
+      stacks.collapsed, ready for flamegraph.pl or speedscope.
+
+    Nothing is hooked when no profiler is passed to the runner.
+    """
+
+    SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+
+    def __init__(self, output_dir: Path):
+        """
+        Initialize the profiler.
+
+        Args:
+            output_dir: Directory receiving one sub-directory per profiled run
+        """
+        self.output_dir = Path(output_dir)
+        self._label = ("run", "setup")
+        self._profiles = {}
+        self._active = None
+        self._thread = None
+        self._ignored_threads = set()
+        self._stacks = {}
+        self._stage_time = {}
+        self._stop_event = threading.Event()
+        self._sampler = None
+
+    def start(self) -> None:
+        """Start profiling; call from the thread that runs the export."""
+        self._thread = threading.get_ident()
+        # Threads that already exist (e.g. the GUI loop) are not part of the run
+        self._ignored_threads = {t.ident for t in threading.enumerate()} - {self._thread}
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._sampler.start()
+        self._switch(self._label[1])
+
+    def label(self, subject: str | None = None, stage: str | None = None) -> None:
+        """
+        Set what the run is working on.
+
+        Args:
+            subject: Wallet address while fetching, file name while writing
+            stage: Stage name ("fetch", "dedupe", "write", "save" or "summary")
+        """
+        subject = subject or self._label[0]
+        stage = stage or self._label[1]
+        self._label = (subject, stage)
+        if self._thread == threading.get_ident():
+            self._switch(stage)
+
+    def stop(self) -> Path:
+        """
+        Stop profiling and write the collected data.
+
+        Returns:
+            Directory holding the pstats, collapsed-stack and summary files
+        """
+        if self._active:
+            self._active.disable()
+            self._active = None
+        self._stop_event.set()
+        if self._sampler:
+            self._sampler.join()
+        self._thread = None
+
+        run_dir = self.output_dir / datetime.now().strftime("%Y%m%d-%H%M%S")
+        run_dir.mkdir(parents=True, exist_ok=True)
+
+        combined = None
+        for stage, profile in self._profiles.items():
+            profile.dump_stats(run_dir / f"stage-{stage}.pstats")
+            if combined is None:
+                combined = pstats.Stats(profile)
+            else:
+                combined.add(profile)
+        if combined:
+            combined.dump_stats(run_dir / "combined.pstats")
+
+        with open(run_dir / "stacks.collapsed", 'w') as f:
+            for stack, count in sorted(self._stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        with open(run_dir / "summary.txt", 'w') as f:
+            f.write(self._summary(combined))
+
+        return run_dir
+
+    def _switch(self, stage: str) -> None:
+        """Move cProfile collection to the profile of a stage."""
+        profile = self._profiles.get(stage)
+        if profile is self._active and profile is not None:
+            return
+        if self._active:
+            self._active.disable()
+        if profile is None:
+            profile = self._profiles[stage] = cProfile.Profile()
+        profile.enable()
+        self._active = profile
+
+    def _sample(self) -> None:
+        """Collect wall-clock stacks until stopped (runs in its own thread)."""
+        own = threading.get_ident()
+        last = time.monotonic()
+        while not self._stop_event.wait(self.SAMPLE_INTERVAL):
+            now = time.monotonic()
+            elapsed, last = now - last, now
+            subject, stage = self._label
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident in self._ignored_threads:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack = ";".join([subject, stage, names.get(ident, str(ident))] + frames[::-1])
+                self._stacks[stack] = self._stacks.get(stack, 0) + 1
+                self._stage_time[stage] = self._stage_time.get(stage, 0.0) + elapsed
+
+    def _summary(self, combined: pstats.Stats | None) -> str:
+        """Human-readable overview: thread time per stage and top functions."""
+        lines = ["Sampled thread time per stage (summed over run threads):"]
+        for stage, seconds in sorted(self._stage_time.items(), key=lambda item: -item[1]):
+            lines.append(f"  {stage:<10} {seconds:8.2f}s")
+
+        if combined:
+            buffer = io.StringIO()
+            combined.stream = buffer
+            combined.sort_stats("cumulative").print_stats(25)
+            lines += ["", "Top functions by cumulative time (export thread):", buffer.getvalue()]
+        return "\n".join(lines) + "\n"
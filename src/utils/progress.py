@@ -0,0 +1,270 @@
+"""
+Progress tracking for export runs: throughput, rate-limit waits and ETA.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable
+
+
+# Fraction of a wallet's progress-bar slot reached once its fetch ends;
+# the rest fills when its rows are saved to its file
+FETCHED_FRACTION = 0.8
+
+
+class ProgressTracker:
+    """
+    Collect progress events from an export run and publish snapshots.
+
+    The tracker is fed from the export's pipeline threads. Every update
+    produces a snapshot dictionary which is passed to the sink, throttled
+    so that at most one snapshot per MIN_INTERVAL seconds is published.
+    Wallet boundaries are always published.
+
+    Wallets are fetched (possibly several at a time) and saved later by the
+    write stage, so a wallet goes through wallet_started(), wallet_fetched()
+    and wallet_finished(), the last one once its file is saved. The stage
+    is that of the wallet started last: "fetch", "write" (fetched, waiting
+    for its file to be saved) or "done". File writes report their own
+    stages ("dedupe", "write", "save", "summary") through
+    write_stage_changed(), shown as write_file and write_stage.
+    """
+
+    MIN_INTERVAL = 0.1  # seconds between throttled snapshots
+
+    def __init__(self, total_wallets: int, sink: Callable[[dict], None] | None = None):
+        """
+        Initialize the tracker.
+
+        Args:
+            total_wallets: Number of wallets in the run
+            sink: Optional callable receiving snapshot dictionaries
+        """
+        self.total_wallets = total_wallets
+        self.sink = sink
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._last_publish = 0.0
+
+        self.wallets_done = 0
+        self.wallet_index = 0
+        self.address = ""
+        self.stage = "fetch"
+        self.pages = 0
+        self.rows = 0
+        self.total_rows = 0
+        self.api_calls = 0
+        self.rate_limit_wait = 0.0
+        self.queues = {}
+        self.write_file = ""
+        self.write_stage = ""
+        self._wallet_started_at = self._started_at
+        self._wallets_fetched = 0
+        self._awaiting_write = set()  # Indices of fetched wallets not saved yet
+
+    def wallet_started(self, index: int, address: str):
+        """Mark the start of a wallet (index is 1-based)."""
+        with self._lock:
+            self.wallet_index = index
+            self.address = address
+            self.stage = "fetch"
+            self.pages = 0
+            self.rows = 0
+            self._wallet_started_at = time.monotonic()
+        self._publish(force=True)
+
+    def page_fetched(self, rows: int, api_calls: int, rate_limit_wait: float):
+        """
+        Record a fetched page.
+
+        Args:
+            rows: Rows collected so far for the current wallet
+            api_calls: Total API calls made by the client so far
+            rate_limit_wait: Total seconds the client has spent in rate-limit waits
+        """
+        with self._lock:
+            self.pages += 1
+            self.rows = rows
+            self.api_calls = api_calls
+            self.rate_limit_wait = rate_limit_wait
+        self._publish()
+
+    def wallet_fetched(self, index: int):
+        """Mark the end of a wallet's fetch (index is 1-based)."""
+        with self._lock:
+            self._awaiting_write.add(index)
+            self._wallets_fetched += 1
+            if index == self.wallet_index:
+                self.stage = "write"
+        self._publish(force=True)
+
+    def wallet_finished(self, index: int):
+        """Mark a wallet whose rows were saved, or that failed (index is 1-based)."""
+        with self._lock:
+            self._awaiting_write.discard(index)
+            self.wallets_done += 1
+            if index == self.wallet_index:
+                self.stage = "done"
+        self._publish(force=True)
+
+    def write_stage_changed(self, file_path: str, stage: str | None):
+        """
+        Record the stage a file write has reached.
+
+        Args:
+            file_path: File being written
+            stage: Stage just started, or None once the file's write ended
+        """
+        with self._lock:
+            if stage is not None:
+                self.write_file = file_path
+                self.write_stage = stage
+            elif file_path == self.write_file:
+                self.write_file = ""
+                self.write_stage = ""
+        self._publish(force=stage is None)
+
+    def rows_written(self, count: int):
+        """Record rows saved to a file (writes may lag behind fetching)."""
+        with self._lock:
+            self.total_rows += count
+        self._publish()
+
+    def queue_depths(self, depths: dict[str, int]):
+        """Record how many items wait in front of each pipeline stage."""
+        with self._lock:
+            self.queues = dict(depths)
+        self._publish()
+
+    def wallet_skipped(self, index: int, address: str):
+        """Mark a wallet that needed no work (e.g. already written in a resumed run)."""
+        with self._lock:
+            self.wallet_index = index
+            self.address = address
+            self.wallets_done += 1
+            self.stage = "done"
+        self._publish(force=True)
+
+    def snapshot(self) -> dict:
+        """
+        Build a snapshot of the current progress.
+
+        Returns:
+            Dictionary with counters, rates (per second) and ETA in seconds
+            (None until at least one wallet has been fetched)
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(now - self._started_at, 1e-6)
+            wallet_elapsed = max(now - self._wallet_started_at, 1e-6)
+
+            # Writes overlap fetching, so the fetches left set the pace;
+            # wallets fetched at the same time make the rate, not durations
+            eta = None
+            if self._wallets_fetched:
+                remaining = self.total_wallets - self.wallets_done - len(self._awaiting_write)
+                eta = max(0.0, elapsed / self._wallets_fetched * remaining)
+
+            return {
+                "wallet_index": self.wallet_index,
+                "total_wallets": self.total_wallets,
+                "wallets_done": self.wallets_done,
+                "address": self.address,
+                "stage": self.stage,
+                "pages": self.pages,
+                "rows": self.rows,
+                "total_rows": self.total_rows,
+                "api_calls": self.api_calls,
+                "rows_per_sec": self.rows / wallet_elapsed,
+                "calls_per_sec": self.api_calls / elapsed,
+                "rate_limit_wait": self.rate_limit_wait,
+                "elapsed": elapsed,
+                "eta": eta,
+                "queues": dict(self.queues),
+                "write_file": self.write_file,
+                "write_stage": self.write_stage,
+                "progress": self.wallets_done + FETCHED_FRACTION * len(self._awaiting_write),
+            }
+
+    def _publish(self, force: bool = False):
+        """Send a snapshot to the sink, throttled unless forced."""
+        if self.sink is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_publish < self.MIN_INTERVAL:
+            return
+        self._last_publish = now
+        self.sink(self.snapshot())
+
+
+class ProgressQueue:
+    """
+    Thread-safe channel carrying progress snapshots to the GUI thread.
+
+    Producers call put() from any thread. The GUI polls drain() on a single
+    timer and only renders the newest snapshot, so the Tk event loop does a
+    fixed amount of work per tick regardless of the event rate.
+    """
+
+    def __init__(self):
+        """Initialize an empty queue."""
+        self._queue = queue.Queue()
+
+    def put(self, snapshot: dict):
+        """Publish a snapshot."""
+        self._queue.put(snapshot)
+
+    def drain(self) -> dict | None:
+        """
+        Remove all pending snapshots.
+
+        Returns:
+            The newest snapshot, or None if nothing was pending
+        """
+        latest = None
+        while True:
+            try:
+                latest = self._queue.get_nowait()
+            except queue.Empty:
+                return latest
+
+
+def format_duration(seconds: float | None) -> str:
+    """
+    Format a duration in seconds as a short human-readable string.
+
+    Args:
+        seconds: Duration in seconds, or None if unknown
+
+    Returns:
+        String such as "45s", "3m 12s" or "1h 05m" ("--" if unknown)
+    """
+    if seconds is None:
+        return "--"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+def format_cost(result: dict) -> str:
+    """
+    Format a wallet result's actual and estimated cost for display.
+
+    Args:
+        result: Result dictionary from ExportRunner
+
+    Returns:
+        Text like " (took 12s, est. 10s)", or "" if the wallet wasn't exported
+    """
+    if result.get("actual_cost") is None:
+        return ""
+    text = f" (took {format_duration(result['actual_cost'])}"
+    if result.get("estimated_cost") is not None:
+        text += f", est. {format_duration(result['estimated_cost'])}"
+    return text + ")"
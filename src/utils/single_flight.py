@@ -0,0 +1,51 @@
+"""
+Request coalescing: callers asking for the same thing share one call.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Run a call once per key and hand its outcome to every caller of that key.
+
+    The first caller of a key runs the function; callers arriving while it
+    is in flight wait for it, and later callers get the remembered outcome
+    (result or exception) without calling again. Create one per run so
+    outcomes don't outlive the data they describe.
+    """
+
+    def __init__(self):
+        """Initialize with no calls made."""
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, function: Callable[[], object]) -> tuple[object, bool]:
+        """
+        Get the outcome of function for key, calling it only once.
+
+        Args:
+            key: Identifies the request, e.g. (action, chain, address)
+            function: Callable making the request
+
+        Returns:
+            Tuple of (the function's result, whether another caller's
+            call supplied it)
+
+        Raises:
+            Exception: The exception the function raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            owner = call is None
+            if owner:
+                call = self._calls[key] = Future()
+
+        if owner:
+            try:
+                call.set_result(function())
+            except Exception as e:
+                call.set_exception(e)
+        return call.result(), not owner
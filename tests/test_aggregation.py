@@ -0,0 +1,77 @@
+"""
+Tests for the per-token flow summary.
+"""
+
+import tempfile
+import unittest
+from openpyxl import load_workbook
+
+# Add src directory to path for imports
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from export.aggregation import BalanceAggregator
+
+
+WALLET = "0x" + "1" * 40
+OTHER = "0x" + "2" * 40
+TOKEN = "0x" + "3" * 40
+DAY = 1700006400  # 2023-11-15 00:00 UTC
+
+
+def _row(n: int, sender: str, recipient: str, raw: int, timestamp: int) -> dict:
+    """Build a formatted export row of TOKEN (2 decimals)."""
+    return {
+        "Transaction Hash": f"0x{n:064x}",
+        "UnixTimestamp": str(timestamp),
+        "From": sender,
+        "To": recipient,
+        "ContractAddress": TOKEN,
+        "TokenSymbol": "TKN",
+        "RawValue": str(raw),
+        "TokenDecimal": 2
+    }
+
+
+class BalanceAggregatorTest(unittest.TestCase):
+    """Totals are updated from new rows only and survive between runs."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.export_path = str(Path(self.directory.name) / "report.xlsx")
+
+    def test_flows_accumulate_across_runs(self):
+        aggregator = BalanceAggregator(self.export_path)
+        aggregator.update([WALLET], [
+            _row(0, OTHER, WALLET, 1500, DAY),
+            _row(1, WALLET, OTHER, 200, DAY + 60),
+            _row(2, WALLET, WALLET, 700, DAY + 120)  # To oneself: in and out
+        ])
+        aggregator.save()
+
+        # A later run only feeds its new rows
+        aggregator = BalanceAggregator(self.export_path)
+        aggregator.update([WALLET], [_row(3, WALLET, OTHER, 50, DAY + 86400)])
+        aggregator.save()
+
+        token = aggregator.state["wallets"][WALLET][TOKEN]
+        self.assertEqual((token["inflow"], token["outflow"], token["balance"], token["transfers"]), (2200, 950, 1250, 4))
+        self.assertEqual(token["daily"], {"2023-11-15": 1300, "2023-11-16": -50})
+
+        wb = load_workbook(aggregator.summary_path, read_only=True)
+        totals = list(wb["Net Flows (exported rows)"].iter_rows(min_row=2, values_only=True))
+        flows = list(wb["Daily Flows"].iter_rows(min_row=2, values_only=True))
+        wb.close()
+        self.assertEqual(totals, [(WALLET, TOKEN, "TKN", "2200", "950", "1250", "12.5", 4)])
+        self.assertEqual([(day, net) for day, _, _, _, net, _ in flows], [("2023-11-15", "1300"), ("2023-11-16", "-50")])
+
+    def test_untracked_rows_are_ignored(self):
+        aggregator = BalanceAggregator(self.export_path)
+        aggregator.update([WALLET], [_row(0, OTHER, OTHER, 100, DAY)])
+        self.assertEqual(aggregator.state, {"wallets": {}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Tests for the timestamp to block index.
+"""
+
+import tempfile
+import time
+import unittest
+
+# Add src directory to path for imports
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from api.block_index import BlockIndex
+
+
+GENESIS = 1500000000  # Timestamp of block 0 of the fake chain
+BLOCK_TIME = 12
+
+
+class FakeChain:
+    """Client answering getblocknobytime for a chain with a fixed block time."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_block_by_time(self, timestamp: int, closest: str) -> int:
+        self.calls.append((timestamp, closest))
+        block, remainder = divmod(timestamp - GENESIS, BLOCK_TIME)
+        return block + 1 if closest == "after" and remainder else block
+
+
+def _timestamp(block: int) -> int:
+    return GENESIS + block * BLOCK_TIME
+
+
+class BlockIndexTest(unittest.TestCase):
+    """Bounds come from anchors when they are close, from one cached lookup otherwise."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = Path(self.directory.name) / "blocks.json"
+        self.chain = FakeChain()
+        self.index = BlockIndex(self.path, self.chain)
+        for block in (1000000, 1001000, 1003000, 1020000):
+            self.index.add(block, _timestamp(block))
+
+    def test_anchor_timestamp_is_bracketed(self):
+        timestamp = _timestamp(1001000)
+        self.assertLessEqual(self.index.first_block_at_or_after(timestamp), 1001000)
+        self.assertGreaterEqual(self.index.last_block_at_or_before(timestamp, 0), 1001000)
+        self.assertEqual(self.chain.calls, [])
+
+    def test_between_close_anchors_needs_no_lookup(self):
+        timestamp = _timestamp(1002000) + 5
+        self.assertEqual(self.index.first_block_at_or_after(timestamp), 1001001)
+        self.assertEqual(self.index.last_block_at_or_before(timestamp, 0), 1002999)
+        self.assertEqual(self.chain.calls, [])
+
+    def test_between_distant_anchors_looks_up_once(self):
+        # 1003000..1020000 is wider than MAX_SLACK
+        timestamp = _timestamp(1010000) + 5
+        self.assertEqual(self.index.first_block_at_or_after(timestamp), 1010001)
+        self.assertEqual(self.index.last_block_at_or_before(timestamp, 0), 1010000)
+        self.index.first_block_at_or_after(timestamp)
+        self.assertEqual(len(self.chain.calls), 2)
+
+        # Settled answers survive a restart
+        self.index.save()
+        reloaded = BlockIndex(self.path, FakeChain())
+        self.assertEqual(reloaded.first_block_at_or_after(timestamp), 1010001)
+        self.assertEqual(reloaded.last_block_at_or_before(timestamp, 0), 1010000)
+        self.assertEqual(reloaded.client.calls, [])
+
+    def test_unsettled_head_is_not_bounded_or_cached(self):
+        timestamp = int(time.time()) - BlockIndex.SETTLED_AGE // 2
+        self.assertEqual(self.index.last_block_at_or_before(timestamp, default=-1), -1)
+        self.index.first_block_at_or_after(timestamp)
+        self.index.first_block_at_or_after(timestamp)
+        self.assertEqual([closest for _, closest in self.chain.calls], ["after", "after"])
+
+
+if __name__ == "__main__":
+    unittest.main()
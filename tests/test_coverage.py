@@ -0,0 +1,64 @@
+"""
+Tests for exported-interval bookkeeping.
+"""
+
+import unittest
+
+# Add src directory to path for imports
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from export.coverage import add_interval, covered_intervals, filter_signature, missing_intervals
+
+
+class AddIntervalTest(unittest.TestCase):
+    """Intervals stay sorted and disjoint."""
+
+    def test_overlapping_intervals_merge(self):
+        self.assertEqual(add_interval([[10, 20], [40, 50]], 15, 45), [[10, 50]])
+
+    def test_adjacent_intervals_merge(self):
+        self.assertEqual(add_interval([[10, 20]], 21, 30), [[10, 30]])
+        self.assertEqual(add_interval([[10, 20]], 0, 9), [[0, 20]])
+
+    def test_separate_interval_is_inserted_in_order(self):
+        self.assertEqual(add_interval([[10, 20], [40, 50]], 25, 30), [[10, 20], [25, 30], [40, 50]])
+
+    def test_empty_interval_changes_nothing(self):
+        intervals = [[10, 20]]
+        self.assertEqual(add_interval(intervals, 30, 25), [[10, 20]])
+        self.assertEqual(add_interval([], 5, 5), [[5, 5]])
+
+
+class MissingIntervalsTest(unittest.TestCase):
+    """Gaps are what add_interval() has not covered."""
+
+    def test_gaps_between_and_around_intervals(self):
+        self.assertEqual(
+            missing_intervals([[10, 20], [30, 40]], 0, 50),
+            [(0, 9), (21, 29), (41, 50)]
+        )
+
+    def test_covered_range_has_no_gaps(self):
+        self.assertEqual(missing_intervals([[0, 100]], 10, 90), [])
+        self.assertEqual(missing_intervals(add_interval([[0, 20]], 21, 40), 0, 40), [])
+
+    def test_intervals_outside_range_are_ignored(self):
+        self.assertEqual(missing_intervals([[0, 5], [95, 100]], 10, 90), [(10, 90)])
+        self.assertEqual(missing_intervals([], 10, 90), [(10, 90)])
+
+
+class CoveredIntervalsTest(unittest.TestCase):
+    """Coverage only counts under the filters it was recorded with."""
+
+    def test_other_filters_discard_coverage(self):
+        wallet = {"address": "0xa", "token_allowlist": ["0xb"]}
+        cursor = {"coverage": {"filters": filter_signature(wallet), "intervals": [[1, 2]]}}
+        self.assertEqual(covered_intervals(cursor, wallet), [[1, 2]])
+        self.assertEqual(covered_intervals(cursor, {"address": "0xa"}), [])
+        self.assertEqual(covered_intervals(None, wallet), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
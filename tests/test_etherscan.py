@@ -0,0 +1,108 @@
+"""
+Tests for the Etherscan client's handling of API errors.
+"""
+
+import unittest
+from unittest import mock
+
+# Add src directory to path for imports
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from api.etherscan import EtherscanClient
+
+
+class FakeClient(EtherscanClient):
+    """Etherscan client answering tokentx from memory."""
+
+    def __init__(self, transactions: list[dict]):
+        super().__init__("key")
+        self.key_pool.delay = 0
+        self.transactions = transactions
+
+    def _make_request(self, params: dict) -> dict:
+        self.api_calls += 1
+        matching = [
+            tx for tx in self.transactions
+            if params["startblock"] <= int(tx["blockNumber"]) <= params["endblock"]
+        ]
+        if params["sort"] == "desc":
+            matching.reverse()
+        offset, page = params["offset"], params["page"]
+        return {"status": "1", "result": matching[(page - 1) * offset:page * offset]}
+
+
+def _transactions(count: int, blocks_apart: int = 1) -> list[dict]:
+    """Build raw tokentx rows, one per block."""
+    return [
+        {"hash": f"0x{n:064x}", "blockNumber": str(100 + n * blocks_apart), "logIndex": "0"}
+        for n in range(count)
+    ]
+
+
+def _response(data: dict) -> mock.Mock:
+    """Build a fake requests response returning data as JSON."""
+    response = mock.Mock()
+    response.json.return_value = data
+    return response
+
+
+class MakeRequestTest(unittest.TestCase):
+    """Key pool bookkeeping for the error messages Etherscan returns."""
+
+    def setUp(self):
+        self.client = EtherscanClient(["exhausted", "spare"])
+        self.client.key_pool.delay = 0
+
+    def test_daily_rate_limit_removes_key(self):
+        replies = {
+            "exhausted": {"status": "0", "message": "NOTOK", "result": "Max daily rate limit reached"},
+            "spare": {"status": "1", "message": "OK", "result": ["ok"]}
+        }
+        with mock.patch("api.etherscan.requests.get") as get:
+            get.side_effect = lambda url, params, timeout: _response(replies[params["apikey"]])
+            data = self.client._make_request({"module": "account", "action": "tokentx"})
+
+        self.assertEqual(data["result"], ["ok"])
+        self.assertEqual(len(self.client.key_pool), 1)
+        self.assertEqual(self.client.default_wallet_workers(), 1)
+
+    def test_rate_limit_keeps_key(self):
+        replies = iter([
+            {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"},
+            {"status": "1", "message": "OK", "result": ["ok"]}
+        ])
+        with mock.patch("api.etherscan.requests.get") as get:
+            get.side_effect = lambda url, params, timeout: _response(next(replies))
+            self.client._make_request({"module": "account", "action": "tokentx"})
+
+        self.assertEqual(len(self.client.key_pool), 2)
+
+
+class IterTransactionPagesTest(unittest.TestCase):
+    """Block windows are only used for histories that need them."""
+
+    def _fetch(self, client: EtherscanClient, max_workers: int) -> list[dict]:
+        return [tx for page, _ in client.iter_transaction_pages("0xa", max_workers=max_workers) for tx in page]
+
+    def test_small_wallet_costs_one_request(self):
+        client = FakeClient(_transactions(1))
+        self.assertEqual(len(self._fetch(client, max_workers=8)), 1)
+        self.assertEqual(client.api_calls, 1)
+
+    def test_window_count_does_not_follow_workers(self):
+        # A busy history followed by a long quiet stretch
+        transactions = _transactions(20000, blocks_apart=40) + [{"hash": "0xlast", "blockNumber": "5000000"}]
+        calls = []
+        for max_workers in (1, 4, 16):
+            client = FakeClient(transactions)
+            self.assertEqual(self._fetch(client, max_workers), transactions)
+            calls.append(client.api_calls)
+        self.assertEqual(calls[1], calls[2])
+        # The newest transfer, plus at most one partly filled page per window
+        self.assertLessEqual(calls[1] - calls[0], 1 + EtherscanClient.MAX_WINDOWS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+Tests for the API key pool.
+"""
+
+import unittest
+
+# Add src directory to path for imports
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from api.key_pool import ApiKeyPool
+
+
+class ApiKeyPoolTest(unittest.TestCase):
+    """Throttled keys rest; rejected keys leave."""
+
+    def test_throttled_key_is_rested_not_removed(self):
+        pool = ApiKeyPool(["only"], delay=0)
+        waits = []
+        for _ in range(8):
+            pool.record_throttle("only")
+            key, wait = pool.acquire()
+            self.assertEqual(key, "only")
+            waits.append(wait)
+
+        self.assertEqual(len(pool), 1)
+        self.assertLess(waits[0], waits[1])
+        self.assertLessEqual(max(waits), ApiKeyPool.MAX_COOLDOWN)
+
+        # A success resets the back-off
+        pool = ApiKeyPool(["only"], delay=0)
+        pool.record_throttle("only")
+        pool.record_success("only")
+        pool.record_throttle("only")
+        self.assertLessEqual(pool.acquire()[1], ApiKeyPool.THROTTLE_COOLDOWN)
+
+    def test_rejected_key_is_removed(self):
+        pool = ApiKeyPool(["bad", "good"], delay=0)
+        pool.record_rejected("bad", "Invalid API Key")
+        self.assertEqual(len(pool), 1)
+        self.assertEqual(pool.acquire()[0], "good")
+
+
+if __name__ == "__main__":
+    unittest.main()
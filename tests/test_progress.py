@@ -0,0 +1,60 @@
+"""
+Tests for export progress tracking.
+"""
+
+import tempfile
+import unittest
+
+# Add src directory to path for imports
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from export.runner import ExportRunner
+from utils.progress import FETCHED_FRACTION, ProgressTracker
+
+from test_runner import FakeClient, WALLET, _transactions
+
+
+class ProgressTrackerTest(unittest.TestCase):
+    """A wallet's slot only fills once its rows are saved."""
+
+    def test_wallet_completes_after_write(self):
+        tracker = ProgressTracker(2)
+        tracker.wallet_started(1, "0xa")
+        tracker.wallet_fetched(1)
+        tracker.wallet_started(2, "0xb")
+        snapshot = tracker.snapshot()
+        self.assertEqual(snapshot["progress"], FETCHED_FRACTION)
+        self.assertEqual(snapshot["stage"], "fetch")
+
+        tracker.wallet_finished(1)
+        tracker.wallet_fetched(2)
+        snapshot = tracker.snapshot()
+        self.assertEqual(snapshot["progress"], 1 + FETCHED_FRACTION)
+        self.assertEqual(snapshot["stage"], "write")
+        self.assertEqual(snapshot["eta"], 0.0)
+
+        tracker.wallet_finished(2)
+        snapshot = tracker.snapshot()
+        self.assertEqual((snapshot["progress"], snapshot["wallets_done"], snapshot["stage"]), (2, 2, "done"))
+
+
+class WriteStageTest(unittest.TestCase):
+    """File writes report their stages to the tracker."""
+
+    def test_inline_write_reports_stages(self):
+        stages = []
+        tracker = ProgressTracker(1, sink=lambda snapshot: stages.append(snapshot["write_stage"]))
+        tracker.MIN_INTERVAL = 0
+        with tempfile.TemporaryDirectory() as directory:
+            wallet = {"address": WALLET, "file_path": str(Path(directory) / "a.xlsx")}
+            ExportRunner(FakeClient(_transactions(5)), tracker=tracker, write_workers=1).run([wallet])
+
+        written = [stage for n, stage in enumerate(stages) if stage and stage != stages[n - 1]]
+        self.assertEqual(written[:3], ["dedupe", "write", "save"])
+        self.assertEqual(tracker.snapshot()["write_stage"], "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Tests for the JSON-RPC transaction source.
+"""
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+# Add src directory to path for imports
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import requests
+
+from api.etherscan import format_transaction
+from api.rpc import RpcClient, TRANSFER_TOPIC
+
+
+WALLET = "0x" + "1" * 40
+OTHER = "0x" + "2" * 40
+TOKEN = "0x" + "a" * 40
+
+
+def _topic(address: str) -> str:
+    return "0x" + address[2:].rjust(64, "0")
+
+
+def _abi_string(text: str) -> str:
+    raw = text.encode()
+    padded = raw + b"\0" * (-len(raw) % 32)
+    return "0x" + (32).to_bytes(32, "big").hex() + len(raw).to_bytes(32, "big").hex() + padded.hex()
+
+
+class FakeNode(BaseHTTPRequestHandler):
+    """Stand-in JSON-RPC node serving one token's Transfer logs."""
+
+    logs = [
+        {
+            "address": TOKEN,
+            "topics": [TRANSFER_TOPIC, _topic(OTHER), _topic(WALLET)],
+            "data": "0x" + (1500000).to_bytes(32, "big").hex(),
+            "blockNumber": hex(120),
+            "transactionHash": "0x" + "b" * 64,
+            "transactionIndex": "0x3",
+            "logIndex": "0x7",
+            "removed": False
+        },
+        {
+            "address": TOKEN,
+            "topics": [TRANSFER_TOPIC, _topic(WALLET), _topic(OTHER)],
+            "data": "0x" + (250000).to_bytes(32, "big").hex(),
+            "blockNumber": hex(150),
+            "transactionHash": "0x" + "c" * 64,
+            "transactionIndex": "0x0",
+            "logIndex": "0x1",
+            "removed": False
+        },
+        {
+            # ERC-721 transfer: the token id is a fourth topic
+            "address": "0x" + "d" * 40,
+            "topics": [TRANSFER_TOPIC, _topic(OTHER), _topic(WALLET), _topic("0x05")],
+            "data": "0x",
+            "blockNumber": hex(130),
+            "transactionHash": "0x" + "e" * 64,
+            "transactionIndex": "0x0",
+            "logIndex": "0x0",
+            "removed": False
+        }
+    ]
+    calls = {"0x06fdde03": _abi_string("USD Coin"), "0x95d89b41": _abi_string("USDC"), "0x313ce567": hex(6)}
+
+    def do_POST(self):
+        batch = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        body = json.dumps([{"jsonrpc": "2.0", "id": r["id"], "result": self._answer(r)} for r in batch]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _answer(self, request: dict):
+        method, params = request["method"], request["params"]
+        if method == "eth_chainId":
+            return "0x89"
+        if method == "eth_blockNumber":
+            return hex(1000)
+        if method == "eth_getBlockByNumber":
+            return {"number": params[0], "timestamp": hex(1700000000 + int(params[0], 16) * 12)}
+        if method == "eth_call":
+            return self.calls[params[0]["data"]]
+        if method == "eth_getLogs":
+            query = params[0]
+            return [
+                log for log in self.logs
+                if int(query["fromBlock"], 16) <= int(log["blockNumber"], 16) <= int(query["toBlock"], 16)
+                and all(topic is None or topic == log["topics"][n] for n, topic in enumerate(query["topics"]))
+            ]
+        raise AssertionError(f"unexpected method {method}")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class IterWindowTest(unittest.TestCase):
+    """Adaptive eth_getLogs ranges."""
+
+    def test_timeout_halves_range(self):
+        client = RpcClient("http://localhost:8545", chain_id=1)
+        spans = []
+
+        def get_logs(address, start_block, end_block, contract_address=None):
+            spans.append(end_block - start_block + 1)
+            if len(spans) == 1:
+                # What _batch() raises when the HTTP request times out
+                with mock.patch.object(client._session, "post", side_effect=requests.exceptions.Timeout):
+                    client._batch([("eth_getLogs", [{}])])
+            return []
+
+        with mock.patch.object(client, "_get_transfer_logs", side_effect=get_logs):
+            pages = list(client._iter_window("0x" + "1" * 40, 0, 9999))
+
+        self.assertEqual(spans[:2], [RpcClient.INITIAL_SPAN, RpcClient.INITIAL_SPAN // 2])
+        self.assertEqual(pages[-1][1], 10000)
+
+
+class FakeNodeTest(unittest.TestCase):
+    """Transfers read from a node match the Etherscan rows for them."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeNode)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = RpcClient(f"http://127.0.0.1:{self.server.server_port}")
+
+    def test_chain_id_is_asked_from_node(self):
+        self.assertEqual(self.client.CHAIN_ID, 137)
+
+    def test_rows_match_etherscan_format(self):
+        transactions = [tx for page, _ in self.client.iter_transaction_pages(WALLET) for tx in page]
+        rows = self.client.format_transactions(transactions)
+
+        etherscan_rows = [
+            {
+                "hash": "0x" + "b" * 64, "blockNumber": "120", "timeStamp": str(1700000000 + 120 * 12),
+                "from": OTHER, "to": WALLET, "value": "1500000", "contractAddress": TOKEN,
+                "tokenName": "USD Coin", "tokenSymbol": "USDC", "tokenDecimal": "6",
+                "logIndex": "7", "transactionIndex": "3"
+            },
+            {
+                "hash": "0x" + "c" * 64, "blockNumber": "150", "timeStamp": str(1700000000 + 150 * 12),
+                "from": WALLET, "to": OTHER, "value": "250000", "contractAddress": TOKEN,
+                "tokenName": "USD Coin", "tokenSymbol": "USDC", "tokenDecimal": "6",
+                "logIndex": "1", "transactionIndex": "0"
+            }
+        ]
+        self.assertEqual(rows, [format_transaction(row) for row in etherscan_rows])
+
+
+if __name__ == "__main__":
+    unittest.main()
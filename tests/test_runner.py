@@ -0,0 +1,187 @@
+"""
+Tests for the export runner.
+"""
+
+import tempfile
+import unittest
+
+# Add src directory to path for imports
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from api.etherscan import EtherscanClient, EtherscanAPIError
+from export.checkpoint import Checkpoint
+from export.cursors import CursorStore
+from export.runner import ExportRunner
+from export.xlsx_handler import XlsxHandler
+
+
+WALLET = "0x" + "1" * 40
+
+
+class FakeClient(EtherscanClient):
+    """Etherscan client answering tokentx from a list, failing the first calls."""
+
+    def __init__(self, transactions: list[dict], failures: int = 0):
+        super().__init__("key")
+        self.key_pool.delay = 0
+        self.transactions = transactions
+        self.failures = failures
+
+    def _make_request(self, params: dict) -> dict:
+        self.api_calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise EtherscanAPIError("Connection error. Please check your internet connection.")
+        matching = [
+            tx for tx in self.transactions
+            if params["startblock"] <= int(tx["blockNumber"]) <= params["endblock"]
+            and params.get("contractaddress", tx["contractAddress"]) == tx["contractAddress"]
+        ]
+        if params["sort"] == "desc":
+            matching.reverse()
+        offset, page = params["offset"], params["page"]
+        return {"status": "1", "result": matching[(page - 1) * offset:page * offset]}
+
+
+def _transactions(count: int, contracts: int = 1) -> list[dict]:
+    """Build raw tokentx rows sent to WALLET, one per block, cycling through contracts."""
+    return [
+        {
+            "hash": f"0x{n:064x}",
+            "blockNumber": str(100 + n),
+            "timeStamp": str(1600000000 + n),
+            "from": "0x" + "2" * 40,
+            "to": WALLET,
+            "value": "1000",
+            "contractAddress": f"0x{3 + n % contracts:040x}",
+            "tokenName": "Token",
+            "tokenSymbol": "TKN",
+            "tokenDecimal": "2"
+        }
+        for n in range(count)
+    ]
+
+
+class CoalescingTest(unittest.TestCase):
+    """Duplicate wallet entries sharing one fetch."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.wallets = [
+            {"address": WALLET, "file_path": str(Path(self.directory.name) / f"{name}.xlsx")}
+            for name in ("a", "b", "c")
+        ]
+
+    def _run(self, runner: ExportRunner) -> tuple[list[dict], list[int]]:
+        """Run the export, recording how many shared row sets are held after each event."""
+        held = []
+        transform = runner._transform
+
+        def spy(item):
+            transform(item)
+            held.append(len(runner._shared_rows))
+
+        runner._transform = spy
+        return runner.run(self.wallets), held
+
+    def _check_first_failed(self, results: list[dict], held: list[int]) -> None:
+        self.assertTrue(results[0]["error"])
+        self.assertEqual([result["added"] for result in results[1:]], [25, 25])
+        for wallet in self.wallets[1:]:
+            self.assertEqual(len(XlsxHandler(wallet["file_path"]).get_existing_hashes()), 25)
+        # The rows of the entry that fetched are released after the last consumer
+        self.assertEqual(held[-1], 0)
+
+    def test_first_duplicate_fails(self):
+        runner = ExportRunner(FakeClient(_transactions(25), failures=1), fetch_workers=1)
+        results, held = self._run(runner)
+        self._check_first_failed(results, held)
+        self.assertEqual(runner.coalesced, 1)
+
+    def test_entry_reusing_probe_and_rows_counts_once(self):
+        cursors = CursorStore(Path(self.directory.name) / "cursors.json")
+        runner = ExportRunner(FakeClient(_transactions(25)), fetch_workers=1, cursors=cursors)
+        self._run(runner)
+        self.assertEqual(runner.coalesced, 2)
+
+    def test_first_duplicate_fails_fetching_ahead(self):
+        runner = ExportRunner(FakeClient(_transactions(25), failures=1), fetch_workers=1, wallet_workers=3)
+        results, held = self._run(runner)
+        self._check_first_failed(results, held)
+
+    def test_first_duplicate_fails_with_checkpoint(self):
+        checkpoint = Checkpoint(Path(self.directory.name) / "checkpoint")
+        runner = ExportRunner(FakeClient(_transactions(25), failures=1), checkpoint=checkpoint, fetch_workers=1)
+        results, held = self._run(runner)
+        self._check_first_failed(results, held)
+        self.assertEqual([wallet["status"] for wallet in checkpoint.wallets], ["pending", "written", "written"])
+
+
+class ResumeTest(unittest.TestCase):
+    """A cancelled run resumed from its checkpoint exports every row once."""
+
+    def test_cancel_mid_export_then_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wallets = [
+                {"address": f"0x{n + 1:040x}", "file_path": str(Path(directory) / f"{n}.xlsx")}
+                for n in range(2)
+            ]
+            transactions = _transactions(2500)
+            runner = ExportRunner(
+                FakeClient(transactions),
+                checkpoint=Checkpoint(Path(directory) / "checkpoint"),
+                fetch_workers=1,
+                wallet_workers=1
+            )
+            client = runner.client
+            make_request = client._make_request
+
+            def cancel_after_first_page(params):
+                if client.api_calls == 1:
+                    runner.cancel()
+                return make_request(params)
+
+            client._make_request = cancel_after_first_page
+            runner.run(wallets)
+            self.assertTrue(runner.cancelled)
+            self.assertFalse(Path(wallets[1]["file_path"]).exists())
+
+            checkpoint = Checkpoint(Path(directory) / "checkpoint")
+            checkpoint.load()
+            # Stopped inside the first wallet, with some of its pages spooled
+            self.assertEqual([wallet["status"] for wallet in checkpoint.wallets], ["pending", "pending"])
+            self.assertTrue(0 < checkpoint.wallets[0]["rows"] < 2500)
+            results = ExportRunner(FakeClient(transactions), checkpoint=checkpoint, fetch_workers=1).resume()
+
+            self.assertEqual([result["added"] for result in results], [2500, 2500])
+            for wallet in wallets:
+                handler = XlsxHandler(wallet["file_path"])
+                self.assertEqual(handler.get_row_count(), 2500)
+                self.assertEqual(handler.get_existing_hashes(), {tx["hash"] for tx in transactions})
+            self.assertFalse(checkpoint.is_resumable())
+
+
+class AllowlistTest(unittest.TestCase):
+    """Token allowlists fetch one server-side filtered stream per contract."""
+
+    def test_small_streams_cost_one_request_each(self):
+        with tempfile.TemporaryDirectory() as directory:
+            contracts = [f"0x{3 + n:040x}" for n in range(3)]
+            wallet = {
+                "address": WALLET,
+                "file_path": str(Path(directory) / "a.xlsx"),
+                "token_allowlist": contracts[:2]
+            }
+            client = FakeClient(_transactions(30, contracts=3))
+            # Default window concurrency: no stream is split into windows
+            results = ExportRunner(client).run([wallet])
+
+        self.assertEqual(results[0]["added"], 20)
+        self.assertEqual(client.api_calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Tests for sharded Excel exports.
+"""
+
+import tempfile
+import unittest
+from unittest import mock
+
+# Add src directory to path for imports
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from export.sharding import ShardedXlsxHandler
+from export.xlsx_handler import XlsxHandler
+
+
+def _rows(first: int, count: int) -> list[dict]:
+    """Build formatted rows, one second apart."""
+    return [
+        {"Transaction Hash": f"0x{n:064x}", "Blockno": str(100 + n), "UnixTimestamp": str(1600000000 + n)}
+        for n in range(first, first + count)
+    ]
+
+
+class ShardedXlsxHandlerTest(unittest.TestCase):
+    """Rows roll over into new shards and are written once."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.file_path = str(Path(self.directory.name) / "report.xlsx")
+
+    def _shard_rows(self, handler: ShardedXlsxHandler) -> list[int]:
+        return [XlsxHandler(path).get_row_count() for path in handler.shard_paths()]
+
+    def test_rows_roll_into_new_shards(self):
+        handler = ShardedXlsxHandler(self.file_path, "rows:10")
+        self.assertEqual(len(handler.append_new_transactions(_rows(0, 15))), 15)
+        self.assertEqual(len(handler.append_new_transactions(_rows(10, 10))), 5)
+
+        self.assertEqual(self._shard_rows(handler), [10, 10])
+        self.assertEqual(handler.get_row_count(), 20)
+        self.assertEqual(handler.get_last_timestamp(), 1600000019)
+
+    def test_interrupted_append_is_not_duplicated(self):
+        ShardedXlsxHandler(self.file_path, "rows:10").append_new_transactions(_rows(0, 15))
+
+        # Crash after the first shard was saved, before the manifest was
+        with mock.patch.object(ShardedXlsxHandler, "_update_shard", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                ShardedXlsxHandler(self.file_path, "rows:10").append_new_transactions(_rows(15, 10))
+
+        handler = ShardedXlsxHandler(self.file_path, "rows:10")
+        handler.append_new_transactions(_rows(15, 10))
+
+        self.assertEqual(self._shard_rows(handler), [10, 10, 5])
+        self.assertEqual(handler.get_row_count(), 25)
+        self.assertEqual(len(handler.get_existing_hashes()), 25)
+
+
+if __name__ == "__main__":
+    unittest.main()